@@ -38,14 +38,29 @@ if env_db:
 else:
     app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{default_db}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-# make sure SQLAlchemy uses a non-pooled engine for SQLite so external DB edits
-# (e.g., via DB Browser) are visible immediately and connections don't block.
-from sqlalchemy.pool import NullPool
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'connect_args': {'check_same_thread': False},
-    'poolclass': NullPool,
-}
+# engine profile: "edit" (default) keeps the non-pooled engine so external DB
+# edits (e.g., via DB Browser) are visible immediately; "production" pools
+# connections and runs SQLite in WAL mode. See engine_profile.py.
+from engine_profile import current_profile, engine_options, install_pragmas
+app.config['DB_ENGINE_PROFILE'] = current_profile()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['DB_ENGINE_PROFILE'])
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'supersecretjwtkey')
+# let the front server stream invoice files (see routes/invoices.py)
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', 'false').lower() in ('1', 'true', 'yes')
+app.config['INVOICE_ACCEL_REDIRECT_PREFIX'] = os.getenv('INVOICE_ACCEL_REDIRECT_PREFIX')
+# coalesce concurrent writes into shared commits (see group_commit.py)
+from group_commit import enabled_from_env as group_commit_enabled
+app.config['GROUP_COMMIT'] = group_commit_enabled()
+# statements slower than this are logged with their query plan (slow_query.py)
+app.config['SLOW_QUERY_MS'] = float(os.getenv('SLOW_QUERY_MS', 100))
+app.config['SLOW_QUERY_LOG'] = os.getenv('SLOW_QUERY_LOG', os.path.join(app.instance_path, 'slow_queries.jsonl'))
+# where login OTPs live: 'sqlite' (shared by all workers) or 'memory' (otp_store.py)
+app.config['OTP_STORE'] = os.getenv('OTP_STORE', 'sqlite').strip().lower()
+# token-bucket limits on the auth (and optionally write) endpoints (ratelimit.py)
+app.config['RATE_LIMIT'] = os.getenv('RATE_LIMIT', 'true').lower() in ('1', 'true', 'yes')
+app.config['RATE_LIMIT_STORE'] = os.getenv('RATE_LIMIT_STORE', 'memory').strip().lower()
+app.config['RATE_LIMIT_DB'] = os.getenv('RATE_LIMIT_DB', os.path.join(app.instance_path, 'ratelimit.db'))
+app.config['RATE_LIMIT_PROXY_HOPS'] = int(os.getenv('RATE_LIMIT_PROXY_HOPS', 0))
 
 # enable CORS for frontend dev server
 CORS(app)
@@ -58,8 +73,19 @@ db.init_app(app)
 migrate.init_app(app, db)
 jwt.init_app(app)
 
+# apply per-connection PRAGMAs before anything opens a connection
+# and time every statement / request for GET /metrics
+from metrics import install_metrics
+from slow_query import install_slow_query_log
+from ratelimit import install_rate_limits
+with app.app_context():
+    install_pragmas(db.engine, app.config['DB_ENGINE_PROFILE'])
+    install_metrics(app, db.engine)
+    install_slow_query_log(app)
+install_rate_limits(app)
+
 # import models so migrations can detect them (models import db from extensions)
-from models import User, Supplier, Customer, Purchase, Sale, Transaction, Alert  # noqa
+from models import User, Supplier, Customer, Purchase, Sale, Transaction, Alert, ChangeLog, CustomerBalance, DailyRollup, MonthlyRollup, IdSequence  # noqa
 
 # register blueprints after app and extensions are configured
 from routes.auth import auth as auth_bp
@@ -85,112 +111,39 @@ app.register_blueprint(debug_bp)
 from routes.updates import updates as updates_bp
 app.register_blueprint(updates_bp, url_prefix="/updates")
 
+from routes.reports import reports as reports_bp
+app.register_blueprint(reports_bp, url_prefix="/reports")
+
+from routes.invoices import invoices as invoices_bp
+app.register_blueprint(invoices_bp, url_prefix="/invoices")
+
+from routes.metrics import metrics_bp
+app.register_blueprint(metrics_bp)
+
 
 @app.route('/')
 def index():
     return "GroceryBag Pro backend running"
 
 with app.app_context():
-    # create tables if they don't exist so demo is ready immediately
-    try:
-        # import here so extensions and models are loaded
-        from extensions import db as _db
-        _db.create_all()
-    except Exception:
-        # if create_all fails, we don't want the app import to crash during tooling
-        pass
+    # one PRAGMA user_version read when the DB is current; otherwise create
+    # missing tables and apply pending columns/indexes/triggers (schema.py)
+    from schema import ensure_schema
+    db_uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    db_file = None
+    if db_uri.startswith('sqlite:///'):
+        db_file = db_uri.replace('sqlite:///', '')
+    else:
+        # fallback to instance default
+        db_file = os.path.join(app.instance_path, 'grocerybag.db')
+    app.config['DB_FILE_PATH'] = db_file
 
-    # ensure the users table has an `otp` column for demo convenience
     try:
-        import sqlite3
-        db_uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
-        db_file = None
-        if db_uri.startswith('sqlite:///'):
-            db_file = db_uri.replace('sqlite:///', '')
-        else:
-            # fallback to instance default
-            db_file = os.path.join(app.instance_path, 'grocerybag.db')
-        app.config['DB_FILE_PATH'] = db_file
-
-        conn = sqlite3.connect(db_file)
-        cur = conn.cursor()
-        cur.execute("PRAGMA table_info('users')")
-        cols = [r[1] for r in cur.fetchall()]
-        if 'otp' not in cols:
-            try:
-                cur.execute("ALTER TABLE users ADD COLUMN otp VARCHAR(10)")
-                conn.commit()
-                print('Added users.otp column to', db_file)
-            except Exception as ex:
-                print('Failed to add users.otp column:', ex)
-        conn.close()
-        # ensure suppliers has supplier_id
-        conn = sqlite3.connect(db_file)
-        cur = conn.cursor()
-        try:
-            cur.execute("PRAGMA table_info('suppliers')")
-            cols = [r[1] for r in cur.fetchall()]
-            if 'supplier_id' not in cols:
-                try:
-                    cur.execute("ALTER TABLE suppliers ADD COLUMN supplier_id VARCHAR(100)")
-                    conn.commit()
-                    print('Added suppliers.supplier_id to', db_file)
-                except Exception as ex:
-                    print('Failed to add suppliers.supplier_id:', ex)
-        except Exception:
-            pass
-        try:
-            cur.execute("PRAGMA table_info('customers')")
-            cols = [r[1] for r in cur.fetchall()]
-            if 'customer_id' not in cols:
-                try:
-                    cur.execute("ALTER TABLE customers ADD COLUMN customer_id VARCHAR(100)")
-                    conn.commit()
-                    print('Added customers.customer_id to', db_file)
-                except Exception as ex:
-                    print('Failed to add customers.customer_id:', ex)
-        except Exception:
-            pass
-        try:
-            cur.execute("PRAGMA table_info('customers')")
-            cols = [r[1] for r in cur.fetchall()]
-            if 'uid' not in cols:
-                try:
-                    cur.execute("ALTER TABLE customers ADD COLUMN uid VARCHAR(20)")
-                    conn.commit()
-                    print('Added customers.uid to', db_file)
-                except Exception as ex:
-                    print('Failed to add customers.uid:', ex)
-        except Exception:
-            pass
-        try:
-            cur.execute("PRAGMA table_info('purchases')")
-            cols = [r[1] for r in cur.fetchall()]
-            if 'purchase_id' not in cols:
-                try:
-                    cur.execute("ALTER TABLE purchases ADD COLUMN purchase_id VARCHAR(100)")
-                    conn.commit()
-                    print('Added purchases.purchase_id to', db_file)
-                except Exception as ex:
-                    print('Failed to add purchases.purchase_id:', ex)
-        except Exception:
-            pass
-        try:
-            cur.execute("PRAGMA table_info('sales')")
-            cols = [r[1] for r in cur.fetchall()]
-            if 'sale_id' not in cols:
-                try:
-                    cur.execute("ALTER TABLE sales ADD COLUMN sale_id VARCHAR(100)")
-                    conn.commit()
-                    print('Added sales.sale_id to', db_file)
-                except Exception as ex:
-                    print('Failed to add sales.sale_id:', ex)
-        except Exception:
-            pass
-        conn.close()
-    except Exception as _:
-        # don't let DB migrations here break app import
-        pass
+        ensure_schema(db_file, create_all=db.create_all)
+    except Exception:
+        # a half-migrated DB must not keep serving; fail the import loudly
+        app.logger.exception('Schema check failed for %s', db_file)
+        raise
 
 if __name__ == '__main__':
     app.run(debug=True)
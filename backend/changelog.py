@@ -0,0 +1,59 @@
+# backend/changelog.py
+"""Trigger-maintained change log for the sync endpoints.
+
+Every INSERT/UPDATE/DELETE on a tracked table appends a row to `change_log`
+with a monotonically increasing `seq`. Triggers (rather than ORM events) are
+used so edits made outside the app, e.g. in DB Browser, are captured too.
+"""
+
+TRACKED_TABLES = ('suppliers', 'customers', 'purchases', 'sales')
+
+
+def install_triggers(cur, tables=TRACKED_TABLES):
+    """Create the change_log table (if create_all hasn't) and its triggers."""
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS change_log ("
+        "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "entity VARCHAR(30) NOT NULL, "
+        "row_id INTEGER NOT NULL, "
+        "op VARCHAR(10) NOT NULL, "
+        "changed_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_change_log_entity_seq ON change_log (entity, seq)")
+    for table in tables:
+        for event, op, ref in (('INSERT', 'upsert', 'NEW'), ('UPDATE', 'upsert', 'NEW'), ('DELETE', 'delete', 'OLD')):
+            cur.execute(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{table}_changelog_{event.lower()} "
+                f"AFTER {event} ON {table} BEGIN "
+                f"INSERT INTO change_log (entity, row_id, op) VALUES ('{table}', {ref}.id, '{op}'); "
+                f"END"
+            )
+
+
+def head_seq(conn):
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+
+def latest_change_sql(count):
+    """SQL for the (seq, changed_at) of the newest change to any of ``count``
+    entities (bound as parameters); no row if none has changed yet.
+
+    One MAX() per entity, so each is a single seek on ix_change_log_entity_seq
+    rather than a scan of every change to those entities.
+    """
+    per_entity = " UNION ALL ".join(["SELECT MAX(seq) AS seq FROM change_log WHERE entity = ?"] * count)
+    return f"SELECT seq, changed_at FROM change_log WHERE seq = (SELECT MAX(seq) FROM ({per_entity}))"
+
+
+def changed_ids(conn, cursor, head):
+    """Map entity -> sorted row ids changed in ``(cursor, head]``."""
+    out = {}
+    rows = conn.execute(
+        "SELECT entity, row_id FROM change_log WHERE seq > ? AND seq <= ? GROUP BY entity, row_id",
+        (cursor, head),
+    ).fetchall()
+    for entity, row_id in rows:
+        out.setdefault(entity, []).append(row_id)
+    for ids in out.values():
+        ids.sort()
+    return out
@@ -0,0 +1,78 @@
+# backend/conditional.py
+"""Conditional GET for list endpoints, keyed on change_log.
+
+Every insert, edit or delete on a tracked table (changelog.TRACKED_TABLES)
+appends a change_log row, so the newest seq among the tables an endpoint
+reads is a version of its data. @conditional('customers', ...) looks that up
+with one indexed query before the view runs: when the client's If-None-Match
+already holds the matching ETag the answer is an empty 304 and the view (and
+the ORM) is never touched; otherwise the view's 200 goes out with ETag,
+Last-Modified and `Cache-Control: no-cache`, so browsers revalidate on every
+load instead of guessing a freshness lifetime.
+
+The ETag also carries a short hash of the path and query string: each page,
+filter and limit is a different representation, and a client or proxy that
+reuses a validator across URLs must not get a 304 for the wrong one.
+
+The version is read before the data, so a write landing in between can only
+make the next request miss, never pin a stale body.
+"""
+import hashlib
+import os
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from changelog import latest_change_sql
+from extensions import db
+
+
+def data_version(entities):
+    """(seq, changed_at) of the newest change to ``entities``; (0, None) if none."""
+    # driver-level SQL: changelog's queries use the sqlite3 "?" paramstyle
+    row = db.session.connection().exec_driver_sql(latest_change_sql(len(entities)), tuple(entities)).first()
+    if row is None:
+        return 0, None
+    changed_at = row[1]
+    if isinstance(changed_at, str):
+        try:
+            changed_at = datetime.fromisoformat(changed_at)
+        except ValueError:
+            changed_at = None
+    return row[0], changed_at
+
+
+def _db_identity():
+    # a DB swapped in at the same path (restore, regenerated test data) may
+    # well be at the same seq, often 0 when it was bulk-loaded; its inode isn't
+    try:
+        return format(os.stat(current_app.config['DB_FILE_PATH']).st_ino, 'x')
+    except (KeyError, OSError):
+        return '0'
+
+
+def _finish(resp, etag, changed_at):
+    resp.set_etag(etag)
+    if changed_at is not None:
+        resp.last_modified = changed_at
+    resp.cache_control.no_cache = True
+    return resp
+
+
+def conditional(*entities):
+    """Answer If-None-Match with 304 while ``entities`` are unchanged."""
+    def decorate(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            seq, changed_at = data_version(entities)
+            query = hashlib.sha1(request.full_path.encode()).hexdigest()[:10]
+            etag = f"{'+'.join(entities)}.{seq}.{_db_identity()}.{query}"
+            if request.if_none_match.contains_weak(etag):
+                return _finish(make_response('', 304), etag, changed_at)
+            resp = make_response(view(*args, **kwargs))
+            if resp.status_code == 200:
+                _finish(resp, etag, changed_at)
+            return resp
+        return wrapper
+    return decorate
@@ -0,0 +1,79 @@
+# backend/engine_profile.py
+"""SQLAlchemy engine profiles for the SQLite database.
+
+- "edit" (default): NullPool, a fresh connection per request, so edits made
+  in DB Browser are visible immediately and nothing holds the file open.
+- "production": pooled connections plus WAL journal, busy_timeout,
+  synchronous=NORMAL and a larger page cache / mmap window applied on
+  connect, so requests reuse warm connections and readers don't queue
+  behind the writer.
+
+Pick with DB_ENGINE_PROFILE=production; the knobs below can be overridden
+through the matching environment variables.
+"""
+import os
+from sqlalchemy import event
+from sqlalchemy.pool import NullPool, QueuePool
+
+PROFILES = ('edit', 'production')
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def current_profile():
+    profile = os.getenv('DB_ENGINE_PROFILE', 'edit').strip().lower()
+    return profile if profile in PROFILES else 'edit'
+
+
+def engine_options(profile):
+    if profile == 'production':
+        return {
+            'connect_args': {
+                'check_same_thread': False,
+                # python-level wait for the write lock, in seconds
+                'timeout': _env_int('DB_BUSY_TIMEOUT_MS', 5000) / 1000.0,
+            },
+            'poolclass': QueuePool,
+            'pool_size': _env_int('DB_POOL_SIZE', 10),
+            'max_overflow': _env_int('DB_POOL_MAX_OVERFLOW', 20),
+        }
+    # make sure SQLAlchemy uses a non-pooled engine for SQLite so external DB edits
+    # (e.g., via DB Browser) are visible immediately and connections don't block.
+    return {
+        'connect_args': {'check_same_thread': False},
+        'poolclass': NullPool,
+    }
+
+
+def connect_pragmas(profile):
+    if profile != 'production':
+        return []
+    return [
+        'PRAGMA journal_mode=WAL',
+        f"PRAGMA busy_timeout={_env_int('DB_BUSY_TIMEOUT_MS', 5000)}",
+        'PRAGMA synchronous=NORMAL',
+        # negative cache_size is in KiB
+        f"PRAGMA cache_size=-{_env_int('DB_CACHE_SIZE_KB', 64000)}",
+        f"PRAGMA mmap_size={_env_int('DB_MMAP_SIZE', 268435456)}",
+        'PRAGMA temp_store=MEMORY',
+    ]
+
+
+def install_pragmas(engine, profile):
+    pragmas = connect_pragmas(profile)
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_conn, conn_record):
+        cur = dbapi_conn.cursor()
+        try:
+            for stmt in pragmas:
+                cur.execute(stmt)
+        finally:
+            cur.close()
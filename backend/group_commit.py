@@ -0,0 +1,172 @@
+# backend/group_commit.py
+"""Group commit for the write endpoints.
+
+SQLite has a single write lock and every commit pays its own fsync, so many
+small concurrent writes queue behind each other. Handlers therefore hand
+their database work to run_write() as a *unit of work*: a callable that uses
+db.session, does not commit, and returns plain (JSON-ready) data - never ORM
+objects, which belong to whichever session ran the unit.
+
+With GROUP_COMMIT on, one writer thread per process collects the units
+submitted within GROUP_COMMIT_WINDOW_MS (at most GROUP_COMMIT_MAX_BATCH),
+runs them back to back in one transaction and commits once; every caller
+gets its own result or exception. If any unit fails, the group is rolled
+back and its units re-run one transaction each, so a bad request can't take
+its neighbours down (units must therefore be safe to run twice - build new
+rows inside the unit, not before it). Because units run one at a time,
+check-then-write logic inside a unit (e.g. "phone already exists") can't race
+another request in the same process.
+
+With GROUP_COMMIT off the unit runs inline on the request's own session and
+is committed right away; handlers look the same either way.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from flask import current_app
+
+from extensions import db
+from metrics import current_scope, use_scope
+
+WINDOW_MS = float(os.getenv('GROUP_COMMIT_WINDOW_MS', 2))
+MAX_BATCH = int(os.getenv('GROUP_COMMIT_MAX_BATCH', 64))
+# how long a request waits for its group before giving up
+RESULT_TIMEOUT = float(os.getenv('GROUP_COMMIT_TIMEOUT', 30))
+
+
+def enabled_from_env():
+    return os.getenv('GROUP_COMMIT', 'true').lower() in ('1', 'true', 'yes')
+
+
+class GroupCommitWriter:
+    def __init__(self, app, window_ms=WINDOW_MS, max_batch=MAX_BATCH):
+        self.app = app
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+        self.groups = 0
+        self.units = 0
+        self.fallbacks = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def in_writer(self):
+        return threading.current_thread() is self._thread
+
+    def submit(self, fn, scope=None):
+        """Queue ``fn``; returns a Future for its result. Queries it runs are
+        counted against metrics ``scope`` (the submitting request's)."""
+        fut = Future()
+        self._queue.put((fn, fut, scope))
+        return fut
+
+    def stats(self):
+        return {
+            'groups': self.groups,
+            'units': self.units,
+            'avg_group_size': round(self.units / self.groups, 2) if self.groups else None,
+            'fallbacks': self.fallbacks,
+            'queued': self._queue.qsize(),
+        }
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        # a long-lived app context gives this thread its own scoped session
+        with self.app.app_context():
+            while True:
+                batch = self._collect()
+                batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+                if batch:
+                    self._commit_group(batch)
+                db.session.remove()
+
+    def _commit_group(self, batch):
+        results = []
+        try:
+            for fn, _, scope in batch:
+                with use_scope(scope):
+                    results.append(fn())
+                    # flush per unit so a constraint error is raised here, not at commit
+                    db.session.flush()
+            # the shared commit belongs to no single request
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            if len(batch) > 1:
+                self.fallbacks += 1
+            for fn, fut, scope in batch:
+                self._commit_one(fn, fut, scope)
+            return
+        self.groups += 1
+        self.units += len(batch)
+        for (_, fut, _), result in zip(batch, results):
+            fut.set_result(result)
+
+    def _commit_one(self, fn, fut, scope):
+        try:
+            with use_scope(scope):
+                result = fn()
+                db.session.commit()
+        except Exception as ex:
+            db.session.rollback()
+            fut.set_exception(ex)
+            return
+        self.groups += 1
+        self.units += 1
+        fut.set_result(result)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer(app=None):
+    """The process-wide writer, started on first use (None when disabled)."""
+    global _writer
+    app = app or current_app._get_current_object()
+    if not app.config.get('GROUP_COMMIT'):
+        return None
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = GroupCommitWriter(app).start()
+    return _writer
+
+
+def run_write(fn):
+    """Run unit of work ``fn`` and commit it; returns fn's result.
+
+    Exceptions raised by the unit (or by its commit) propagate to the caller.
+    """
+    writer = get_writer()
+    if writer is None:
+        try:
+            result = fn()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return result
+    if writer.in_writer():
+        # nested call from inside a unit: part of the caller's transaction
+        return fn()
+    # end the request's own (read) transaction first so it can't hold a
+    # lock the writer is waiting on while we wait for the writer
+    db.session.rollback()
+    return writer.submit(fn, current_scope()).result(timeout=RESULT_TIMEOUT)
@@ -0,0 +1,118 @@
+# backend/id_blocks.py
+"""Block-allocated sequence numbers for external ids (S-, P-, CU-, SU-).
+
+External ids used to end in a random 4-digit fragment, which collides on the
+unique index once a few thousand rows share a prefix. Each sequence now
+lives in `id_sequences` as a single counter; a process reserves a block of
+ID_BLOCK_SIZE values at a time (hi/lo) in a short transaction of its own and
+hands them out from memory, so an insert needs neither a retry nor an extra
+query. Numbers are unique across processes; a block left unused when a
+process exits is simply a gap.
+
+On a DB that already holds rows, a sequence starts one past the largest
+number found in the existing ids (the NNNN of S-/P-MMW-NNNN, SUP-IMP-NNNN and
+CU-/SU-<date>-<name>NNNN-<sum>), so new numbers can't repeat a legacy random
+fragment and keep the 4-digit shape until that sequence passes 9999, where
+the ids simply grow a digit.
+
+Take numbers *before* run_write(): a unit of work runs inside the writer's
+transaction, and reserving a block from there would wait on its own lock.
+"""
+import os
+import threading
+
+from extensions import db
+
+# where an id carries its number: (GLOB the id must match, expression for it)
+_TAIL = ("'*-[0-9][0-9][0-9][0-9]'", "substr({col}, -4)")
+_BEFORE_SUM = ("'*[0-9][0-9][0-9][0-9]-[0-9][0-9][0-9][0-9]'", "substr({col}, -9, 4)")
+_IMPORTED = ("'SUP-IMP-[0-9][0-9][0-9][0-9]'", "substr({col}, -4)")
+
+# sequence -> (table, id column, number positions) whose ids it must not repeat
+SEQUENCES = {
+    'sale': ('sales', 'sale_id', [_TAIL]),
+    'purchase': ('purchases', 'purchase_id', [_TAIL]),
+    'customer': ('customers', 'customer_id', [_BEFORE_SUM]),
+    # SU-<date>-<name>NNNN-<sum> from the API, SUP-IMP-NNNN from the importer
+    'supplier': ('suppliers', 'supplier_id', [_BEFORE_SUM, _IMPORTED]),
+}
+BLOCK_SIZE = int(os.getenv('ID_BLOCK_SIZE', 50))
+
+
+def _first_free(cur, name):
+    # one scan, the first time a sequence is used on a DB
+    table, col, positions = SEQUENCES[name]
+    start = 1
+    for pattern, expr in positions:
+        cur.execute(f'SELECT MAX(CAST({expr.format(col=col)} AS INTEGER)) FROM {table} WHERE {col} GLOB {pattern}')
+        start = max(start, (cur.fetchone()[0] or 0) + 1)
+    return start
+
+
+def reserve_block(cur, name, size):
+    """Advance sequence ``name`` by ``size`` on DB-API cursor ``cur`` and
+    return the first reserved value. The caller owns the transaction."""
+    cur.execute('SELECT next_value FROM id_sequences WHERE name = ?', (name,))
+    row = cur.fetchone()
+    start = row[0] if row is not None else _first_free(cur, name)
+    cur.execute(
+        'INSERT INTO id_sequences (name, next_value) VALUES (?, ?) '
+        'ON CONFLICT(name) DO UPDATE SET next_value = excluded.next_value',
+        (name, start + size),
+    )
+    return start
+
+
+class BlockAllocator:
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = max(1, block_size)
+        self._lock = threading.Lock()
+        self._blocks = {}  # name -> [next, end)
+        self.reservations = 0
+
+    def _reserve(self, name, size):
+        conn = db.engine.raw_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute('BEGIN IMMEDIATE')
+            try:
+                start = reserve_block(cur, name, size)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        finally:
+            conn.close()
+        self.reservations += 1
+        return start
+
+    def take(self, name, count=1):
+        """Return ``count`` fresh numbers from sequence ``name``."""
+        out = []
+        with self._lock:
+            while len(out) < count:
+                block = self._blocks.get(name)
+                if block is None or block[0] >= block[1]:
+                    size = max(self.block_size, count - len(out))
+                    start = self._reserve(name, size)
+                    block = self._blocks[name] = [start, start + size]
+                n = min(block[1] - block[0], count - len(out))
+                out.extend(range(block[0], block[0] + n))
+                block[0] += n
+        return out
+
+    def next(self, name):
+        return self.take(name)[0]
+
+    def reset(self):
+        """Forget cached blocks (e.g. after pointing the app at another DB)."""
+        with self._lock:
+            self._blocks.clear()
+
+
+allocator = BlockAllocator()
+
+
+def month_week(now):
+    # the MMW part of S-/P- ids: month plus week-of-month (1-5)
+    return f"{now.month:02d}{(now.day - 1) // 7 + 1}"
@@ -0,0 +1,85 @@
+# backend/invoice_worker.py
+"""Background post-processing for uploaded invoice images.
+
+The upload handlers still write the original file during the request (the
+upload stream is request-bound), then hand it to process_invoice_later().
+A small thread pool re-encodes the photo as a size-capped WebP and writes a
+thumbnail next to it, then records both paths on the Sale / Purchase row, so
+the request doesn't wait on image work and list views can fetch the
+thumbnail instead of the full-resolution phone photo. PDFs are left as is.
+
+The row update goes through group_commit.run_write like any other write, so
+it queues behind the single writer instead of racing it for SQLite's lock.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+IMAGE_EXT = {'png', 'jpg', 'jpeg'}
+MAX_SIDE = int(os.getenv('INVOICE_MAX_SIDE', 1600))
+THUMB_SIDE = int(os.getenv('INVOICE_THUMB_SIDE', 320))
+WEBP_QUALITY = int(os.getenv('INVOICE_WEBP_QUALITY', 80))
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('INVOICE_WORKERS', 2)),
+    thread_name_prefix='invoice',
+)
+
+
+def _derived_urls(url):
+    base = url.rsplit('.', 1)[0]
+    return base + '.webp', base + '_thumb.webp'
+
+
+def _encode(src_path, optimized_path, thumb_path):
+    with Image.open(src_path) as img:
+        # let the JPEG decoder downscale while decoding; far cheaper than resize
+        img.draft('RGB', (MAX_SIDE, MAX_SIDE))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGB')
+        img.thumbnail((MAX_SIDE, MAX_SIDE))
+        img.save(optimized_path, 'WEBP', quality=WEBP_QUALITY, method=4)
+        img.thumbnail((THUMB_SIDE, THUMB_SIDE))
+        img.save(thumb_path, 'WEBP', quality=WEBP_QUALITY - 10, method=4)
+
+
+def process_invoice(app, model, row_id, url):
+    """Re-encode ``url`` (a /static/uploads/... path) and record the derived
+    files on ``model`` row ``row_id``. Runs in the worker pool."""
+    if not url or url.rsplit('.', 1)[-1].lower() not in IMAGE_EXT:
+        return None
+    optimized_url, thumb_url = _derived_urls(url)
+    src = os.path.join(app.root_path, url.lstrip('/'))
+    try:
+        _encode(src,
+                os.path.join(app.root_path, optimized_url.lstrip('/')),
+                os.path.join(app.root_path, thumb_url.lstrip('/')))
+    except Exception as ex:
+        app.logger.warning('invoice processing failed for %s: %s', url, ex)
+        return None
+
+    from extensions import db
+    from group_commit import run_write
+
+    def record():
+        db.session.query(model).filter(model.id == row_id).update(
+            {'invoice_optimized': optimized_url, 'invoice_thumbnail': thumb_url},
+            synchronize_session=False,
+        )
+
+    with app.app_context():
+        try:
+            run_write(record)
+        except Exception as ex:
+            app.logger.warning('could not record processed invoice for %s %s: %s', model.__tablename__, row_id, ex)
+            return None
+    return optimized_url, thumb_url
+
+
+def process_invoice_later(app, model, row_id, url):
+    """Queue ``process_invoice``; returns the Future (or None for non-images)."""
+    if not url or url.rsplit('.', 1)[-1].lower() not in IMAGE_EXT:
+        return None
+    return _executor.submit(process_invoice, app, model, row_id, url)
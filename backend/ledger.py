@@ -0,0 +1,58 @@
+# backend/ledger.py
+"""Per-customer running balances.
+
+`customer_balances` holds one row per customer (keyed by the same external
+customer_id string that sales.customer_id stores). Sale write paths call
+apply_sale_delta() inside their own transaction so the balance and the sale
+commit together; REBUILD_SQL re-derives every row from the sales history.
+
+Both derive `outstanding` as total_sales - total_paid rather than summing
+sales.outstanding, which legacy rows leave NULL or stale, so a rebuilt
+balance matches one maintained by live writes.
+"""
+from datetime import datetime
+from sqlalchemy.dialects.sqlite import insert
+from models import CustomerBalance
+
+REBUILD_SQL = [
+    "DELETE FROM customer_balances",
+    "INSERT INTO customer_balances (customer_id, total_sales, total_paid, outstanding, sale_count, updated_at) "
+    "SELECT customer_id, COALESCE(SUM(total_amount), 0), COALESCE(SUM(paid_amount), 0), "
+    "COALESCE(SUM(total_amount), 0) - COALESCE(SUM(paid_amount), 0), COUNT(*), CURRENT_TIMESTAMP "
+    "FROM sales WHERE customer_id IS NOT NULL GROUP BY customer_id",
+]
+
+
+def apply_sale_delta(session, customer_id, total=0.0, paid=0.0, count=0):
+    """Add a sale's effect (or the difference from an edit) to a balance row.
+
+    Single UPSERT, so it costs the same regardless of sales history size.
+    """
+    total = total or 0.0
+    paid = paid or 0.0
+    stmt = insert(CustomerBalance).values(
+        customer_id=customer_id,
+        total_sales=total,
+        total_paid=paid,
+        outstanding=total - paid,
+        sale_count=count,
+        updated_at=datetime.utcnow(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CustomerBalance.customer_id],
+        set_={
+            'total_sales': CustomerBalance.total_sales + stmt.excluded.total_sales,
+            'total_paid': CustomerBalance.total_paid + stmt.excluded.total_paid,
+            'outstanding': CustomerBalance.outstanding + stmt.excluded.outstanding,
+            'sale_count': CustomerBalance.sale_count + stmt.excluded.sale_count,
+            'updated_at': stmt.excluded.updated_at,
+        },
+    )
+    session.execute(stmt)
+
+
+def rebuild_balances(conn):
+    """Recompute all balances from sales on a sqlite3 connection; the caller
+    commits."""
+    for stmt in REBUILD_SQL:
+        conn.execute(stmt)
@@ -0,0 +1,277 @@
+# backend/metrics.py
+"""Per-endpoint request latency, query count and DB time, in Prometheus text.
+
+install_metrics() hooks SQLAlchemy's before/after_cursor_execute and Flask's
+request_started / request_finished signals. Each request gets a Scope that
+counts its queries and DB time; when it finishes, latency, query count and
+DB time are observed into histograms labelled by endpoint. Routes that talk
+to SQLite directly (updates, debug) open their connections with connect(),
+whose cursors are timed the same way. Units of work run by the group-commit
+writer are attributed to the request that submitted them (see
+group_commit.py); anything else outside a request is labelled "<background>".
+
+GET /metrics (routes/metrics.py) renders the registry.
+"""
+import sqlite3
+import threading
+import time
+
+from flask import g, has_request_context, request, request_finished, request_started
+from sqlalchemy import event
+
+PREFIX = 'grocerybag'
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+BACKGROUND = '<background>'
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, label_names):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.label_names = label_names
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, labels, value):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self._series.items()):
+            base = _labels(self.label_names, labels)
+            for bound, n in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {n}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series[-1]}')
+            lines.append(f'{self.name}_sum{{{base}}} {series[-2]:.6f}')
+            lines.append(f'{self.name}_count{{{base}}} {series[-1]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self._values = {}
+
+    def inc(self, labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self._values.items()):
+            shown = f'{value:.6f}' if isinstance(value, float) else value
+            lines.append(f'{self.name}{{{_labels(self.label_names, labels)}}} {shown}')
+        return lines
+
+
+def _labels(names, values):
+    def esc(v):
+        return str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{n}="{esc(v)}"' for n, v in zip(names, values))
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter(f'{PREFIX}_requests_total', 'Requests by endpoint, method and status.',
+                                ('endpoint', 'method', 'status'))
+        self.latency = Histogram(f'{PREFIX}_request_duration_seconds', 'Request latency (until the response is returned).',
+                                 LATENCY_BUCKETS, ('endpoint', 'method'))
+        self.request_queries = Histogram(f'{PREFIX}_request_queries', 'SQL statements issued per request.',
+                                         QUERY_BUCKETS, ('endpoint', 'method'))
+        self.request_db_time = Histogram(f'{PREFIX}_request_db_seconds', 'Time spent in SQL per request.',
+                                         LATENCY_BUCKETS, ('endpoint', 'method'))
+        self.queries = Counter(f'{PREFIX}_db_queries_total', 'SQL statements by endpoint and driver path.',
+                               ('endpoint', 'source'))
+        self.db_time = Counter(f'{PREFIX}_db_seconds_total', 'Time spent in SQL by endpoint and driver path.',
+                               ('endpoint', 'source'))
+
+    def observe_query(self, endpoint, source, seconds, count=1):
+        with self._lock:
+            if count:
+                self.queries.inc((endpoint, source), count)
+            self.db_time.inc((endpoint, source), seconds)
+
+    def observe_request(self, endpoint, method, status, seconds, queries, db_seconds):
+        with self._lock:
+            self.requests.inc((endpoint, method, str(status)))
+            self.latency.observe((endpoint, method), seconds)
+            self.request_queries.observe((endpoint, method), queries)
+            self.request_db_time.observe((endpoint, method), db_seconds)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (self.requests, self.latency, self.request_queries,
+                           self.request_db_time, self.queries, self.db_time):
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class Scope:
+    """Query tally for one request (or one unit of work run on its behalf)."""
+    __slots__ = ('endpoint', 'started', 'queries', 'db_seconds')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_local = threading.local()
+
+
+def current_scope():
+    scope = getattr(_local, 'scope', None)
+    if scope is not None:
+        return scope
+    if has_request_context():
+        return g.get('_metrics_scope')
+    return None
+
+
+class use_scope:
+    """Attribute queries on this thread to ``scope`` (e.g. in the writer)."""
+
+    def __init__(self, scope):
+        self.scope = scope
+
+    def __enter__(self):
+        self.prev = getattr(_local, 'scope', None)
+        _local.scope = self.scope
+        return self.scope
+
+    def __exit__(self, *exc):
+        _local.scope = self.prev
+
+
+# fn(dbapi_conn, statement, params, seconds, source, endpoint), called after
+# every statement that completes (e.g. the slow-query log, slow_query.py)
+query_observers = []
+
+
+def record_query(seconds, source, count=1):
+    scope = current_scope()
+    if scope is not None:
+        scope.queries += count
+        scope.db_seconds += seconds
+        endpoint = scope.endpoint
+    else:
+        endpoint = BACKGROUND
+    registry.observe_query(endpoint, source, seconds, count)
+    return endpoint
+
+
+def _statement_done(dbapi_conn, statement, params, seconds, source):
+    endpoint = record_query(seconds, source)
+    for observe in query_observers:
+        try:
+            observe(dbapi_conn, statement, params, seconds, source, endpoint)
+        except Exception:
+            # instrumentation must never fail the query it watches
+            pass
+
+
+# -- raw sqlite3 ---------------------------------------------------------
+class TimedCursor(sqlite3.Cursor):
+    # SQLite runs a statement lazily as rows are stepped, so fetches count
+    # towards DB time as well (but not towards the statement count)
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            result = super().execute(sql, parameters)
+        except Exception:
+            record_query(time.perf_counter() - start, 'sqlite3')
+            raise
+        _statement_done(self.connection, sql, parameters, time.perf_counter() - start, 'sqlite3')
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            result = super().executemany(sql, seq_of_parameters)
+        except Exception:
+            record_query(time.perf_counter() - start, 'sqlite3')
+            raise
+        _statement_done(self.connection, sql, seq_of_parameters, time.perf_counter() - start, 'sqlite3')
+        return result
+
+    def _timed_fetch(self, fetch, *args):
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            record_query(time.perf_counter() - start, 'sqlite3', count=0)
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._timed_fetch(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+
+def connect(path, **kwargs):
+    """sqlite3.connect() whose statements are recorded like the ORM's."""
+    return sqlite3.connect(path, factory=TimedConnection, **kwargs)
+
+
+# -- hooks ---------------------------------------------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_metrics_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get('_metrics_start')
+    if stack:
+        _statement_done(conn.connection.dbapi_connection, statement, parameters,
+                        time.perf_counter() - stack.pop(), 'sqlalchemy')
+
+
+def _handle_error(context):
+    # a failed statement never reaches after_cursor_execute
+    conn = context.connection
+    stack = conn.info.get('_metrics_start') if conn is not None else None
+    if stack:
+        record_query(time.perf_counter() - stack.pop(), 'sqlalchemy')
+
+
+def _request_started(sender, **extra):
+    g._metrics_scope = Scope(request.endpoint or 'unmatched')
+
+
+def _request_finished(sender, response, **extra):
+    scope = g.get('_metrics_scope')
+    if scope is None:
+        return
+    registry.observe_request(scope.endpoint, request.method, response.status_code,
+                             time.perf_counter() - scope.started, scope.queries, scope.db_seconds)
+
+
+def install_metrics(app, engine):
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+    request_started.connect(_request_started, app)
+    request_finished.connect(_request_finished, app)
@@ -1,5 +1,6 @@
 from datetime import datetime
 from extensions import db
+from passwords import hash_password, verify_password
 
 def generate_uid(prefix, id_num):
     return f"{prefix}-{id_num:04d}"
@@ -15,11 +16,12 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def set_password(self, password):
-        # Dev-only: store plaintext password
-        self.password = password
+        # hashed on the password pool (passwords.py); don't call from inside a
+        # unit of work, it would hold up the group-commit writer
+        self.password = hash_password(password)
 
     def check_password(self, password):
-        return self.password == password
+        return verify_password(self.password, password)[0]
 
 class Supplier(db.Model):
     __tablename__ = 'suppliers'
@@ -30,6 +32,11 @@ class Supplier(db.Model):
     address = db.Column(db.String(250))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # name lookups in resolver.py compare lower(trim(name))
+    __table_args__ = (
+        db.Index('ix_suppliers_name_norm', db.func.lower(db.func.trim(name))),
+    )
+
 class Customer(db.Model):
     __tablename__ = 'customers'
     id = db.Column(db.Integer, primary_key=True)
@@ -40,6 +47,10 @@ class Customer(db.Model):
     address = db.Column(db.String(250))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_customers_name_norm', db.func.lower(db.func.trim(name))),
+    )
+
 class Purchase(db.Model):
     __tablename__ = 'purchases'
     purchase_id = db.Column(db.String(50), unique=True, index=True)
@@ -51,9 +62,18 @@ class Purchase(db.Model):
     price_per_unit = db.Column(db.Float, nullable=False)
     total_amount = db.Column(db.Float, nullable=False)
     invoice_image = db.Column(db.String(300))  # path or URL
+    # WebP re-encode + thumbnail written by invoice_worker after upload
+    invoice_optimized = db.Column(db.String(300))
+    invoice_thumbnail = db.Column(db.String(300))
     date = db.Column(db.DateTime, default=datetime.utcnow)
     supplier = db.relationship('Supplier', primaryjoin="Supplier.supplier_id==Purchase.supplier_id", backref=db.backref('purchases', lazy=True))
 
+    # back keyset pagination on (date, id), optionally narrowed by supplier
+    __table_args__ = (
+        db.Index('ix_purchases_date_id', 'date', 'id'),
+        db.Index('ix_purchases_supplier_date_id', 'supplier_id', 'date', 'id'),
+    )
+
 class Sale(db.Model):
     __tablename__ = 'sales'
     sale_id = db.Column(db.String(50), unique=True, index=True)
@@ -66,9 +86,65 @@ class Sale(db.Model):
     paid_amount = db.Column(db.Float, default=0.0)
     outstanding = db.Column(db.Float, default=0.0)
     invoice_image = db.Column(db.String(300))
+    invoice_optimized = db.Column(db.String(300))
+    invoice_thumbnail = db.Column(db.String(300))
     date = db.Column(db.DateTime, default=datetime.utcnow)
     customer = db.relationship('Customer', primaryjoin="Customer.customer_id==Sale.customer_id", backref=db.backref('sales', lazy=True))
 
+    # customer ledger / dues lookups and date-range scans for GET /sales
+    __table_args__ = (
+        db.Index('ix_sales_customer_date', 'customer_id', 'date'),
+        db.Index('ix_sales_date', 'date'),
+    )
+
+class CustomerBalance(db.Model):
+    # running totals per customer, maintained by ledger.apply_sale_delta
+    __tablename__ = 'customer_balances'
+    customer_id = db.Column(db.String(80), primary_key=True)  # external customer_id, as on sales
+    total_sales = db.Column(db.Float, nullable=False, default=0.0)
+    total_paid = db.Column(db.Float, nullable=False, default=0.0)
+    outstanding = db.Column(db.Float, nullable=False, default=0.0)
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # top-debtors reads walk this index backwards
+    __table_args__ = (
+        db.Index('ix_customer_balances_outstanding', 'outstanding'),
+    )
+
+class DailyRollup(db.Model):
+    # per (day, bag_size) totals, maintained by rollups.apply_sale/apply_purchase
+    __tablename__ = 'daily_rollups'
+    day = db.Column(db.String(10), primary_key=True)  # 'YYYY-MM-DD'
+    bag_size = db.Column(db.String(20), primary_key=True)
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    paid = db.Column(db.Float, nullable=False, default=0.0)
+    outstanding = db.Column(db.Float, nullable=False, default=0.0)
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    units_purchased = db.Column(db.Integer, nullable=False, default=0)
+    cost = db.Column(db.Float, nullable=False, default=0.0)
+    purchase_count = db.Column(db.Integer, nullable=False, default=0)
+
+class MonthlyRollup(db.Model):
+    __tablename__ = 'monthly_rollups'
+    month = db.Column(db.String(7), primary_key=True)  # 'YYYY-MM'
+    bag_size = db.Column(db.String(20), primary_key=True)
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    paid = db.Column(db.Float, nullable=False, default=0.0)
+    outstanding = db.Column(db.Float, nullable=False, default=0.0)
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    units_purchased = db.Column(db.Integer, nullable=False, default=0)
+    cost = db.Column(db.Float, nullable=False, default=0.0)
+    purchase_count = db.Column(db.Integer, nullable=False, default=0)
+
+class IdSequence(db.Model):
+    # hi/lo counters for external ids; processes reserve blocks (see id_blocks.py)
+    __tablename__ = 'id_sequences'
+    name = db.Column(db.String(30), primary_key=True)
+    next_value = db.Column(db.Integer, nullable=False)
+
 class Transaction(db.Model):
     __tablename__ = 'transactions'
     id = db.Column(db.Integer, primary_key=True)
@@ -79,6 +155,20 @@ class Transaction(db.Model):
     note = db.Column(db.String(300))
     date = db.Column(db.DateTime, default=datetime.utcnow)
 
+class ChangeLog(db.Model):
+    # append-only, filled by triggers (see changelog.py); seq is the sync cursor
+    __tablename__ = 'change_log'
+    __table_args__ = (
+        # newest change per entity, for the list endpoints' ETags (conditional.py)
+        db.Index('ix_change_log_entity_seq', 'entity', 'seq'),
+        {'sqlite_autoincrement': True},
+    )
+    seq = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(30), nullable=False)  # table name
+    row_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # 'upsert','delete'
+    changed_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
 class Alert(db.Model):
     __tablename__ = 'alerts'
     id = db.Column(db.Integer, primary_key=True)
@@ -100,3 +190,9 @@ class OTP(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     user = db.relationship('User', backref=db.backref('otps', lazy=True))
+
+    # verification is a point lookup; the purge (otp_store.py) a range scan
+    __table_args__ = (
+        db.Index('ix_otp_user_code', 'user_id', 'code'),
+        db.Index('ix_otp_expires_at', 'expires_at'),
+    )
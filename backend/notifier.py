@@ -0,0 +1,52 @@
+# backend/notifier.py
+"""In-process change notifier used by the /updates/stream feed.
+
+Every SQLAlchemy commit that flushed at least one row bumps a version counter
+and wakes the waiting stream handlers, so idle clients block on a condition
+variable instead of polling the database.
+"""
+import threading
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class ChangeNotifier:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._version = 0
+
+    @property
+    def version(self):
+        return self._version
+
+    def notify(self):
+        with self._cond:
+            self._version += 1
+            self._cond.notify_all()
+
+    def wait(self, since_version, timeout=None):
+        """Block until the version moves past ``since_version`` or ``timeout``
+        seconds pass; returns the current version either way."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != since_version, timeout)
+            return self._version
+
+
+notifier = ChangeNotifier()
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_changed(session, flush_context):
+    if session.new or session.dirty or session.deleted:
+        session.info['has_changes'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_on_commit(session):
+    if session.info.pop('has_changes', False):
+        notifier.notify()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_on_rollback(session):
+    session.info.pop('has_changes', None)
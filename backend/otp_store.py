@@ -0,0 +1,177 @@
+# backend/otp_store.py
+"""One-time login codes, kept for OTP_TTL_SECONDS.
+
+Each user has at most one live code: issuing a new one replaces the last,
+and a code is consumed by the verification that accepts it. Two stores,
+picked with OTP_STORE:
+
+- "sqlite" (default): the `otp` table. Issuing is one DELETE + INSERT for
+  the user, verifying is a single DELETE ... WHERE user_id = ? AND code = ?
+  on ix_otp_user_code that succeeds at most once. Codes that expire unused
+  (and rows that older versions flagged `used`, which expire the same way)
+  are purged in bulk on ix_otp_expires_at at most every OTP_PURGE_SECONDS, inside the unit of
+  work of whichever issue comes due, so the table stays about one row per
+  recently active user and no extra thread is needed.
+- "memory": a per-process dict with the same rules and no DB writes at all.
+  Only for single-process deployments - a code issued by one gunicorn
+  worker is unknown to the others.
+"""
+import hmac
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from extensions import db
+from group_commit import run_write
+from models import OTP
+
+TTL_SECONDS = int(os.getenv('OTP_TTL_SECONDS', 600))
+PURGE_SECONDS = int(os.getenv('OTP_PURGE_SECONDS', 300))
+
+
+def new_code():
+    return f"{secrets.randbelow(1000000):06d}"
+
+
+class _Store:
+    def __init__(self, ttl=TTL_SECONDS, purge_every=PURGE_SECONDS):
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self._lock = threading.Lock()
+        self._last_purge = time.monotonic()
+        self.issued = 0
+        self.verified = 0
+        self.rejected = 0
+        self.purged = 0
+
+    def _purge_due(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_purge < self.purge_every:
+                return False
+            self._last_purge = now
+            return True
+
+    def _count(self, ok):
+        with self._lock:
+            if ok:
+                self.verified += 1
+            else:
+                self.rejected += 1
+        return ok
+
+    def stats(self):
+        return {'store': self.name, 'ttl_seconds': self.ttl, 'issued': self.issued,
+                'verified': self.verified, 'rejected': self.rejected, 'purged': self.purged}
+
+
+class SQLiteOTPStore(_Store):
+    name = 'sqlite'
+
+    def issue(self, user_id):
+        """Replace ``user_id``'s code with a fresh one and return it."""
+        code = new_code()
+        purge = self._purge_due()
+
+        def write():
+            now = datetime.utcnow()
+            purged = self._purge(now) if purge else 0
+            OTP.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+            db.session.add(OTP(user_id=user_id, code=code, expires_at=now + timedelta(seconds=self.ttl),
+                               created_at=now))
+            return purged
+
+        purged = run_write(write)
+        with self._lock:
+            self.issued += 1
+            self.purged += purged
+        return code
+
+    def verify(self, user_id, code):
+        """Consume ``code`` if it is ``user_id``'s live code."""
+        code = str(code).strip()
+
+        def write():
+            # the DELETE is the claim: a second request finds nothing
+            return OTP.query.filter(
+                OTP.user_id == user_id, OTP.code == code, OTP.used == False,  # noqa: E712
+                OTP.expires_at >= datetime.utcnow(),
+            ).delete(synchronize_session=False)
+
+        return self._count(run_write(write) > 0)
+
+    @staticmethod
+    def _purge(now):
+        return OTP.query.filter(OTP.expires_at < now).delete(synchronize_session=False)
+
+    def purge(self):
+        """Drop expired codes now; returns how many went."""
+        purged = run_write(lambda: self._purge(datetime.utcnow()))
+        with self._lock:
+            self._last_purge = time.monotonic()
+            self.purged += purged
+        return purged
+
+
+class MemoryOTPStore(_Store):
+    name = 'memory'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._codes = {}  # user_id -> (code, monotonic expiry)
+
+    def issue(self, user_id):
+        code = new_code()
+        purge = self._purge_due()
+        with self._lock:
+            self._codes[user_id] = (code, time.monotonic() + self.ttl)
+            self.issued += 1
+        if purge:
+            self.purge()
+        return code
+
+    def verify(self, user_id, code):
+        code = str(code).strip()
+        with self._lock:
+            entry = self._codes.get(user_id)
+            ok = (entry is not None and entry[1] >= time.monotonic()
+                  and hmac.compare_digest(entry[0].encode(), code.encode()))
+            if ok:
+                del self._codes[user_id]
+        return self._count(ok)
+
+    def purge(self):
+        with self._lock:
+            now = time.monotonic()
+            expired = [uid for uid, (_, expires) in self._codes.items() if expires < now]
+            for uid in expired:
+                del self._codes[uid]
+            self._last_purge = now
+            self.purged += len(expired)
+        return len(expired)
+
+    def stats(self):
+        out = super().stats()
+        with self._lock:
+            out['size'] = len(self._codes)
+        return out
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_otp_store(app=None):
+    """The process-wide store chosen by app.config['OTP_STORE']."""
+    global _store
+    if _store is None:
+        app = app or current_app._get_current_object()
+        with _store_lock:
+            if _store is None:
+                kind = app.config.get('OTP_STORE', 'sqlite')
+                _store = MemoryOTPStore() if kind == 'memory' else SQLiteOTPStore()
+    return _store
@@ -0,0 +1,106 @@
+# backend/pagination.py
+"""Keyset (cursor) pagination helpers shared by the list endpoints.
+
+Pages are ordered newest first on ``(date, id)`` and the cursor encodes the
+last row of the previous page, so fetching page N costs the same as page 1
+as long as a matching ``(…, date, id)`` index exists.
+
+The ``date`` columns are TEXT in SQLite and are compared against bound
+datetimes as strings, so every row must be stored in the ORM's own format
+(DB_DATETIME_FORMAT). Anything writing rows outside the ORM should format its
+timestamps with db_datetime(); schema.py rewrites older rows on upgrade.
+"""
+import base64
+from datetime import date, datetime, timedelta
+from sqlalchemy import tuple_
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+# how SQLAlchemy's SQLite DateTime stores and binds values
+DB_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def parse_limit(raw, default=DEFAULT_LIMIT):
+    try:
+        n = int(raw) if raw is not None else default
+    except (TypeError, ValueError):
+        n = default
+    return max(1, min(n, MAX_LIMIT))
+
+
+def parse_date_arg(raw):
+    """Parse an ISO date/datetime query arg (space or T separator); None if empty."""
+    if not raw:
+        return None
+    return datetime.fromisoformat(str(raw).strip().replace(" ", "T"))
+
+
+def db_datetime(value):
+    """``value`` (datetime, date or ISO string) as the ORM would store it."""
+    if isinstance(value, datetime):
+        return value.strftime(DB_DATETIME_FORMAT)
+    if isinstance(value, date):
+        return value.isoformat() + " 00:00:00.000000"
+    return parse_date_arg(value).strftime(DB_DATETIME_FORMAT)
+
+
+def day_timestamp(day_str, seconds):
+    """db_datetime() for whole ``seconds`` into ``day_str`` (YYYY-MM-DD).
+
+    String formatting only, for bulk loaders writing millions of rows.
+    """
+    return f"{day_str} {seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}.000000"
+
+
+def apply_date_range(query, date_col, raw_from=None, raw_to=None):
+    """Filter ``query`` to ``raw_from <= date_col <= raw_to``.
+
+    A bare ``YYYY-MM-DD`` upper bound covers that whole day. Raises ValueError
+    on unparseable input.
+    """
+    date_from = parse_date_arg(raw_from)
+    date_to = parse_date_arg(raw_to)
+    if date_from:
+        query = query.filter(date_col >= date_from)
+    if date_to:
+        if len(str(raw_to).strip()) <= 10:
+            query = query.filter(date_col < date_to + timedelta(days=1))
+        else:
+            query = query.filter(date_col <= date_to)
+    return query
+
+
+def encode_cursor(dt, row_id):
+    raw = f"{dt.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return ``(datetime, id)`` for a cursor; raises ValueError when malformed."""
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + pad).decode()
+        dt, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(dt), int(row_id)
+    except Exception as ex:
+        raise ValueError("invalid cursor") from ex
+
+
+def keyset_page(query, date_col, id_col, cursor=None, limit=DEFAULT_LIMIT):
+    """Apply cursor + ordering to ``query`` and return ``(rows, next_cursor)``.
+
+    One extra row is fetched to detect whether another page exists, so no
+    COUNT(*) is needed.
+    """
+    if cursor:
+        dt, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(date_col, id_col) < tuple_(dt, row_id))
+    rows = query.order_by(date_col.desc(), id_col.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        last_date = getattr(last, date_col.key)
+        if last_date is not None:
+            next_cursor = encode_cursor(last_date, getattr(last, id_col.key))
+    return rows, next_cursor
@@ -0,0 +1,144 @@
+# backend/passwords.py
+"""Password hashing on a bounded worker pool.
+
+Passwords are stored as werkzeug hashes, "<method>$<salt>$<hash>", with the
+cost set by PASSWORD_HASH_METHOD (default scrypt:32768:8:1, about 70 ms and
+32 MiB per hash; e.g. scrypt:16384:8:1 halves both, pbkdf2:sha256:600000
+trades memory for CPU). scripts/bench_password_hash.py measures login
+throughput per setting.
+
+Every hash and check runs on a pool of PASSWORD_WORKERS threads (hashlib
+releases the GIL while it works), so a login burst at shift start uses at
+most that many cores and that much KDF memory, while the other endpoints
+keep getting served. At most PASSWORD_QUEUE further requests wait for a
+worker; beyond that PasswordPoolBusy is raised at once, which the auth
+routes answer with 503 + Retry-After instead of piling up threads. A request
+whose hash hasn't finished within PASSWORD_TIMEOUT gets the same error.
+
+Rows written before hashing hold the plaintext; verify_password() still
+accepts them and hands back a hash to store, as it does for hashes made
+with an older PASSWORD_HASH_METHOD, so accounts upgrade on their next login.
+"""
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+WORKERS = max(1, int(os.getenv('PASSWORD_WORKERS', os.cpu_count() or 2)))
+QUEUE = max(0, int(os.getenv('PASSWORD_QUEUE', 64)))
+# how long a request waits for its hash before giving up, in seconds
+TIMEOUT = float(os.getenv('PASSWORD_TIMEOUT', 10))
+
+HASH_PREFIXES = ('scrypt:', 'pbkdf2:')
+
+
+class PasswordPoolBusy(Exception):
+    """More hashing requests in flight than PASSWORD_WORKERS + PASSWORD_QUEUE,
+    or one waited longer than PASSWORD_TIMEOUT."""
+
+
+class HashPool:
+    def __init__(self, workers=WORKERS, queue=QUEUE, timeout=TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='passwords')
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordPoolBusy()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            fut = self._executor.submit(fn, *args)
+        except Exception:
+            self._done(None)
+            raise
+        # the slot is freed when the work ends, even if the caller timed out
+        fut.add_done_callback(self._done)
+        try:
+            return fut.result(timeout=self.timeout)
+        except FutureTimeout:
+            # drop it if it hasn't started; a running hash finishes unobserved
+            fut.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise PasswordPoolBusy() from None
+
+    def _done(self, fut):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {'method': HASH_METHOD, 'workers': self.workers, 'in_flight': self.in_flight,
+                    'completed': self.completed, 'rejected': self.rejected, 'timed_out': self.timed_out}
+
+
+pool = HashPool()
+
+
+def is_hashed(stored):
+    return bool(stored) and stored.startswith(HASH_PREFIXES) and stored.count('$') == 2
+
+
+def _method(stored):
+    return stored.split('$', 1)[0]
+
+
+_canonical = None
+
+
+def _current_method():
+    # werkzeug fills in defaults ("scrypt" -> "scrypt:32768:8:1"); compare
+    # against what it actually writes, or every login would rehash
+    global _canonical
+    if _canonical is None:
+        _canonical = _method(generate_password_hash('', HASH_METHOD))
+    return _canonical
+
+
+def hash_password(password):
+    return pool.run(generate_password_hash, str(password), HASH_METHOD)
+
+
+def _verify(stored, password):
+    if is_hashed(stored):
+        if not check_password_hash(stored, password):
+            return False, None
+        if _method(stored) == _current_method():
+            return True, None
+    elif not hmac.compare_digest((stored or '').encode(), password.encode()):
+        # legacy plaintext row
+        return False, None
+    return True, generate_password_hash(password, HASH_METHOD)
+
+
+def verify_password(stored, password):
+    """Return (ok, new_hash); new_hash is set when ``stored`` should be
+    replaced (plaintext, or hashed with another method)."""
+    return pool.run(_verify, stored, str(password))
+
+
+_dummy = None
+
+
+def burn_verify(password):
+    """Spend the time of a real check, for logins with an unknown phone, so
+    response times don't reveal which phones are registered."""
+    global _dummy
+    if _dummy is None:
+        _dummy = hash_password('not-a-real-password')
+    verify_password(_dummy, password)
@@ -0,0 +1,279 @@
+# backend/ratelimit.py
+"""Token-bucket rate limits for the auth endpoints (and, optionally, writes).
+
+A rule "N/S" allows bursts of N requests and refills N tokens every S
+seconds. @rate_limit('login') checks one bucket per client IP and one per
+phone number from the JSON body before the view runs; if either is empty the
+answer is 429 with Retry-After (seconds until a token is back) and the view -
+with its DB reads and writes - never runs. So password guessing, OTP
+brute force or a client stuck in a retry loop can't queue work on SQLite's
+single writer.
+
+Defaults (override with RATE_LIMIT_<RULE>_<IP|PHONE>=N/S, "0" turns one off):
+
+    login        ip 30/60    phone 5/60
+    otp_request  ip 20/300   phone 3/300
+    otp_verify   ip 30/300   phone 5/300
+    write        ip off      (POST/PUT/DELETE on sales, purchases,
+                              customers and suppliers, per IP)
+
+RATE_LIMIT_STORE picks where buckets live:
+
+- "memory" (default): a dict per process. With N gunicorn workers a client
+  effectively gets up to N times the limit.
+- "sqlite": a small table in RATE_LIMIT_DB (its own file, default
+  instance/ratelimit.db, so limiting never takes the main DB's write lock),
+  shared by every worker. Each check is one atomic UPSERT ... RETURNING.
+
+The client IP is request.remote_addr; behind a reverse proxy set
+RATE_LIMIT_PROXY_HOPS to the number of proxies to read it from
+X-Forwarded-For. RATE_LIMIT=false disables all of it.
+"""
+import math
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+from metrics import connect
+
+DEFAULT_RULES = {
+    'login': {'ip': '30/60', 'phone': '5/60'},
+    'otp_request': {'ip': '20/300', 'phone': '3/300'},
+    'otp_verify': {'ip': '30/300', 'phone': '5/300'},
+    'write': {'ip': '0'},
+}
+WRITE_BLUEPRINTS = ('sales', 'purchases', 'customers', 'suppliers')
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+# buckets that have refilled completely are dropped, at most this often
+SWEEP_SECONDS = 60
+
+
+def parse_rule(spec):
+    """Parse "N/S" into (capacity N, tokens per second N/S); None when off."""
+    spec = (spec or '').strip()
+    if not spec or spec == '0':
+        return None
+    count, _, seconds = spec.partition('/')
+    capacity = float(count)
+    period = float(seconds or 1)
+    if capacity < 1 or period <= 0:
+        return None
+    return capacity, capacity / period
+
+
+def load_rules():
+    rules = {}
+    for name, kinds in DEFAULT_RULES.items():
+        for kind, default in kinds.items():
+            rule = parse_rule(os.getenv(f'RATE_LIMIT_{name.upper()}_{kind.upper()}', default))
+            if rule:
+                rules.setdefault(name, {})[kind] = rule
+    return rules
+
+
+class MemoryBuckets:
+    name = 'memory'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}  # key -> (tokens, updated, full_at)
+        self._next_sweep = time.monotonic() + SWEEP_SECONDS
+
+    def take(self, key, capacity, rate):
+        """Spend one token; returns 0 if allowed, else seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            if now >= self._next_sweep:
+                # a full bucket is the same as no bucket
+                self._buckets = {k: b for k, b in self._buckets.items() if b[2] > now}
+                self._next_sweep = now + SWEEP_SECONDS
+        return wait
+
+    def size(self):
+        with self._lock:
+            return len(self._buckets)
+
+
+class SQLiteBuckets:
+    name = 'sqlite'
+
+    # ?1 key, ?2 capacity, ?3 now, ?4 rate; SET expressions see the old row,
+    # and the WHERE leaves an empty bucket untouched (no row returned)
+    TAKE_SQL = (
+        "INSERT INTO rate_limits (key, tokens, updated, full_at) VALUES (?1, ?2 - 1, ?3, ?3 + 1 / ?4) "
+        "ON CONFLICT(key) DO UPDATE SET "
+        "tokens = MIN(?2, tokens + (?3 - updated) * ?4) - 1, "
+        "updated = ?3, "
+        "full_at = ?3 + (?2 - MIN(?2, tokens + (?3 - updated) * ?4) + 1) / ?4 "
+        "WHERE MIN(?2, tokens + (?3 - updated) * ?4) >= 1 "
+        "RETURNING tokens"
+    )
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._next_sweep = time.time() + SWEEP_SECONDS
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT NOT NULL PRIMARY KEY, tokens REAL NOT NULL, "
+            "updated REAL NOT NULL, full_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_full_at ON rate_limits (full_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # autocommit: every statement is its own short transaction
+            conn = connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            # counters, not records: losing the last few on a crash is fine
+            conn.execute("PRAGMA synchronous = OFF")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, rate):
+        now = time.time()
+        conn = self._conn()
+        cur = conn.cursor()
+        cur.execute(self.TAKE_SQL, (key, capacity, now, rate))
+        taken = cur.fetchone() is not None
+        wait = 0.0
+        if not taken:
+            cur.execute("SELECT tokens, updated FROM rate_limits WHERE key = ?", (key,))
+            row = cur.fetchone()
+            tokens = min(capacity, row[0] + (now - row[1]) * rate) if row else capacity
+            wait = max(0.0, (1 - tokens) / rate)
+        self._maybe_sweep(cur, now)
+        return wait
+
+    def _maybe_sweep(self, cur, now):
+        with self._lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + SWEEP_SECONDS
+        cur.execute("DELETE FROM rate_limits WHERE full_at <= ?", (now,))
+
+    def size(self):
+        return self._conn().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+class RateLimiter:
+    def __init__(self, buckets, rules, proxy_hops=0):
+        self.buckets = buckets
+        self.rules = rules
+        self.proxy_hops = proxy_hops
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    def client_ip(self):
+        if self.proxy_hops:
+            hops = [h.strip() for h in request.headers.get('X-Forwarded-For', '').split(',') if h.strip()]
+            if len(hops) >= self.proxy_hops:
+                return hops[-self.proxy_hops]
+        return request.remote_addr or 'unknown'
+
+    def check(self, name, phone=None):
+        """Seconds the caller must wait under rule ``name`` (0 = go ahead)."""
+        rule = self.rules.get(name)
+        if not rule:
+            return 0
+        keys = []
+        if 'ip' in rule:
+            keys.append((f'{name}:ip:{self.client_ip()}', rule['ip']))
+        if 'phone' in rule and phone:
+            keys.append((f'{name}:phone:{phone}', rule['phone']))
+        wait = 0.0
+        for key, (capacity, rate) in keys:
+            wait = self.buckets.take(key, capacity, rate)
+            if wait:
+                # don't spend the phone's token on a request the IP rule refused
+                break
+        with self._lock:
+            if wait:
+                self.limited += 1
+            else:
+                self.allowed += 1
+        return wait
+
+    def stats(self):
+        with self._lock:
+            out = {'store': self.buckets.name, 'allowed': self.allowed, 'limited': self.limited}
+        try:
+            out['buckets'] = self.buckets.size()
+        except Exception as ex:
+            out['buckets'] = str(ex)
+        out['rules'] = {name: {kind: f'{int(cap)}/{round(cap / rate)}s' for kind, (cap, rate) in kinds.items()}
+                        for name, kinds in self.rules.items()}
+        return out
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter(app=None):
+    """The process-wide limiter (None when app.config['RATE_LIMIT'] is off)."""
+    global _limiter
+    app = app or current_app._get_current_object()
+    if not app.config.get('RATE_LIMIT'):
+        return None
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                if app.config.get('RATE_LIMIT_STORE') == 'sqlite':
+                    buckets = SQLiteBuckets(app.config['RATE_LIMIT_DB'])
+                else:
+                    buckets = MemoryBuckets()
+                _limiter = RateLimiter(buckets, load_rules(), int(app.config.get('RATE_LIMIT_PROXY_HOPS') or 0))
+    return _limiter
+
+
+def too_many(wait):
+    resp = jsonify({'error': 'Too many requests, try again later', 'retry_after': math.ceil(wait)})
+    resp.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+    return resp, 429
+
+
+def rate_limit(name):
+    """Apply rule ``name`` per client IP and per the body's "phone"."""
+    def decorate(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = get_limiter()
+            if limiter is not None:
+                body = request.get_json(silent=True)
+                phone = body.get('phone') if isinstance(body, dict) else None
+                wait = limiter.check(name, str(phone).strip() if phone else None)
+                if wait:
+                    return too_many(wait)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def install_rate_limits(app):
+    """Limit the write endpoints per IP when RATE_LIMIT_WRITE_IP is set."""
+    @app.before_request
+    def limit_writes():
+        if request.method not in WRITE_METHODS or request.blueprint not in WRITE_BLUEPRINTS:
+            return None
+        limiter = get_limiter(app)
+        if limiter is None:
+            return None
+        wait = limiter.check('write')
+        return too_many(wait) if wait else None
@@ -0,0 +1,168 @@
+# backend/resolver.py
+"""Cached customer / supplier lookup for the sale and purchase write paths.
+
+A reference from the UI can be a numeric PK, the external id (optionally with
+the UI prefix, e.g. "CU-" / "SUP-") or the party's name. Resolved parties are
+kept in a small per-process LRU keyed by all three forms, so repeat lookups
+at a busy counter don't hit the database. Entries expire after TTL_SECONDS so
+edits made in another worker become visible; update_customer /
+update_supplier call invalidate() for immediate effect locally.
+
+Names match exactly, as they always have: "ravi" does not pick up a "Ravi".
+The lower(trim(name)) expression index only narrows the candidate rows.
+"""
+import string
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from sqlalchemy import func, or_
+
+from models import Customer, Supplier
+
+PartyRef = namedtuple('PartyRef', 'id ext_id name')
+
+MAX_ENTRIES = 4096
+TTL_SECONDS = 300
+
+
+# SQLite's lower()/trim() only fold ASCII letters and strip spaces; mirror that
+# so the prefilter values agree with the lower(trim(name)) index
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def normalize_name(name):
+    return str(name).strip(' ').translate(_ASCII_LOWER)
+
+
+class PartyResolver:
+    def __init__(self, model, ext_attr, ui_prefix, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS):
+        self.model = model
+        self.ext_col = getattr(model, ext_attr)
+        self.ext_attr = ext_attr
+        self.ui_prefix = ui_prefix
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # key -> (expires_at, PartyRef)
+        self.hits = 0
+        self.misses = 0
+
+    # -- cache plumbing -------------------------------------------------
+    def _get(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry[1]
+
+    def _put(self, ref):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key in self._keys(ref):
+                self._cache[key] = (expires, ref)
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _keys(ref):
+        keys = [('pk', ref.id)]
+        if ref.ext_id:
+            keys.append(('ext', ref.ext_id))
+        if ref.name:
+            keys.append(('name', ref.name))
+        return keys
+
+    def invalidate(self, pk):
+        """Drop every cached key that points at party ``pk``."""
+        with self._lock:
+            stale = [k for k, (_, ref) in self._cache.items() if ref.id == pk]
+            for k in stale:
+                del self._cache[k]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._cache)
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else None,
+            'entries': size,
+        }
+
+    # -- lookup ---------------------------------------------------------
+    def _lookup_keys(self, raw):
+        if raw.isdigit():
+            return [('pk', int(raw))]
+        keys = [('ext', raw)]
+        if raw.startswith(self.ui_prefix):
+            keys.append(('ext', raw.replace(self.ui_prefix, '')))
+        keys.append(('name', raw))
+        return keys
+
+    def _ref(self, obj):
+        return PartyRef(obj.id, getattr(obj, self.ext_attr), obj.name)
+
+    def resolve(self, raw):
+        """Return a PartyRef for ``raw`` or None if no party matches."""
+        refs = self.resolve_many([raw])
+        return refs.get(str(raw).strip())
+
+    def resolve_many(self, raws):
+        """Resolve many references; cache misses are fetched with one query.
+        Returns {raw: PartyRef}; unresolved refs are absent."""
+        out = {}
+        missing = []
+        for raw in {str(r).strip() for r in raws if r is not None and str(r).strip()}:
+            for key in self._lookup_keys(raw):
+                ref = self._get(key)
+                if ref is not None:
+                    out[raw] = ref
+                    break
+            if raw in out:
+                self.hits += 1
+            else:
+                self.misses += 1
+                missing.append(raw)
+        if not missing:
+            return out
+
+        pks, exts, names = set(), set(), set()
+        for raw in missing:
+            for kind, value in self._lookup_keys(raw):
+                {'pk': pks, 'ext': exts, 'name': names}[kind].add(value)
+        conds = []
+        if pks:
+            conds.append(self.model.id.in_(pks))
+        if exts:
+            conds.append(self.ext_col.in_(exts))
+        if names:
+            # served by the lower(trim(name)) expression index; the exact
+            # name is matched below, so this only narrows the rows
+            conds.append(func.lower(func.trim(self.model.name)).in_({normalize_name(n) for n in names}))
+        by = {}
+        for obj in self.model.query.filter(or_(*conds)).order_by(self.model.id).all():
+            ref = self._ref(obj)
+            for key in self._keys(ref):
+                by.setdefault(key, ref)
+        for raw in missing:
+            for key in self._lookup_keys(raw):
+                ref = by.get(key)
+                if ref is not None:
+                    out[raw] = ref
+                    self._put(ref)
+                    break
+        return out
+
+
+customer_resolver = PartyResolver(Customer, 'customer_id', 'CU-')
+supplier_resolver = PartyResolver(Supplier, 'supplier_id', 'SUP-')
@@ -0,0 +1,80 @@
+# backend/rollups.py
+"""Daily / monthly aggregates of sales and purchases per bag size.
+
+`daily_rollups` is keyed by (day 'YYYY-MM-DD', bag_size) and
+`monthly_rollups` by (month 'YYYY-MM', bag_size). The sale and purchase write
+paths call apply_sale() / apply_purchase() in their own transaction with
+sign=+1 for the new values and sign=-1 to back out the old ones on edit, so
+the reports endpoint never has to scan raw rows. REBUILD_SQL re-derives both
+tables from history.
+"""
+from sqlalchemy.dialects.sqlite import insert
+from models import DailyRollup, MonthlyRollup
+
+FIELDS = ('units_sold', 'revenue', 'paid', 'outstanding', 'sale_count',
+          'units_purchased', 'cost', 'purchase_count')
+
+_SOURCE = (
+    "SELECT substr(date, 1, 10) AS day, COALESCE(bag_size, '') AS bag_size, "
+    "COALESCE(units, 0) AS units_sold, COALESCE(total_amount, 0) AS revenue, "
+    "COALESCE(paid_amount, 0) AS paid, COALESCE(outstanding, 0) AS outstanding, 1 AS sale_count, "
+    "0 AS units_purchased, 0 AS cost, 0 AS purchase_count FROM sales WHERE date IS NOT NULL "
+    "UNION ALL "
+    "SELECT substr(date, 1, 10), COALESCE(bag_size, ''), 0, 0, 0, 0, 0, "
+    "COALESCE(units, 0), COALESCE(total_amount, 0), 1 FROM purchases WHERE date IS NOT NULL"
+)
+_SUMS = ", ".join(f"SUM({f})" for f in FIELDS)
+_COLS = ", ".join(FIELDS)
+
+REBUILD_SQL = [
+    "DELETE FROM daily_rollups",
+    "DELETE FROM monthly_rollups",
+    f"INSERT INTO daily_rollups (day, bag_size, {_COLS}) "
+    f"SELECT day, bag_size, {_SUMS} FROM ({_SOURCE}) GROUP BY day, bag_size",
+    f"INSERT INTO monthly_rollups (month, bag_size, {_COLS}) "
+    f"SELECT substr(day, 1, 7), bag_size, {_SUMS} FROM daily_rollups GROUP BY substr(day, 1, 7), bag_size",
+]
+
+
+def _upsert(session, model, key_col, key, bag_size, deltas):
+    values = {f: deltas.get(f, 0) for f in FIELDS}
+    stmt = insert(model).values(**{key_col: key, 'bag_size': bag_size or ''}, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[getattr(model, key_col), model.bag_size],
+        set_={f: getattr(model, f) + getattr(stmt.excluded, f) for f in FIELDS},
+    )
+    session.execute(stmt)
+
+
+def apply_delta(session, when, bag_size, **deltas):
+    """Add ``deltas`` (see FIELDS) to the day and month buckets of ``when``."""
+    if when is None:
+        return
+    _upsert(session, DailyRollup, 'day', when.strftime('%Y-%m-%d'), bag_size, deltas)
+    _upsert(session, MonthlyRollup, 'month', when.strftime('%Y-%m'), bag_size, deltas)
+
+
+def apply_sale(session, sale, sign=1):
+    apply_delta(
+        session, sale.date, sale.bag_size,
+        units_sold=sign * (sale.units or 0),
+        revenue=sign * (sale.total_amount or 0.0),
+        paid=sign * (sale.paid_amount or 0.0),
+        outstanding=sign * (sale.outstanding or 0.0),
+        sale_count=sign,
+    )
+
+
+def apply_purchase(session, purchase, sign=1):
+    apply_delta(
+        session, purchase.date, purchase.bag_size,
+        units_purchased=sign * (purchase.units or 0),
+        cost=sign * (purchase.total_amount or 0.0),
+        purchase_count=sign,
+    )
+
+
+def rebuild_rollups(conn):
+    """Recompute both rollup tables on a sqlite3 connection; the caller commits."""
+    for stmt in REBUILD_SQL:
+        conn.execute(stmt)
@@ -3,15 +3,25 @@ from extensions import db
 from models import User
 from flask_jwt_extended import create_access_token
 
-from datetime import datetime, timedelta
-import random
-from models import OTP
+from group_commit import run_write
+from otp_store import get_otp_store
+from passwords import PasswordPoolBusy, burn_verify, hash_password, verify_password
+from ratelimit import rate_limit
 from flask import current_app
 import os
 import re
 
 auth = Blueprint('auth', __name__)
 
+
+@auth.errorhandler(PasswordPoolBusy)
+def password_pool_busy(ex):
+    # every hashing worker busy and the queue full: shed load, client retries
+    resp = jsonify({"error": "Too many logins in progress, try again shortly"})
+    resp.headers['Retry-After'] = '1'
+    return resp, 503
+
+
 # Register user (Admin only will use this later)
 @auth.route('/register', methods=['POST'])
 def register():
@@ -43,26 +53,34 @@ def register():
     if not ok:
         return jsonify({"error": msg}), 400
 
-    if User.query.filter_by(phone=phone).first():
-        return jsonify({"error": "Phone already exists"}), 400
+    # hash before the unit of work, so the writer never waits on the KDF
+    password_hash = hash_password(password)
+
+    def write():
+        if User.query.filter_by(phone=phone).first():
+            return None
 
-    user = User(phone=phone, role=role)
-    user.set_password(password)
+        user = User(phone=phone, role=role)
+        user.password = password_hash
 
-    db.session.add(user)
-    db.session.commit()
+        db.session.add(user)
+        db.session.flush()
 
-    # generate UID (AD/US/CU prefix)
-    prefix = 'AD' if role == 'admin' else 'US' if role == 'user' else 'CU'
-    user.uid = f"{prefix}-{user.id:04d}"
+        # generate UID (AD/US/CU prefix)
+        prefix = 'AD' if role == 'admin' else 'US' if role == 'user' else 'CU'
+        user.uid = f"{prefix}-{user.id:04d}"
+        return user.uid
 
-    db.session.commit()
+    uid = run_write(write)
+    if uid is None:
+        return jsonify({"error": "Phone already exists"}), 400
 
-    return jsonify({"message": "User created", "uid": user.uid}), 201
+    return jsonify({"message": "User created", "uid": uid}), 201
 
 
 # Login
 @auth.route('/login', methods=['POST'])
+@rate_limit('login')
 def login():
     data = request.json or {}
     phone = data.get("phone")
@@ -72,28 +90,35 @@ def login():
         return jsonify({"error": "phone and password required"}), 400
 
     user = User.query.filter_by(phone=phone).first()
+    if not user:
+        burn_verify(password)
+        return jsonify({"error": "Invalid phone or password"}), 401
 
-    if not user or not user.check_password(password):
+    user_id, uid, role, stored = user.id, user.uid, user.role, user.password
+    ok, new_hash = verify_password(stored, password)
+    if not ok:
         return jsonify({"error": "Invalid phone or password"}), 401
 
-    token = create_access_token(identity=user.uid)
+    if new_hash:
+        # legacy plaintext (or an older cost setting): upgrade in place, unless
+        # the password was changed meanwhile
+        def rehash():
+            User.query.filter_by(id=user_id, password=stored).update(
+                {'password': new_hash}, synchronize_session=False)
 
-    # Generate and persist OTP on successful login (demo-friendly)
-    code = f"{random.randint(0, 999999):06d}"
-    expires = datetime.utcnow() + timedelta(minutes=10)
-    otp = OTP(user_id=user.id, code=code, expires_at=expires)
-    # also save current OTP on the user row (replace previous)
-    user.otp = code
-    db.session.add(otp)
-    db.session.add(user)
-    db.session.commit()
+        run_write(rehash)
+
+    token = create_access_token(identity=uid)
+
+    # Generate OTP on successful login (demo-friendly); replaces any previous one
+    code = get_otp_store().issue(user_id)
 
     # Return OTP in response when in debug or DEV_SEED to make testing simple
     env_dev = os.getenv('DEV_SEED', '')
     dev_flag = str(env_dev).lower() in ('1', 'true', 'yes')
     debug_otp = current_app.config.get('DEBUG', False) or dev_flag
 
-    resp = {"message": "Login successful", "token": token, "role": user.role}
+    resp = {"message": "Login successful", "token": token, "role": role}
     if debug_otp:
         resp['otp'] = code
 
@@ -101,6 +126,7 @@ def login():
 
 
 @auth.route('/request-otp', methods=['POST'])
+@rate_limit('otp_request')
 def request_otp():
     data = request.json or {}
     phone = data.get('phone')
@@ -111,15 +137,8 @@ def request_otp():
     if not user:
         return jsonify({'error': 'user not found'}), 404
 
-    # generate 6-digit code
-    code = f"{random.randint(0, 999999):06d}"
-    expires = datetime.utcnow() + timedelta(minutes=10)
-    otp = OTP(user_id=user.id, code=code, expires_at=expires)
-    # persist OTP row and update user's otp column so current OTP is always on the user
-    user.otp = code
-    db.session.add(otp)
-    db.session.add(user)
-    db.session.commit()
+    # generate 6-digit code; the store keeps one live code per user
+    code = get_otp_store().issue(user.id)
 
     # For demo convenience return the OTP when in debug or when DEV_SEED env flag is set
     env_dev = os.getenv('DEV_SEED', '')
@@ -132,6 +151,7 @@ def request_otp():
 
 
 @auth.route('/verify-otp', methods=['POST'])
+@rate_limit('otp_verify')
 def verify_otp():
     data = request.json or {}
     phone = data.get('phone')
@@ -143,13 +163,8 @@ def verify_otp():
     if not user:
         return jsonify({'error': 'user not found'}), 404
 
-    # find matching, unused OTP not expired
-    now = datetime.utcnow()
-    otp = OTP.query.filter_by(user_id=user.id, code=code, used=False).filter(OTP.expires_at >= now).first()
-    if not otp:
+    # matching, unexpired code; verifying consumes it, so it works once
+    if not get_otp_store().verify(user.id, code):
         return jsonify({'error': 'Invalid or expired OTP'}), 400
 
-    otp.used = True
-    db.session.commit()
-
     return jsonify({'message': 'OTP verified'})
@@ -1,13 +1,18 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
-from models import Customer
-import random
+from search import search
+from models import Customer, CustomerBalance
+from resolver import customer_resolver
+from group_commit import run_write
+from id_blocks import allocator
+from conditional import conditional
 import datetime
 
 customers = Blueprint('customers', __name__)
 
 
 @customers.route('/', methods=['GET'])
+@conditional('customers')
 def list_customers():
     items = Customer.query.order_by(Customer.created_at.desc()).all()
     out = []
@@ -24,6 +29,17 @@ def list_customers():
     return jsonify(out)
 
 
+@customers.route('/search', methods=['GET'])
+def search_customers():
+    """Ranked prefix search over name, phone and address: ?q=<text>&limit=20"""
+    q = request.args.get('q', '')
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    return jsonify(search(db.session, 'customers', q, limit))
+
+
 @customers.route('/', methods=['POST'])
 def create_customer():
     data = request.form or request.json or {}
@@ -34,30 +50,36 @@ def create_customer():
     if not name or not phone:
         return jsonify({'error': 'name and phone required'}), 400
 
-    existing = Customer.query.filter_by(phone=phone).first()
-    if existing:
-        return jsonify({'error': 'phone already exists', 'customer_id': existing.id}), 400
-
-    c = Customer(name=name, phone=phone, address=address)
-    # generate customer external id per requested format
+    # generate customer external id per requested format; the 4+ digit
+    # number comes from the block-allocated sequence, taken before the unit
+    seq = allocator.next('customer')
     try:
         names = name.strip().split()
         first = names[0] if names else ''
         last = names[-1] if len(names) > 1 else ''
         x6 = datetime.datetime.utcnow().strftime('%y%m%d')
-        rand4 = str(random.randint(1000, 9999))
         ascii_sum = sum(ord(ch) for ch in (first + last)) % 10000
-        ext = f"CU-{x6}-{first}{last}{rand4}-{ascii_sum:04d}"
-        c.customer_id = ext
+        ext = f"CU-{x6}-{first}{last}{seq:04d}-{ascii_sum:04d}"
     except Exception:
-        c.customer_id = None
+        ext = None
+
+    def write():
+        # the duplicate check runs in the same unit as the insert, so two
+        # requests for one phone can't both pass it
+        existing = Customer.query.filter_by(phone=phone).first()
+        if existing:
+            return {'error': 'phone already exists', 'customer_id': existing.id}, 400
 
-    db.session.add(c)
-    db.session.commit()
-    c.uid = f"CU-{c.id:04d}"
-    db.session.add(c)
-    db.session.commit()
-    return jsonify({'message': 'Customer created', 'id': c.id, 'customer_id': c.customer_id, 'uid': c.uid}), 201
+        c = Customer(name=name, phone=phone, address=address)
+        c.customer_id = ext
+
+        db.session.add(c)
+        db.session.flush()  # assigns c.id; uid goes out in the same commit
+        c.uid = f"CU-{c.id:04d}"
+        return {'message': 'Customer created', 'id': c.id, 'customer_id': c.customer_id, 'uid': c.uid}, 201
+
+    body, status = run_write(write)
+    return jsonify(body), status
 
 
 @customers.route('/<int:cust_id>', methods=['GET'])
@@ -68,15 +90,59 @@ def get_customer(cust_id):
     return jsonify({'id': c.id, 'customer_id': c.customer_id, 'uid': c.uid, 'name': c.name, 'phone': c.phone, 'address': c.address})
 
 
-@customers.route('/<int:cust_id>', methods=['PUT'])
-def update_customer(cust_id):
+def _balance_json(b, c=None):
+    return {
+        'customer_id': b.customer_id if b else (c.customer_id if c else None),
+        'id': c.id if c else None,
+        'name': c.name if c else None,
+        'total_sales': b.total_sales if b else 0.0,
+        'total_paid': b.total_paid if b else 0.0,
+        'outstanding': b.outstanding if b else 0.0,
+        'sale_count': b.sale_count if b else 0,
+        'updated_at': b.updated_at.isoformat() if b and b.updated_at else None,
+    }
+
+
+@customers.route('/<int:cust_id>/balance', methods=['GET'])
+def get_customer_balance(cust_id):
     c = Customer.query.get(cust_id)
     if not c:
         return jsonify({'error': 'not found'}), 404
+    b = CustomerBalance.query.get(c.customer_id or str(c.id))
+    return jsonify(_balance_json(b, c))
+
+
+@customers.route('/top-debtors', methods=['GET'])
+def top_debtors():
+    try:
+        limit = max(1, min(int(request.args.get('limit', 10)), 100))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    rows = (db.session.query(CustomerBalance, Customer)
+            .outerjoin(Customer, Customer.customer_id == CustomerBalance.customer_id)
+            .filter(CustomerBalance.outstanding > 0)
+            .order_by(CustomerBalance.outstanding.desc())
+            .limit(limit)
+            .all())
+    return jsonify([_balance_json(b, c) for b, c in rows])
+
+
+@customers.route('/<int:cust_id>', methods=['PUT'])
+def update_customer(cust_id):
     data = request.form or request.json or {}
-    c.name = data.get('name', c.name)
-    c.phone = data.get('phone', c.phone)
-    c.address = data.get('address', c.address)
-    db.session.add(c)
-    db.session.commit()
-    return jsonify({'message': 'Customer updated', 'id': c.id, 'customer_id': c.customer_id})
+
+    def write():
+        c = Customer.query.get(cust_id)
+        if not c:
+            return None
+        c.name = data.get('name', c.name)
+        c.phone = data.get('phone', c.phone)
+        c.address = data.get('address', c.address)
+        db.session.add(c)
+        return {'message': 'Customer updated', 'id': c.id, 'customer_id': c.customer_id}
+
+    result = run_write(write)
+    if result is None:
+        return jsonify({'error': 'not found'}), 404
+    customer_resolver.invalidate(cust_id)
+    return jsonify(result)
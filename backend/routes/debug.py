@@ -1,6 +1,12 @@
 from flask import Blueprint, current_app, request, jsonify
 import os
-import sqlite3
+from resolver import customer_resolver, supplier_resolver
+from group_commit import get_writer
+from otp_store import get_otp_store
+from passwords import pool as password_pool
+from ratelimit import get_limiter
+from row_counts import read_counts
+from metrics import connect
 
 debug_bp = Blueprint('debug_bp', __name__)
 
@@ -29,21 +35,29 @@ def debug_info():
 
     try:
         if db_path and os.path.exists(db_path):
-            con = sqlite3.connect(db_path)
-            cur = con.cursor()
-            # list tables
-            cur.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [r[0] for r in cur.fetchall()]
-            for t in tables:
-                try:
-                    cur.execute(f'SELECT COUNT(*) FROM "{t}"')
-                    info['tables'][t] = cur.fetchone()[0]
-                except Exception:
-                    info['tables'][t] = 'error'
-            con.close()
+            con = connect(db_path)
+            # trigger-maintained counts (row_counts.py); ?verify=1 also runs
+            # a real COUNT(*) per table and reports any drift
+            verify = request.args.get('verify', '').lower() in ('1', 'true', 'yes')
+            try:
+                info['tables'], mismatches = read_counts(con, verify=verify)
+            finally:
+                con.close()
+            if verify:
+                info['count_mismatches'] = mismatches
         else:
             info['warning'] = 'DB path not found'
     except Exception as e:
         info['error'] = str(e)
 
+    info['resolver_cache'] = {
+        'customers': customer_resolver.stats(),
+        'suppliers': supplier_resolver.stats(),
+    }
+    writer = get_writer()
+    info['group_commit'] = writer.stats() if writer else None
+    info['otp_store'] = get_otp_store().stats()
+    info['password_pool'] = password_pool.stats()
+    limiter = get_limiter()
+    info['rate_limit'] = limiter.stats() if limiter else None
     return jsonify(info)
@@ -0,0 +1,45 @@
+from flask import Blueprint, current_app, send_from_directory, make_response, abort
+from werkzeug.security import safe_join
+import os
+
+invoices = Blueprint('invoices', __name__)
+
+# upload names carry a timestamp + random suffix and are never rewritten,
+# so clients and proxies may keep them for a year without revalidating
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def _upload_folder():
+    return os.path.join(current_app.root_path, 'static', 'uploads')
+
+
+@invoices.route('/<path:filename>', methods=['GET', 'HEAD'])
+def get_invoice(filename):
+    """
+    Serve an uploaded invoice (or its derived .webp / _thumb.webp).
+
+    - strong ETag + Last-Modified; If-None-Match / If-Modified-Since -> 304
+    - Range requests -> 206 partial content, so large PDFs can be paged
+    - Cache-Control: public, max-age=1y, immutable
+    - delivery is handed to the server: X-Accel-Redirect when
+      INVOICE_ACCEL_REDIRECT_PREFIX is set (nginx internal location),
+      X-Sendfile when USE_X_SENDFILE is on, otherwise the WSGI file wrapper
+      (sendfile(2) under gunicorn)
+    """
+    folder = _upload_folder()
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    accel_prefix = current_app.config.get('INVOICE_ACCEL_REDIRECT_PREFIX')
+    if accel_prefix:
+        # nginx serves the bytes (with its own ETag/Range handling)
+        resp = make_response('')
+        resp.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + filename
+    else:
+        resp = send_from_directory(folder, filename, conditional=True, etag=True, max_age=IMMUTABLE_MAX_AGE)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = IMMUTABLE_MAX_AGE
+    resp.cache_control.immutable = True
+    resp.headers['Accept-Ranges'] = 'bytes'
+    return resp
@@ -0,0 +1,19 @@
+# backend/routes/metrics.py
+from flask import Blueprint, Response, request, jsonify
+import os
+from metrics import registry
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Prometheus text exposition of the request / SQL metrics (see metrics.py).
+    Open by default; when METRICS_TOKEN is set the scraper must send
+    `Authorization: Bearer <token>`.
+    """
+    token = os.getenv('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'metrics endpoint restricted'}), 403
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
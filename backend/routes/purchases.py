@@ -3,7 +3,15 @@ import os
 from flask import Blueprint, request, jsonify, current_app, url_for
 from werkzeug.utils import secure_filename
 from extensions import db
+from sqlalchemy.orm import joinedload
 from models import Purchase, Supplier
+from pagination import apply_date_range, keyset_page, parse_limit
+from rollups import apply_purchase
+from resolver import supplier_resolver
+from invoice_worker import process_invoice_later
+from group_commit import run_write
+from id_blocks import allocator, month_week
+from conditional import conditional
 from datetime import datetime
 import uuid
 
@@ -29,13 +37,42 @@ def save_invoice_file(file_storage):
     return f"/static/uploads/{unique_name}"
 
 @purchases.route('/', methods=['GET'])
+@conditional('purchases', 'suppliers')
 def list_purchases():
-    # simple list all (later add pagination & filters)
-    items = Purchase.query.order_by(Purchase.date.desc()).limit(100).all()
+    """
+    Newest-first purchases, keyset-paginated on (date, id).
+
+    Query params (all optional):
+    - supplier_id: external supplier id
+    - from / to: ISO date or datetime bounds on purchase date (inclusive)
+    - limit: page size (default 100, max 500)
+    - cursor: `next_cursor` from the previous page
+
+    Carries an ETag; If-None-Match with it -> 304 while nothing changed.
+    """
+    limit = parse_limit(request.args.get('limit'))
+
+    # eager-load suppliers in the same query instead of one lazy load per row;
+    # supplier_name comes from them, hence 'suppliers' in @conditional
+    q = Purchase.query.options(joinedload(Purchase.supplier))
+    supplier_id = request.args.get('supplier_id')
+    if supplier_id:
+        q = q.filter(Purchase.supplier_id == supplier_id.strip())
+    try:
+        q = apply_date_range(q, Purchase.date, request.args.get('from'), request.args.get('to'))
+    except ValueError:
+        return jsonify({"error": "invalid from/to date, use ISO format like 2025-11-24"}), 400
+
+    try:
+        items, next_cursor = keyset_page(q, Purchase.date, Purchase.id, request.args.get('cursor'), limit)
+    except ValueError:
+        return jsonify({"error": "invalid cursor"}), 400
+
     out = []
     for p in items:
         out.append({
             "id": p.id,
+            "purchase_id": p.purchase_id,
             "supplier_id": p.supplier_id,
             "supplier_name": p.supplier.name if p.supplier else None,
             "bag_size": p.bag_size,
@@ -43,9 +80,10 @@ def list_purchases():
             "price_per_unit": p.price_per_unit,
             "total_amount": p.total_amount,
             "invoice_image": p.invoice_image,
-            "date": p.date.isoformat()
+            "invoice_thumbnail": p.invoice_thumbnail,
+            "date": p.date.isoformat() if p.date else None
         })
-    return jsonify(out)
+    return jsonify({"items": out, "next_cursor": next_cursor})
 
 @purchases.route('/', methods=['POST'])
 def create_purchase():
@@ -62,20 +100,12 @@ def create_purchase():
 
     raw_supplier = request.form.get('supplier_id')
     supplier = None
-    supplier = None
     # support numeric PK or external supplier_id string
     if raw_supplier is None:
         return jsonify({"error":"supplier_id required"}), 400
-    raw_supplier = str(raw_supplier).strip()
-    if raw_supplier.isdigit():
-        supplier = Supplier.query.get(int(raw_supplier))
-    else:
-        # possible formats: supplier external id like SU-..., or UI prefix like SUP-...
-        candidate = raw_supplier
-        if candidate.startswith('SUP-'):
-            candidate = candidate.replace('SUP-', '')
-        # try exact match on supplier_id or name
-        supplier = Supplier.query.filter((Supplier.supplier_id == raw_supplier) | (Supplier.supplier_id == candidate) | (Supplier.name == raw_supplier)).first()
+    # possible formats: numeric PK, supplier external id like SU-..., UI prefix
+    # like SUP-..., or name; served from the LRU when warm
+    supplier = supplier_resolver.resolve(raw_supplier)
     if not supplier:
         return jsonify({"error":"supplier not found"}), 404
     try:
@@ -92,30 +122,40 @@ def create_purchase():
             else:
                 return jsonify({"error":"Invalid or missing invoice_file. Allowed: png,jpg,jpeg,pdf"}), 400
 
-        # generate purchase external id: P-XX(month+week)-rand4
+        # generate purchase external id: P-XX(month+week)-NNNN from the
+        # block-allocated sequence; taken before the unit of work, which runs
+        # inside the writer's transaction
         now = datetime.utcnow()
-        month = now.month
-        week = (now.day - 1) // 7 + 1
-        rand4 = str(uuid.uuid4().int)[:4]
+        purchase_ext_id = f"P-{month_week(now)}-{allocator.next('purchase'):04d}"
+
+        def write():
+            purchase = Purchase(
+                supplier_id=supplier.ext_id or str(supplier.id),
+                bag_size=bag_size,
+                units=units,
+                price_per_unit=price_per_unit,
+                total_amount=total_amount,
+                invoice_image=invoice_image_url,
+                date=now
+            )
+
+            purchase.purchase_id = purchase_ext_id
 
-        purchase = Purchase(
-            supplier_id=supplier.supplier_id or str(supplier.id),
-            bag_size=bag_size,
-            units=units,
-            price_per_unit=price_per_unit,
-            total_amount=total_amount,
-            invoice_image=invoice_image_url
-        )
+            db.session.add(purchase)
+            apply_purchase(db.session, purchase)
+            db.session.flush()
+            return purchase.id
 
-        purchase.purchase_id = f"P-{month:02d}{week}-{rand4}"
+        # committed together with any other writes queued alongside it
+        purchase_pk = run_write(write)
 
-        db.session.add(purchase)
-        db.session.commit()
+        # re-encode + thumbnail off the request thread
+        process_invoice_later(current_app._get_current_object(), Purchase, purchase_pk, invoice_image_url)
 
         return jsonify({
             "message":"Purchase created",
-            "id": purchase.id,
-            "purchase_id": purchase.purchase_id,
+            "id": purchase_pk,
+            "purchase_id": purchase_ext_id,
             "invoice_image": invoice_image_url
         }), 201
     except Exception as ex:
@@ -125,20 +165,35 @@ def create_purchase():
 
 @purchases.route('/<int:purchase_id>', methods=['PUT'])
 def update_purchase(purchase_id):
-    p = Purchase.query.get(purchase_id)
-    if not p:
-        return jsonify({'error': 'not found'}), 404
     data = request.form or request.json or {}
     try:
+        units = int(data['units']) if 'units' in data else None
+        price_per_unit = float(data['price_per_unit']) if 'price_per_unit' in data else None
+    except (TypeError, ValueError) as ex:
+        return jsonify({'error': 'update failed', 'detail': str(ex)}), 400
+
+    def write():
+        # re-read inside the unit: the row must come from the writer's session
+        p = Purchase.query.get(purchase_id)
+        if not p:
+            return None
+        # back the old values out of the rollups, re-add the new ones below
+        apply_purchase(db.session, p, -1)
         if 'bag_size' in data:
             p.bag_size = data.get('bag_size')
-        if 'units' in data:
-            p.units = int(data.get('units', p.units))
-        if 'price_per_unit' in data:
-            p.price_per_unit = float(data.get('price_per_unit', p.price_per_unit))
+        if units is not None:
+            p.units = units
+        if price_per_unit is not None:
+            p.price_per_unit = price_per_unit
         p.total_amount = p.units * p.price_per_unit
         db.session.add(p)
-        db.session.commit()
-        return jsonify({'message': 'Purchase updated', 'id': p.id, 'purchase_id': p.purchase_id})
+        apply_purchase(db.session, p)
+        return {'message': 'Purchase updated', 'id': p.id, 'purchase_id': p.purchase_id}
+
+    try:
+        result = run_write(write)
+        if result is None:
+            return jsonify({'error': 'not found'}), 404
+        return jsonify(result)
     except Exception as ex:
         return jsonify({'error': 'update failed', 'detail': str(ex)}), 400
@@ -0,0 +1,74 @@
+from flask import Blueprint, request, jsonify
+from models import DailyRollup, MonthlyRollup
+from rollups import FIELDS
+import datetime
+
+reports = Blueprint('reports', __name__)
+
+
+def _row_json(key, r):
+    out = {'period': key, 'bag_size': r.bag_size}
+    for f in FIELDS:
+        out[f] = getattr(r, f)
+    return out
+
+
+@reports.route('/summary', methods=['GET'])
+def summary():
+    """
+    Period totals per bag size, read from the rollup tables.
+
+    Query params (all optional):
+    - granularity: day (default) or month
+    - from / to: inclusive bounds, YYYY-MM-DD for day, YYYY-MM for month
+      (a full date is accepted for month and truncated)
+    - bag_size: restrict to one bag size
+    """
+    granularity = request.args.get('granularity', 'day')
+    if granularity == 'day':
+        model, key_col, width = DailyRollup, DailyRollup.day, 10
+    elif granularity == 'month':
+        model, key_col, width = MonthlyRollup, MonthlyRollup.month, 7
+    else:
+        return jsonify({'error': 'granularity must be day or month'}), 400
+
+    bounds = {}
+    for arg in ('from', 'to'):
+        raw = (request.args.get(arg) or '').strip()
+        if not raw:
+            continue
+        try:
+            datetime.date.fromisoformat(raw[:10] if len(raw) >= 10 else raw + '-01')
+        except ValueError:
+            return jsonify({'error': f'invalid {arg}, use YYYY-MM-DD or YYYY-MM'}), 400
+        bounds[arg] = raw[:width]
+
+    q = model.query
+    if 'from' in bounds:
+        q = q.filter(key_col >= bounds['from'])
+    if 'to' in bounds:
+        q = q.filter(key_col <= bounds['to'])
+    bag_size = request.args.get('bag_size')
+    if bag_size:
+        q = q.filter(model.bag_size == bag_size.strip())
+
+    rows = q.order_by(key_col.asc(), model.bag_size.asc()).all()
+    totals = {f: 0 for f in FIELDS}
+    by_bag = {}
+    out = []
+    for r in rows:
+        out.append(_row_json(getattr(r, key_col.key), r))
+        bag = by_bag.setdefault(r.bag_size, {f: 0 for f in FIELDS})
+        for f in FIELDS:
+            value = getattr(r, f) or 0
+            totals[f] += value
+            bag[f] += value
+
+    return jsonify({
+        'granularity': granularity,
+        'from': bounds.get('from'),
+        'to': bounds.get('to'),
+        'rows': out,
+        'by_bag_size': by_bag,
+        'totals': totals,
+    })
@@ -1,7 +1,16 @@
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
 from extensions import db
 from models import Sale, Customer, Transaction
+from pagination import apply_date_range, keyset_page, parse_limit
+from ledger import apply_sale_delta
+from rollups import apply_delta, apply_sale
+from resolver import customer_resolver
+from invoice_worker import process_invoice_later
+from group_commit import run_write
+from id_blocks import allocator, month_week
 from datetime import datetime
 import uuid
 import os
@@ -27,6 +36,68 @@ def save_invoice(file):
         return "/static/uploads/" + new_name
 
 
+def _new_sale_ids(now, count=1):
+        # sale external id: S-XX(month+week)-NNNN, NNNN from the block-allocated sequence
+        return [f"S-{month_week(now)}-{n:04d}" for n in allocator.take('sale', count)]
+
+
+@sales.route('/', methods=['GET'])
+def list_sales():
+        """
+        Newest-first sales, keyset-paginated on (date, id).
+
+        Query params (all optional):
+        - customer_id: external customer id
+        - bag_size: e.g. 10kg
+        - from / to: ISO date or datetime bounds on sale date (inclusive)
+        - has_outstanding: true -> only sales with dues, false -> fully paid
+        - limit: page size (default 100, max 500)
+        - cursor: `next_cursor` from the previous page
+        """
+        limit = parse_limit(request.args.get("limit"))
+
+        q = Sale.query.options(joinedload(Sale.customer))
+        customer_id = request.args.get("customer_id")
+        if customer_id:
+            q = q.filter(Sale.customer_id == customer_id.strip())
+        bag_size = request.args.get("bag_size")
+        if bag_size:
+            q = q.filter(Sale.bag_size == bag_size.strip())
+        has_outstanding = request.args.get("has_outstanding")
+        if has_outstanding is not None and has_outstanding != "":
+            if has_outstanding.lower() in ("1", "true", "yes"):
+                q = q.filter(Sale.outstanding > 0)
+            else:
+                q = q.filter(or_(Sale.outstanding <= 0, Sale.outstanding.is_(None)))
+        try:
+            q = apply_date_range(q, Sale.date, request.args.get("from"), request.args.get("to"))
+        except ValueError:
+            return jsonify({"error": "invalid from/to date, use ISO format like 2025-11-24"}), 400
+
+        try:
+            items, next_cursor = keyset_page(q, Sale.date, Sale.id, request.args.get("cursor"), limit)
+        except ValueError:
+            return jsonify({"error": "invalid cursor"}), 400
+
+        out = []
+        for s in items:
+            out.append({
+                "id": s.id,
+                "sale_id": s.sale_id,
+                "customer_id": s.customer_id,
+                "customer_name": s.customer.name if s.customer else None,
+                "bag_size": s.bag_size,
+                "units": s.units,
+                "total_amount": s.total_amount,
+                "paid_amount": s.paid_amount,
+                "outstanding": s.outstanding,
+                "invoice_image": s.invoice_image,
+                "invoice_thumbnail": s.invoice_thumbnail,
+                "date": s.date.isoformat() if s.date else None
+            })
+        return jsonify({"items": out, "next_cursor": next_cursor})
+
+
 @sales.route('/', methods=['POST'])
 def create_sale():
         """
@@ -44,15 +115,8 @@ def create_sale():
         raw_customer = request.form.get("customer_id")
         if not raw_customer:
             return jsonify({"error": "customer_id required"}), 400
-        raw_customer = str(raw_customer).strip()
-        customer = None
-        if raw_customer.isdigit():
-            customer = Customer.query.get(int(raw_customer))
-        else:
-            candidate = raw_customer
-            if candidate.startswith('CU-'):
-                candidate = candidate.replace('CU-', '')
-            customer = Customer.query.filter((Customer.customer_id == raw_customer) | (Customer.customer_id == candidate) | (Customer.name == raw_customer)).first()
+        # PK, external id (with or without CU-) or name; served from the LRU when warm
+        customer = customer_resolver.resolve(raw_customer)
         if not customer:
             return jsonify({"error": "customer not found"}), 404
 
@@ -74,41 +138,51 @@ def create_sale():
                     invoice_url = save_invoice(file)
 
             now = datetime.utcnow()
-            month = now.month
-            week = (now.day - 1) // 7 + 1
-            rand4 = str(uuid.uuid4().int)[:4]
+            # taken before the unit of work; it runs inside the writer's transaction
+            sale_ext_id = _new_sale_ids(now)[0]
 
-            sale = Sale(
-                customer_id=customer.customer_id or str(customer.id),
-                bag_size=bag_size,
-                units=units,
-                total_amount=total_amount,
-                paid_amount=paid_amount,
-                outstanding=outstanding,
-                invoice_image=invoice_url
-            )
+            def write():
+                sale = Sale(
+                    customer_id=customer.ext_id or str(customer.id),
+                    bag_size=bag_size,
+                    units=units,
+                    total_amount=total_amount,
+                    paid_amount=paid_amount,
+                    outstanding=outstanding,
+                    invoice_image=invoice_url,
+                    date=now
+                )
 
-            sale.sale_id = f"S-{month:02d}{week}-{rand4}"
+                sale.sale_id = sale_ext_id
 
-            db.session.add(sale)
-            db.session.commit()
+                db.session.add(sale)
+                # balance row commits in the same transaction as the sale
+                apply_sale_delta(db.session, sale.customer_id, total_amount, paid_amount, 1)
+                apply_sale(db.session, sale)
 
-            # Auto transaction entry only if paid_amount > 0
-            if paid_amount > 0:
-                t = Transaction(
-                    type=payment_type,
-                    amount=paid_amount,
-                    related_type="sale",
-                    related_id=sale.id,
-                    note=f"Sale payment by Customer {customer.customer_id}"
-                )
-                db.session.add(t)
-                db.session.commit()
+                # Auto transaction entry only if paid_amount > 0
+                db.session.flush()  # assigns sale.id without a second commit
+                if paid_amount > 0:
+                    t = Transaction(
+                        type=payment_type,
+                        amount=paid_amount,
+                        related_type="sale",
+                        related_id=sale.id,
+                        note=f"Sale payment by Customer {customer.ext_id}"
+                    )
+                    db.session.add(t)
+                return sale.id
+
+            # committed together with any other writes queued alongside it
+            sale_pk = run_write(write)
+
+            # re-encode + thumbnail off the request thread
+            process_invoice_later(current_app._get_current_object(), Sale, sale_pk, invoice_url)
 
             return jsonify({
                 "message": "Sale created",
-                "id": sale.id,
-                "sale_id": sale.sale_id,
+                "id": sale_pk,
+                "sale_id": sale_ext_id,
                 "total_amount": total_amount,
                 "paid_amount": paid_amount,
                 "outstanding": outstanding,
@@ -118,23 +192,172 @@ def create_sale():
             return jsonify({'error': 'sale creation failed', 'detail': str(ex)}), 500
 
 
+MAX_BATCH = 500
+
+
+@sales.route('/batch', methods=['POST'])
+def create_sales_batch():
+        """
+        JSON body: a list of sales (or {"sales": [...]}), each with the same
+        fields as POST /sales/ except invoice_file:
+
+        customer_id, bag_size, units, price_per_unit, paid_amount, payment_type
+
+        Customers are resolved with at most one query (cached ones with none)
+        and every valid sale, its payment
+        transaction, balance and rollup updates go in one unit of work (one
+        commit, possibly shared with other requests; see group_commit.py). Invalid items
+        are skipped and reported in `results` by their index.
+        """
+        body = request.get_json(silent=True)
+        items = body.get("sales") if isinstance(body, dict) else body
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "expected a non-empty JSON list of sales"}), 400
+        if len(items) > MAX_BATCH:
+            return jsonify({"error": f"at most {MAX_BATCH} sales per batch"}), 400
+
+        raw_ids = {str(it.get("customer_id")).strip() for it in items if isinstance(it, dict) and it.get("customer_id")}
+        customers = customer_resolver.resolve_many(raw_ids)
+
+        now = datetime.utcnow()
+        results = [None] * len(items)
+        pending = []  # (index, sale fields, customer, payment_type)
+        for i, it in enumerate(items):
+            if not isinstance(it, dict):
+                results[i] = {"index": i, "error": "item must be an object"}
+                continue
+            raw = str(it.get("customer_id") or "").strip()
+            if not raw:
+                results[i] = {"index": i, "error": "customer_id required"}
+                continue
+            customer = customers.get(raw)
+            if not customer:
+                results[i] = {"index": i, "error": "customer not found"}
+                continue
+            try:
+                units = int(it.get("units", 0))
+                price_per_unit = float(it.get("price_per_unit", 0))
+                paid_amount = float(it.get("paid_amount", 0))
+            except (TypeError, ValueError) as ex:
+                results[i] = {"index": i, "error": "invalid number", "detail": str(ex)}
+                continue
+            bag_size = it.get("bag_size")
+            if not bag_size:
+                results[i] = {"index": i, "error": "bag_size required"}
+                continue
+            total_amount = units * price_per_unit
+            fields = dict(
+                customer_id=customer.ext_id or str(customer.id),
+                bag_size=bag_size,
+                units=units,
+                total_amount=total_amount,
+                paid_amount=paid_amount,
+                outstanding=total_amount - paid_amount,
+                date=now
+            )
+            pending.append((i, fields, customer, it.get("payment_type", "cash")))
+
+        # served from this process's id block; at most one reservation tops it up
+        sale_ids = _new_sale_ids(now, len(pending)) if pending else []
+
+        def write():
+            # rows are built here, not above, so the unit can be re-run as is
+            built = []
+            for (i, fields, customer, payment_type), sale_id in zip(pending, sale_ids):
+                sale = Sale(**fields)
+                sale.sale_id = sale_id
+                built.append((i, sale, customer, payment_type))
+
+            db.session.add_all([b[1] for b in built])
+            db.session.flush()
+
+            txns = []
+            by_customer = {}
+            by_bucket = {}
+            for _, sale, customer, payment_type in built:
+                if sale.paid_amount > 0:
+                    txns.append(Transaction(
+                        type=payment_type,
+                        amount=sale.paid_amount,
+                        related_type="sale",
+                        related_id=sale.id,
+                        note=f"Sale payment by Customer {customer.ext_id}"
+                    ))
+                c = by_customer.setdefault(sale.customer_id, [0.0, 0.0, 0])
+                c[0] += sale.total_amount
+                c[1] += sale.paid_amount
+                c[2] += 1
+                b = by_bucket.setdefault(sale.bag_size, {"units_sold": 0, "revenue": 0.0, "paid": 0.0, "outstanding": 0.0, "sale_count": 0})
+                b["units_sold"] += sale.units
+                b["revenue"] += sale.total_amount
+                b["paid"] += sale.paid_amount
+                b["outstanding"] += sale.outstanding
+                b["sale_count"] += 1
+            db.session.add_all(txns)
+            # one upsert per customer / bag size instead of one per sale
+            for customer_id, (total, paid, count) in by_customer.items():
+                apply_sale_delta(db.session, customer_id, total, paid, count)
+            for bag_size, deltas in by_bucket.items():
+                apply_delta(db.session, now, bag_size, **deltas)
+            return [{
+                "index": i,
+                "id": sale.id,
+                "sale_id": sale.sale_id,
+                "total_amount": sale.total_amount,
+                "paid_amount": sale.paid_amount,
+                "outstanding": sale.outstanding
+            } for i, sale, _, _ in built]
+
+        if pending:
+            try:
+                for res in run_write(write):
+                    results[res["index"]] = res
+            except Exception as ex:
+                return jsonify({'error': 'batch sale creation failed', 'detail': str(ex)}), 500
+
+        created = len(pending)
+        return jsonify({
+            "message": "Sales created",
+            "created": created,
+            "failed": len(items) - created,
+            "results": results
+        }), 201 if created else 400
+
+
 @sales.route('/<int:sale_id>', methods=['PUT'])
 def update_sale(sale_id):
-        s = Sale.query.get(sale_id)
-        if not s:
-            return jsonify({'error': 'not found'}), 404
         data = request.form or request.json or {}
         try:
+            units = int(data['units']) if 'units' in data else None
+            paid_amount = float(data['paid_amount']) if 'paid_amount' in data else None
+        except (TypeError, ValueError) as ex:
+            return jsonify({'error': 'update failed', 'detail': str(ex)}), 400
+
+        def write():
+            # re-read inside the unit: the row must come from the writer's session
+            s = Sale.query.get(sale_id)
+            if not s:
+                return None
+            old_total, old_paid = s.total_amount or 0.0, s.paid_amount or 0.0
+            # back the old values out of the rollups, re-add the new ones below
+            apply_sale(db.session, s, -1)
             if 'bag_size' in data:
                 s.bag_size = data.get('bag_size')
-            if 'units' in data:
-                s.units = int(data.get('units', s.units))
-            if 'paid_amount' in data:
-                s.paid_amount = float(data.get('paid_amount', s.paid_amount))
+            if units is not None:
+                s.units = units
+            if paid_amount is not None:
+                s.paid_amount = paid_amount
             s.total_amount = s.units * (s.total_amount / (s.units or 1)) if s.units else s.total_amount
             s.outstanding = s.total_amount - s.paid_amount
             db.session.add(s)
-            db.session.commit()
-            return jsonify({'message': 'Sale updated', 'id': s.id, 'sale_id': s.sale_id})
+            apply_sale_delta(db.session, s.customer_id, s.total_amount - old_total, s.paid_amount - old_paid)
+            apply_sale(db.session, s)
+            return {'message': 'Sale updated', 'id': s.id, 'sale_id': s.sale_id}
+
+        try:
+            result = run_write(write)
+            if result is None:
+                return jsonify({'error': 'not found'}), 404
+            return jsonify(result)
         except Exception as ex:
             return jsonify({'error': 'update failed', 'detail': str(ex)}), 400
@@ -1,13 +1,18 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
+from search import search
 from models import Supplier
-import random
+from resolver import supplier_resolver
+from group_commit import run_write
+from id_blocks import allocator
+from conditional import conditional
 import datetime
 
 suppliers = Blueprint('suppliers', __name__)
 
 
 @suppliers.route('/', methods=['GET'])
+@conditional('suppliers')
 def list_suppliers():
     items = Supplier.query.order_by(Supplier.created_at.desc()).all()
     out = []
@@ -23,6 +28,17 @@ def list_suppliers():
     return jsonify(out)
 
 
+@suppliers.route('/search', methods=['GET'])
+def search_suppliers():
+    """Ranked prefix search over name, phone and address: ?q=<text>&limit=20"""
+    q = request.args.get('q', '')
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    return jsonify(search(db.session, 'suppliers', q, limit))
+
+
 @suppliers.route('/', methods=['POST'])
 def create_supplier():
     data = request.form or request.json or {}
@@ -33,24 +49,29 @@ def create_supplier():
     if not name:
         return jsonify({'error': 'name required'}), 400
 
-    s = Supplier(name=name, phone=phone, address=address)
-    # generate supplier external id per requested format
+    # generate supplier external id per requested format; the 4+ digit
+    # number comes from the block-allocated sequence, taken before the unit
+    seq = allocator.next('supplier')
     try:
         names = name.strip().split()
         first = names[0] if names else ''
         last = names[-1] if len(names) > 1 else ''
         # XXXXXX -> date YYMMDD
         x6 = datetime.datetime.utcnow().strftime('%y%m%d')
-        rand4 = str(random.randint(1000, 9999))
         ascii_sum = sum(ord(c) for c in (first + last)) % 10000
-        ext = f"SU-{x6}-{first}{last}{rand4}-{ascii_sum:04d}"
-        s.supplier_id = ext
+        ext = f"SU-{x6}-{first}{last}{seq:04d}-{ascii_sum:04d}"
     except Exception:
-        s.supplier_id = None
+        ext = None
+
+    def write():
+        s = Supplier(name=name, phone=phone, address=address)
+        s.supplier_id = ext
+
+        db.session.add(s)
+        db.session.flush()
+        return {'message': 'Supplier created', 'id': s.id, 'supplier_id': s.supplier_id}
 
-    db.session.add(s)
-    db.session.commit()
-    return jsonify({'message': 'Supplier created', 'id': s.id, 'supplier_id': s.supplier_id}), 201
+    return jsonify(run_write(write)), 201
 
 
 @suppliers.route('/<int:supp_id>', methods=['GET'])
@@ -63,13 +84,20 @@ def get_supplier(supp_id):
 
 @suppliers.route('/<int:supp_id>', methods=['PUT'])
 def update_supplier(supp_id):
-    s = Supplier.query.get(supp_id)
-    if not s:
-        return jsonify({'error': 'not found'}), 404
     data = request.form or request.json or {}
-    s.name = data.get('name', s.name)
-    s.phone = data.get('phone', s.phone)
-    s.address = data.get('address', s.address)
-    db.session.add(s)
-    db.session.commit()
-    return jsonify({'message': 'Supplier updated', 'id': s.id, 'supplier_id': s.supplier_id})
+
+    def write():
+        s = Supplier.query.get(supp_id)
+        if not s:
+            return None
+        s.name = data.get('name', s.name)
+        s.phone = data.get('phone', s.phone)
+        s.address = data.get('address', s.address)
+        db.session.add(s)
+        return {'message': 'Supplier updated', 'id': s.id, 'supplier_id': s.supplier_id}
+
+    result = run_write(write)
+    if result is None:
+        return jsonify({'error': 'not found'}), 404
+    supplier_resolver.invalidate(supp_id)
+    return jsonify(result)
@@ -1,11 +1,17 @@
 # backend/routes/updates.py
-from flask import Blueprint, request, jsonify, current_app
-import sqlite3
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 import os
+import json
 from datetime import datetime
+from notifier import notifier
+from changelog import changed_ids, head_seq
+from metrics import connect
+from conditional import conditional
 
 updates = Blueprint("updates", __name__)
 
+HEARTBEAT_SECONDS = 15
+
 def _get_db_path():
     # try app config first, fall back to project data/grocerybag.db
     db_file = current_app.config.get("DB_FILE_PATH")
@@ -21,35 +27,169 @@ def _query_rows(db, sql, params=()):
     rows = [dict(zip(cols, r)) for r in cur.fetchall()]
     return rows
 
+# columns returned per entity; keys are the change_log entity names
+ENTITY_SQL = {
+    "suppliers": "SELECT id, supplier_id, name, phone, address, created_at FROM suppliers",
+    "customers": "SELECT id, customer_id, uid, name, phone, address, created_at FROM customers",
+    "purchases": "SELECT id, purchase_id, supplier_id, bag_size, units, price_per_unit, total_amount, date FROM purchases",
+    "sales": "SELECT id, sale_id, customer_id, bag_size, units, total_amount, paid_amount, outstanding, date FROM sales",
+}
+
+# stay well under SQLite's bound-parameter limit
+ID_CHUNK = 500
+
+def _collect_since(conn, since_str):
+    # SQLAlchemy stores DateTime as "YYYY-MM-DD HH:MM:SS"; compare in the same
+    # form, since "T" sorts after " " and would hide rows from the same day
+    since_str = since_str.replace("T", " ")
+    out = {"suppliers": [], "customers": [], "purchases": [], "sales": []}
+    # Note: use created_at or date columns depending on table naming
+    out["suppliers"] = _query_rows(conn, ENTITY_SQL["suppliers"] + " WHERE created_at > ? ORDER BY created_at ASC", (since_str,))
+    out["customers"] = _query_rows(conn, ENTITY_SQL["customers"] + " WHERE created_at > ? ORDER BY created_at ASC", (since_str,))
+    out["purchases"] = _query_rows(conn, ENTITY_SQL["purchases"] + " WHERE date > ? ORDER BY date ASC", (since_str,))
+    out["sales"] = _query_rows(conn, ENTITY_SQL["sales"] + " WHERE date > ? ORDER BY date ASC", (since_str,))
+    return out
+
+def _collect_changes(conn, cursor):
+    """
+    Rows inserted/updated after change_log seq `cursor`, plus tombstone ids
+    for deleted rows. Cursor 0 means "no state yet" and returns a full
+    snapshot. The returned `cursor` is what the client sends next time.
+    """
+    head = head_seq(conn)
+    out = {entity: [] for entity in ENTITY_SQL}
+    out["deleted"] = {entity: [] for entity in ENTITY_SQL}
+    if cursor <= 0:
+        for entity, sql in ENTITY_SQL.items():
+            out[entity] = _query_rows(conn, sql + " ORDER BY id ASC")
+    elif cursor < head:
+        for entity, ids in changed_ids(conn, cursor, head).items():
+            if entity not in ENTITY_SQL:
+                continue
+            found = set()
+            for i in range(0, len(ids), ID_CHUNK):
+                chunk = ids[i:i + ID_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = _query_rows(conn, ENTITY_SQL[entity] + f" WHERE id IN ({marks}) ORDER BY id ASC", chunk)
+                found.update(r["id"] for r in rows)
+                out[entity].extend(rows)
+            out["deleted"][entity] = [i for i in ids if i not in found]
+    out["cursor"] = head
+    return out
+
+def _has_changes(out):
+    return any(out[e] for e in ENTITY_SQL) or any(out["deleted"].values())
+
+def _parse_cursor(raw):
+    cursor = int(raw or 0)
+    if cursor < 0:
+        raise ValueError("negative cursor")
+    return cursor
+
+def _db_file_stamp(db_path):
+    # cheap cross-process change check: commits from other workers or external
+    # tools (DB Browser) touch the db / WAL file mtime
+    stamp = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            st = os.stat(path)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
 @updates.route("/recent", methods=["GET"])
+@conditional(*ENTITY_SQL)
 def recent_updates():
     """
-    Returns recent rows for suppliers, customers, purchases, sales.
-    Query param `since` accepts ISO8601 datetime (e.g. 2025-11-24T12:00:00).
+    Returns changed rows for suppliers, customers, purchases, sales.
+
+    Query param `cursor` (preferred) is the change_log sequence returned by the
+    previous call; the response carries inserts *and* edits since then, plus
+    `deleted` ids per entity, and the next `cursor`. Omit it (or pass 0) for a
+    full snapshot.
+
+    Legacy: query param `since` accepts ISO8601 datetime (e.g.
+    2025-11-24T12:00:00) and returns rows created after it; edits are not
+    visible in this mode.
+
+    Either way the response carries an ETag; polling with If-None-Match gets
+    an empty 304 until one of the four tables changes.
     """
-    since = request.args.get("since") or "1970-01-01T00:00:00"
-    # basic validation / normalize
-    try:
-        # allow space or T
-        since_dt = datetime.fromisoformat(since.replace(" ", "T"))
-    except Exception:
-        return jsonify({"error": "invalid since timestamp, use ISO format like 2025-11-24T12:00:00"}), 400
-    since_str = since_dt.isoformat()
+    since = request.args.get("since")
+    use_cursor = "cursor" in request.args or not since
+    if use_cursor:
+        try:
+            cursor = _parse_cursor(request.args.get("cursor"))
+        except ValueError:
+            return jsonify({"error": "invalid cursor, expected a non-negative integer"}), 400
+    else:
+        # basic validation / normalize
+        try:
+            # allow space or T
+            since_dt = datetime.fromisoformat(since.replace(" ", "T"))
+        except Exception:
+            return jsonify({"error": "invalid since timestamp, use ISO format like 2025-11-24T12:00:00"}), 400
+        since_str = since_dt.isoformat()
 
     db_path = _get_db_path()
     if not os.path.exists(db_path):
         return jsonify({"error": "db not found", "db_path": db_path}), 500
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     try:
-        out = {"db_path": db_path, "since": since_str, "suppliers": [], "customers": [], "purchases": [], "sales": []}
-
-        # Note: use created_at or date columns depending on table naming
-        out["suppliers"] = _query_rows(conn, "SELECT id, supplier_id, name, phone, address, created_at FROM suppliers WHERE created_at > ? ORDER BY created_at ASC", (since_str,))
-        out["customers"] = _query_rows(conn, "SELECT id, customer_id, uid, name, phone, address, created_at FROM customers WHERE created_at > ? ORDER BY created_at ASC", (since_str,))
-        out["purchases"] = _query_rows(conn, "SELECT id, purchase_id, supplier_id, bag_size, units, price_per_unit, total_amount, date FROM purchases WHERE date > ? ORDER BY date ASC", (since_str,))
-        out["sales"] = _query_rows(conn, "SELECT id, sale_id, customer_id, bag_size, units, total_amount, paid_amount, outstanding, date FROM sales WHERE date > ? ORDER BY date ASC", (since_str,))
-
+        if use_cursor:
+            out = {"db_path": db_path}
+            out.update(_collect_changes(conn, cursor))
+        else:
+            out = {"db_path": db_path, "since": since_str}
+            out.update(_collect_since(conn, since_str))
         return jsonify(out)
     finally:
         conn.close()
+
+@updates.route("/stream", methods=["GET"])
+def stream_updates():
+    """
+    Server-Sent Events feed of the same payload as /recent in cursor mode.
+
+    The handler sleeps on the in-process change notifier and only queries the
+    DB after a commit (or when the DB file changed underneath us), so idle
+    clients cost no queries. A `: ping` comment is sent every HEARTBEAT_SECONDS
+    to keep proxies from closing the connection. Start position is query param
+    `cursor` (default 0 = full snapshot); each event carries the next cursor as
+    its `id:`, which the browser replays as Last-Event-ID on reconnect.
+    """
+    try:
+        cursor = _parse_cursor(request.headers.get("Last-Event-ID") or request.args.get("cursor"))
+    except ValueError:
+        return jsonify({"error": "invalid cursor, expected a non-negative integer"}), 400
+
+    db_path = _get_db_path()
+    if not os.path.exists(db_path):
+        return jsonify({"error": "db not found", "db_path": db_path}), 500
+
+    def generate():
+        nonlocal cursor
+        version = notifier.version
+        file_stamp = _db_file_stamp(db_path)
+        check = True
+        while True:
+            if check:
+                conn = connect(db_path)
+                try:
+                    out = _collect_changes(conn, cursor)
+                finally:
+                    conn.close()
+                if cursor == 0 or _has_changes(out):
+                    yield f"id: {out['cursor']}\nevent: update\ndata: {json.dumps(out, default=str)}\n\n"
+                cursor = out["cursor"]
+            new_version = notifier.wait(version, timeout=HEARTBEAT_SECONDS)
+            new_stamp = _db_file_stamp(db_path)
+            check = new_version != version or new_stamp != file_stamp
+            version, file_stamp = new_version, new_stamp
+            if not check:
+                yield ": ping\n\n"
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers=headers)
@@ -0,0 +1,85 @@
+# backend/row_counts.py
+"""Trigger-maintained per-table row counts.
+
+`SELECT COUNT(*)` is a full scan in SQLite, so /debug/info and the DB report
+scripts read `table_row_counts` instead: one row per table, bumped by an
+AFTER INSERT / AFTER DELETE trigger on that table. Like the change_log
+triggers they live in the DB, so edits made outside the app are counted too.
+The counts are re-seeded from real COUNT(*)s whenever the schema is
+upgraded; read_counts(..., verify=True) compares them with a real count.
+"""
+
+STATS_TABLE = 'table_row_counts'
+
+
+def counted_tables(cur):
+    """Every ordinary table except SQLite's own, FTS (virtual and shadow)
+    tables and the stats table itself."""
+    cur.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table' ORDER BY name")
+    rows = cur.fetchall()
+    virtual = [name for name, sql in rows if (sql or '').upper().startswith('CREATE VIRTUAL')]
+    out = []
+    for name, _ in rows:
+        if name.startswith('sqlite_') or name == STATS_TABLE:
+            continue
+        if any(name == v or name.startswith(v + '_') for v in virtual):
+            continue
+        out.append(name)
+    return out
+
+
+def recount(cur, tables):
+    """Reset the stored counts for ``tables`` from real COUNT(*)s."""
+    for table in tables:
+        # "WHERE true" keeps the parser from reading ON CONFLICT as a join clause
+        cur.execute(
+            f'INSERT INTO {STATS_TABLE} (name, row_count) SELECT ?, COUNT(*) FROM "{table}" WHERE true '
+            f'ON CONFLICT(name) DO UPDATE SET row_count = excluded.row_count',
+            (table,),
+        )
+
+
+def install_row_counts(cur):
+    """Create the stats table and per-table triggers, then seed the counts."""
+    cur.execute(
+        f"CREATE TABLE IF NOT EXISTS {STATS_TABLE} ("
+        "name VARCHAR(100) NOT NULL PRIMARY KEY, "
+        "row_count INTEGER NOT NULL DEFAULT 0)"
+    )
+    tables = counted_tables(cur)
+    for table in tables:
+        for event, delta in (('INSERT', '+ 1'), ('DELETE', '- 1')):
+            cur.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "trg_{table}_rowcount_{event.lower()}" '
+                f'AFTER {event} ON "{table}" BEGIN '
+                f"UPDATE {STATS_TABLE} SET row_count = row_count {delta} WHERE name = '{table}'; "
+                f"END"
+            )
+    cur.execute(f"DELETE FROM {STATS_TABLE} WHERE name NOT IN ({','.join('?' * len(tables))})", tables)
+    recount(cur, tables)
+
+
+def read_counts(conn, verify=False):
+    """Return ({table: count}, mismatches).
+
+    Counts come from the stats table; tables it doesn't cover (e.g. a DB
+    that predates it) are counted directly. With ``verify`` every table is
+    also counted for real and ``mismatches`` maps table -> {'stored', 'actual'}.
+    """
+    cur = conn.cursor()
+    tables = counted_tables(cur)
+    stored = {}
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (STATS_TABLE,))
+    if cur.fetchone():
+        cur.execute(f'SELECT name, row_count FROM {STATS_TABLE}')
+        stored = dict(cur.fetchall())
+    counts, mismatches = {}, {}
+    for table in tables:
+        actual = None
+        if verify or table not in stored:
+            cur.execute(f'SELECT COUNT(*) FROM "{table}"')
+            actual = cur.fetchone()[0]
+        counts[table] = stored.get(table, actual)
+        if verify and table in stored and stored[table] != actual:
+            mismatches[table] = {'stored': stored[table], 'actual': actual}
+    return counts, mismatches
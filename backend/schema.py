@@ -0,0 +1,131 @@
+# backend/schema.py
+"""Startup schema self-check.
+
+The DB's `PRAGMA user_version` records which SCHEMA_VERSION it was last
+brought up to. When it matches, startup costs one PRAGMA read; otherwise
+create_all() runs and every pending column / index / trigger is applied in a
+single transaction before user_version is bumped.
+
+When changing the schema, add the step below and bump SCHEMA_VERSION.
+"""
+import sqlite3
+
+from changelog import install_triggers
+from search import install_fts
+from row_counts import install_row_counts
+from ledger import REBUILD_SQL as REBUILD_BALANCES_SQL
+from rollups import REBUILD_SQL as REBUILD_ROLLUPS_SQL
+
+SCHEMA_VERSION = 12
+
+# (table, column, DDL type) for columns older DBs may lack
+COLUMNS = [
+    ('users', 'otp', 'VARCHAR(10)'),
+    ('suppliers', 'supplier_id', 'VARCHAR(100)'),
+    ('customers', 'customer_id', 'VARCHAR(100)'),
+    ('customers', 'uid', 'VARCHAR(20)'),
+    ('purchases', 'purchase_id', 'VARCHAR(100)'),
+    ('sales', 'sale_id', 'VARCHAR(100)'),
+    ('purchases', 'invoice_optimized', 'VARCHAR(300)'),
+    ('purchases', 'invoice_thumbnail', 'VARCHAR(300)'),
+    ('sales', 'invoice_optimized', 'VARCHAR(300)'),
+    ('sales', 'invoice_thumbnail', 'VARCHAR(300)'),
+]
+
+# create_all() only builds indexes for new tables, so existing DBs get them here
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_purchases_date_id ON purchases (date, id)",
+    "CREATE INDEX IF NOT EXISTS ix_purchases_supplier_date_id ON purchases (supplier_id, date, id)",
+    "CREATE INDEX IF NOT EXISTS ix_sales_customer_date ON sales (customer_id, date)",
+    "CREATE INDEX IF NOT EXISTS ix_sales_date ON sales (date)",
+    "CREATE INDEX IF NOT EXISTS ix_customers_name_norm ON customers (lower(trim(name)))",
+    "CREATE INDEX IF NOT EXISTS ix_suppliers_name_norm ON suppliers (lower(trim(name)))",
+    "CREATE INDEX IF NOT EXISTS ix_otp_user_code ON otp (user_id, code)",
+    "CREATE INDEX IF NOT EXISTS ix_otp_expires_at ON otp (expires_at)",
+]
+
+
+# rewrite sales/purchases dates to the ORM's "YYYY-MM-DD HH:MM:SS.ffffff" so the
+# keyset cursor and from/to filters (string comparisons) see one format; older
+# rows use a "T" separator or drop the microseconds
+_CANONICAL_DATE = (
+    "strftime('%Y-%m-%d %H:%M:%S', date) || '.' || "
+    "CASE WHEN substr(date, 20, 1) = '.' THEN substr(substr(date, 21) || '000000', 1, 6) ELSE '000000' END"
+)
+NORMALIZE_DATES_SQL = [
+    f"UPDATE {table} SET date = {_CANONICAL_DATE} "
+    f"WHERE typeof(date) = 'text' AND strftime('%s', date) IS NOT NULL AND date <> {_CANONICAL_DATE}"
+    for table in ('sales', 'purchases')
+]
+
+# one-off data steps, run once when a DB moves past the given version
+DATA_STEPS = {
+    2: REBUILD_BALANCES_SQL,
+    3: REBUILD_ROLLUPS_SQL,
+    11: NORMALIZE_DATES_SQL,
+    # balances re-derived with outstanding = total - paid (ledger.py)
+    12: REBUILD_BALANCES_SQL,
+}
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _existing_columns(cur):
+    # one query for every table instead of a PRAGMA table_info per table
+    cur.execute(
+        "SELECT m.name, p.name FROM sqlite_master m "
+        "JOIN pragma_table_info(m.name) p WHERE m.type = 'table'"
+    )
+    cols = {}
+    for table, col in cur.fetchall():
+        cols.setdefault(table, set()).add(col)
+    return cols
+
+
+def apply_pending(conn, from_version=0):
+    """Apply every schema step in one transaction and stamp SCHEMA_VERSION."""
+    conn.isolation_level = None
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        cols = _existing_columns(cur)
+        added = []
+        for table, col, ddl in COLUMNS:
+            if table in cols and col not in cols[table]:
+                cur.execute(f"ALTER TABLE {table} ADD COLUMN {col} {ddl}")
+                added.append(f"{table}.{col}")
+        for stmt in INDEXES:
+            cur.execute(stmt)
+        install_triggers(cur)
+        install_fts(cur)
+        for version in sorted(DATA_STEPS):
+            if from_version < version <= SCHEMA_VERSION:
+                for stmt in DATA_STEPS[version]:
+                    cur.execute(stmt)
+        # last, so the seeded counts include everything above
+        install_row_counts(cur)
+        cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+    return added
+
+
+def ensure_schema(db_file, create_all=None):
+    """Bring ``db_file`` up to SCHEMA_VERSION; returns True if anything ran."""
+    conn = sqlite3.connect(db_file)
+    try:
+        current = schema_version(conn)
+        if current >= SCHEMA_VERSION:
+            return False
+        if create_all is not None:
+            create_all()
+        added = apply_pending(conn, current)
+        for name in added:
+            print('Added', name, 'to', db_file)
+        return True
+    finally:
+        conn.close()
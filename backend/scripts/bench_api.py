@@ -0,0 +1,345 @@
+"""Repeatable load / latency benchmark for the API.
+
+Seeds a throw-away SQLite DB of the requested size, then drives a set of
+scenarios at fixed concurrency, first through the Flask test client (in
+process, no network) and then against a real multi-worker gunicorn server,
+and prints a JSON report with p50/p95/p99 latency and throughput per
+scenario, so runs can be diffed to catch regressions.
+
+Run:
+    python backend/scripts/bench_api.py [--customers 1000] [--sales 20000] ...
+        [--concurrency 8] [--requests 400] [--modes client,server]
+        [--scenarios sales_list,auth_login,...] [--workers 4] [--out report.json]
+
+Scenarios: sales_list, sales_create, purchases_list, purchases_create,
+customers_list, customers_create, updates_recent, auth_login.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from pagination import day_timestamp  # noqa: E402
+
+BAG_SIZES = ('1kg', '5kg', '10kg', '25kg')
+BENCH_PASSWORD = 'Bench#Pass1'
+
+
+# -- seeding -------------------------------------------------------------
+def seed(db_path, sizes, rng_seed):
+    """Bulk-load users, customers, suppliers, sales and purchases."""
+    rng = random.Random(rng_seed)
+    start = date.today() - timedelta(days=365)
+
+    def when(i, n):
+        # spread over the last year, in the format the app itself writes
+        secs = int(i * 365 * 86400 / max(n, 1))
+        return day_timestamp((start + timedelta(days=secs // 86400)).isoformat(), secs % 86400)
+
+    # hashed once with the current PASSWORD_HASH_METHOD, so auth_login
+    # measures a real KDF check rather than a first-login rehash
+    from passwords import hash_password
+    stored = hash_password(BENCH_PASSWORD)
+
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    cur.execute('BEGIN')
+    cur.executemany(
+        'INSERT INTO users (uid, phone, password, role, created_at) VALUES (?,?,?,?,?)',
+        [(f'US-B{i:05d}', f'70{i:08d}', stored, 'user', when(0, 1)) for i in range(sizes['users'])],
+    )
+    cur.executemany(
+        'INSERT INTO customers (customer_id, uid, name, phone, address, created_at) VALUES (?,?,?,?,?,?)',
+        [(f'CU-BENCH-{i:06d}', f'CU-B{i:06d}', f'Customer {i}', f'80{i:08d}', f'{i} Market Road', when(i, sizes['customers']))
+         for i in range(sizes['customers'])],
+    )
+    cur.executemany(
+        'INSERT INTO suppliers (supplier_id, name, phone, address, created_at) VALUES (?,?,?,?,?)',
+        [(f'SU-BENCH-{i:05d}', f'Supplier {i}', f'90{i:08d}', f'{i} Mill Lane', when(i, sizes['suppliers']))
+         for i in range(sizes['suppliers'])],
+    )
+    sales = []
+    for i in range(sizes['sales']):
+        units = rng.randint(1, 20)
+        total = units * rng.choice((40.0, 180.0, 350.0, 850.0))
+        paid = total if rng.random() < 0.7 else round(total * rng.random(), 2)
+        sales.append((f'S-BENCH-{i:07d}', f'CU-BENCH-{rng.randrange(sizes["customers"]):06d}', rng.choice(BAG_SIZES),
+                      units, total, paid, total - paid, when(i, sizes['sales'])))
+    cur.executemany(
+        'INSERT INTO sales (sale_id, customer_id, bag_size, units, total_amount, paid_amount, outstanding, date) '
+        'VALUES (?,?,?,?,?,?,?,?)', sales)
+    purchases = []
+    for i in range(sizes['purchases']):
+        units = rng.randint(10, 200)
+        price = rng.choice((30.0, 150.0, 300.0, 700.0))
+        purchases.append((f'P-BENCH-{i:07d}', f'SU-BENCH-{rng.randrange(sizes["suppliers"]):05d}', rng.choice(BAG_SIZES),
+                          units, price, units * price, when(i, sizes['purchases'])))
+    cur.executemany(
+        'INSERT INTO purchases (purchase_id, supplier_id, bag_size, units, price_per_unit, total_amount, date) '
+        'VALUES (?,?,?,?,?,?,?)', purchases)
+    conn.commit()
+
+    # derived tables the write paths normally keep up to date
+    from ledger import rebuild_balances
+    from rollups import rebuild_rollups
+    rebuild_balances(conn)
+    rebuild_rollups(conn)
+    conn.commit()
+    head = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log').fetchone()[0]
+    conn.close()
+    return {'change_log_head': head}
+
+
+# -- scenarios -----------------------------------------------------------
+# each returns (method, path, body, content type) for one request
+def make_scenarios(sizes, change_head):
+    phone_seq = itertools.count()
+
+    def sales_list(rng):
+        return 'GET', '/sales/?limit=50', None, None
+
+    def sales_create(rng):
+        form = {'customer_id': str(rng.randint(1, sizes['customers'])), 'bag_size': rng.choice(BAG_SIZES),
+                'units': str(rng.randint(1, 10)), 'price_per_unit': '180', 'paid_amount': '100', 'payment_type': 'cash'}
+        return 'POST', '/sales/', urlencode(form), 'application/x-www-form-urlencoded'
+
+    def purchases_list(rng):
+        return 'GET', '/purchases/?limit=50', None, None
+
+    def purchases_create(rng):
+        form = {'supplier_id': str(rng.randint(1, sizes['suppliers'])), 'bag_size': rng.choice(BAG_SIZES),
+                'units': str(rng.randint(10, 100)), 'price_per_unit': '150'}
+        return 'POST', '/purchases/', urlencode(form), 'application/x-www-form-urlencoded'
+
+    def customers_list(rng):
+        return 'GET', '/customers/', None, None
+
+    def customers_create(rng):
+        n = next(phone_seq)
+        body = {'name': f'Bench New {n}', 'phone': f'6{os.getpid() % 1000:03d}{n:07d}'}
+        return 'POST', '/customers/', json.dumps(body), 'application/json'
+
+    def updates_recent(rng):
+        return 'GET', f'/updates/recent?cursor={max(change_head - 50, 1)}', None, None
+
+    def auth_login(rng):
+        body = {'phone': f'70{rng.randrange(sizes["users"]):08d}', 'password': BENCH_PASSWORD}
+        return 'POST', '/auth/login', json.dumps(body), 'application/json'
+
+    return {f.__name__: f for f in (sales_list, sales_create, purchases_list, purchases_create,
+                                    customers_list, customers_create, updates_recent, auth_login)}
+
+
+# -- drivers -------------------------------------------------------------
+def client_sender(app):
+    local = threading.local()
+
+    def send(method, path, body, content_type):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        headers = {'Content-Type': content_type} if content_type else {}
+        return client.open(path, method=method, data=body, headers=headers).status_code
+    return send
+
+
+def http_sender(port):
+    def send(method, path, body, content_type):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        try:
+            headers = {'Content-Type': content_type} if content_type else {}
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            return resp.status
+        finally:
+            conn.close()
+    return send
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    # nearest-rank
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def run_scenario(send, make_request, requests, concurrency, rng_seed):
+    todo = itertools.count()
+    lock = threading.Lock()
+    latencies, errors = [], []
+
+    def worker(n):
+        rng = random.Random(rng_seed * 1000 + n)
+        mine = []
+        while next(todo) < requests:
+            method, path, body, content_type = make_request(rng)
+            t0 = time.perf_counter()
+            try:
+                status = send(method, path, body, content_type)
+            except Exception as ex:
+                status = repr(ex)
+            mine.append(time.perf_counter() - t0)
+            if not isinstance(status, int) or status >= 400:
+                with lock:
+                    errors.append(status)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    return {
+        'requests': len(ms),
+        'errors': len(errors),
+        'error_samples': [str(e) for e in errors[:3]],
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(ms) / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            'p50': round(percentile(ms, 50), 2) if ms else None,
+            'p95': round(percentile(ms, 95), 2) if ms else None,
+            'p99': round(percentile(ms, 99), 2) if ms else None,
+            'max': round(ms[-1], 2) if ms else None,
+            'mean': round(sum(ms) / len(ms), 2) if ms else None,
+        },
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers, threads, env):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-k', 'gthread', '--threads', str(threads),
+         '-b', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError('gunicorn exited: ' + proc.stderr.read().decode(errors='replace')[-2000:])
+        try:
+            if http_sender(port)('GET', '/', None, None) == 200:
+                return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError('gunicorn did not come up')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API load / latency benchmark')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--customers', type=int, default=1000)
+    parser.add_argument('--suppliers', type=int, default=50)
+    parser.add_argument('--sales', type=int, default=20000)
+    parser.add_argument('--purchases', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads per scenario')
+    parser.add_argument('--requests', type=int, default=400, help='requests per scenario and mode')
+    parser.add_argument('--scenarios', default='', help='comma list (default: all)')
+    parser.add_argument('--modes', default='client,server', help='client and/or server')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker')
+    parser.add_argument('--profile', default='production', choices=['edit', 'production'], help='DB_ENGINE_PROFILE')
+    parser.add_argument('--db', help='keep the seeded DB at this path instead of a temp dir')
+    parser.add_argument('--out', help='also write the JSON report here')
+    args = parser.parse_args()
+
+    sizes = {k: max(1, getattr(args, k)) for k in ('users', 'customers', 'suppliers', 'sales', 'purchases')}
+    tmp = None
+    if args.db:
+        db_path = os.path.abspath(args.db)
+        if os.path.exists(db_path):
+            parser.error(f'{db_path} already exists')
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp.name, 'bench.db')
+
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + db_path, DEV_SEED='false',
+               DB_ENGINE_PROFILE=args.profile, SLOW_QUERY_MS='0', RATE_LIMIT='false')
+    os.environ.update(env)
+    from app import app  # noqa: E402  (creates the schema at DATABASE_URL)
+
+    t0 = time.perf_counter()
+    seeded = seed(db_path, sizes, args.seed)
+    seed_seconds = round(time.perf_counter() - t0, 2)
+
+    scenarios = make_scenarios(sizes, seeded['change_log_head'])
+    wanted = [s.strip() for s in args.scenarios.split(',') if s.strip()] or list(scenarios)
+    unknown = [s for s in wanted if s not in scenarios]
+    if unknown:
+        parser.error('unknown scenario(s): ' + ', '.join(unknown))
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+
+    report = {
+        'started_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'config': {'sizes': sizes, 'seed': args.seed, 'concurrency': args.concurrency, 'requests': args.requests,
+                   'profile': args.profile, 'workers': args.workers, 'threads': args.threads,
+                   'group_commit': bool(app.config.get('GROUP_COMMIT'))},
+        'seed_seconds': seed_seconds,
+        'results': [],
+    }
+    try:
+        for mode in modes:
+            proc = None
+            if mode == 'client':
+                send = client_sender(app)
+            elif mode == 'server':
+                proc, port = start_server(args.workers, args.threads, env)
+                send = http_sender(port)
+            else:
+                parser.error(f'unknown mode {mode}')
+            try:
+                for name in wanted:
+                    res = run_scenario(send, scenarios[name], args.requests, args.concurrency, args.seed)
+                    res.update(mode=mode, scenario=name)
+                    report['results'].append(res)
+                    print(f"{mode:>6} {name:<18} {res['throughput_rps']:>8} rps  p50 {res['latency_ms']['p50']}ms  "
+                          f"p95 {res['latency_ms']['p95']}ms  p99 {res['latency_ms']['p99']}ms  errors {res['errors']}",
+                          file=sys.stderr)
+            finally:
+                if proc is not None:
+                    proc.terminate()
+                    proc.wait(timeout=30)
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    out = json.dumps(report, indent=2)
+    print(out)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(out + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
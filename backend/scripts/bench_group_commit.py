@@ -0,0 +1,102 @@
+"""Measure write throughput with and without group commit.
+
+Each mode runs in a fresh process against a fresh SQLite file: --threads
+client threads each send --writes requests through the Flask test client,
+alternating POST /customers/ and POST /sales/, and the script reports
+writes/second for GROUP_COMMIT=false (one commit per request) and
+GROUP_COMMIT=true (see group_commit.py).
+
+Run: python backend/scripts/bench_group_commit.py [--threads 16] [--writes 100] [--profile production]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def run_child(threads, writes):
+    sys.path.insert(0, ROOT)
+    from app import app  # noqa: E402  (reads DATABASE_URL / GROUP_COMMIT)
+
+    seed = app.test_client()
+    r = seed.post('/customers/', json={'name': 'Bench Customer', 'phone': '9000000000'})
+    customer_id = r.get_json()['id']
+
+    errors = []
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(n):
+        client = app.test_client()
+        barrier.wait()
+        for i in range(writes):
+            if i % 2:
+                r = client.post('/sales/', data={'customer_id': str(customer_id), 'bag_size': '5kg',
+                                                 'units': '2', 'price_per_unit': '5', 'paid_amount': '3'})
+            else:
+                r = client.post('/customers/', json={'name': f'Bench {n} {i}', 'phone': f'8{n:03d}{i:06d}'})
+            if r.status_code >= 300:
+                errors.append(r.status_code)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    total = threads * writes
+    from group_commit import get_writer
+    with app.app_context():
+        writer = get_writer(app)
+    print(json.dumps({
+        'group_commit': bool(app.config.get('GROUP_COMMIT')),
+        'writes': total,
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'writes_per_sec': round(total / elapsed, 1),
+        'writer': writer.stats() if writer else None,
+    }))
+
+
+def run_mode(enabled, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ,
+                   DATABASE_URL='sqlite:///' + os.path.join(tmp, 'bench.db'),
+                   DB_ENGINE_PROFILE=args.profile,
+                   GROUP_COMMIT='true' if enabled else 'false',
+                   DEV_SEED='false')
+        out = subprocess.run(
+            [sys.executable, __file__, '--child', '--threads', str(args.threads), '--writes', str(args.writes)],
+            env=env, cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+    # app startup prints to stdout too; the result is the last line
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark group commit')
+    parser.add_argument('--threads', type=int, default=16, help='concurrent client threads')
+    parser.add_argument('--writes', type=int, default=100, help='requests per thread')
+    parser.add_argument('--profile', default='production', choices=['edit', 'production'], help='DB_ENGINE_PROFILE')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args.threads, args.writes)
+        sys.exit(0)
+
+    before = run_mode(False, args)
+    after = run_mode(True, args)
+    for label, res in (('per-request commit', before), ('group commit', after)):
+        print(f"{label:>20}: {res['writes_per_sec']:>8.1f} writes/s "
+              f"({res['writes']} writes, {res['errors']} errors, {res['seconds']}s)")
+    if after['writer']:
+        print(f"{'':>20}  {after['writer']}")
+    print(f"{'speedup':>20}: {after['writes_per_sec'] / before['writes_per_sec']:.2f}x")
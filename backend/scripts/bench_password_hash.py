@@ -0,0 +1,79 @@
+"""Login throughput at several password-hash cost settings.
+
+For each PASSWORD_HASH_METHOD this times one hash in-process, then runs the
+auth_login scenario of bench_api.py in a fresh process (users are seeded with
+a hash of that method, see passwords.py) and reports logins/second and
+latency percentiles, so a cost can be picked that keeps a shift-start login
+burst within budget on the target box.
+
+Run: python backend/scripts/bench_password_hash.py
+        [--methods pbkdf2:sha256:100000,scrypt:16384:8:1,scrypt:32768:8:1,scrypt:65536:8:1]
+        [--concurrency 16] [--requests 200] [--mode client|server] [--pool-workers N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from werkzeug.security import generate_password_hash
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_METHODS = 'pbkdf2:sha256:100000,scrypt:16384:8:1,scrypt:32768:8:1,scrypt:65536:8:1'
+
+
+def hash_ms(method, rounds=5):
+    times = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        generate_password_hash('Bench#Pass1', method)
+        times.append((time.perf_counter() - t0) * 1000)
+    return round(statistics.median(times), 1)
+
+
+def run_method(method, args):
+    env = dict(os.environ, PASSWORD_HASH_METHOD=method)
+    if args.pool_workers:
+        env['PASSWORD_WORKERS'] = str(args.pool_workers)
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, 'report.json')
+        subprocess.run(
+            [sys.executable, os.path.join(ROOT, 'scripts', 'bench_api.py'), '--scenarios', 'auth_login',
+             '--modes', args.mode, '--users', str(args.users), '--customers', '10', '--suppliers', '5',
+             '--sales', '10', '--purchases', '10', '--concurrency', str(args.concurrency),
+             '--requests', str(args.requests), '--out', out],
+            env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True,
+        )
+        with open(out, encoding='utf-8') as f:
+            return json.load(f)['results'][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark login throughput per password-hash cost')
+    parser.add_argument('--methods', default=DEFAULT_METHODS, help='comma list of werkzeug hash methods')
+    parser.add_argument('--concurrency', type=int, default=16, help='client threads')
+    parser.add_argument('--requests', type=int, default=200, help='logins per method')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--mode', default='client', choices=['client', 'server'], help='see bench_api.py')
+    parser.add_argument('--pool-workers', type=int, help='PASSWORD_WORKERS (default: CPU count)')
+    args = parser.parse_args()
+
+    rows = []
+    for method in [m.strip() for m in args.methods.split(',') if m.strip()]:
+        res = run_method(method, args)
+        row = {'method': method, 'hash_ms': hash_ms(method), 'logins_per_sec': res['throughput_rps'],
+               'errors': res['errors'], 'latency_ms': res['latency_ms']}
+        rows.append(row)
+        print(f"{method:<24} hash {row['hash_ms']:>7} ms  {row['logins_per_sec']:>8} logins/s  "
+              f"p50 {row['latency_ms']['p50']}ms  p95 {row['latency_ms']['p95']}ms  "
+              f"p99 {row['latency_ms']['p99']}ms  errors {row['errors']}", file=sys.stderr)
+    print(json.dumps({'concurrency': args.concurrency, 'mode': args.mode, 'cpus': os.cpu_count(),
+                      'results': rows}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
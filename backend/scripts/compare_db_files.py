@@ -1,6 +1,13 @@
 import sqlite3, os
 import os
+import sys
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(project_root, 'backend'))
+from row_counts import read_counts
+
+# counts come from the trigger-maintained table_row_counts; pass --verify to
+# also run a real COUNT(*) per table and flag drift
+verify = '--verify' in sys.argv[1:]
 files = [
     os.path.join(project_root, 'backend', 'instance', 'grocerybag.db'),
     os.path.join(project_root, 'data', 'grocerybag.db'),
@@ -11,15 +18,15 @@ for f in files:
         print('  (not found)')
         continue
     con = sqlite3.connect(f)
-    cur = con.cursor()
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-    tables = [r[0] for r in cur.fetchall()]
-    for t in tables:
-        try:
-            cur.execute(f'SELECT COUNT(*) FROM "{t}"')
-            c = cur.fetchone()[0]
-        except Exception as e:
-            c = 'err'
-        print('  ', t, c)
+    try:
+        counts, mismatches = read_counts(con, verify=verify)
+    except Exception as e:
+        counts, mismatches = {}, {}
+        print('  error:', e)
+    for t, c in counts.items():
+        if t in mismatches:
+            print('  ', t, c, f"(actual {mismatches[t]['actual']})")
+        else:
+            print('  ', t, c)
     con.close()
     print()
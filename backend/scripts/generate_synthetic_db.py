@@ -0,0 +1,394 @@
+"""Deterministic synthetic data for capacity testing.
+
+Builds a fresh SQLite DB with the current model schema and fills it with
+realistic-looking history: customers who join over time and buy with a
+heavy-tailed frequency, a bag-size mix weighted towards small bags, prices
+that drift upward, busier weekends and festive months, business growth over
+the period, and per-customer payment behaviour (prompt / partial / on
+credit) with a cash-to-online shift. The same --seed and sizes always give
+the same rows.
+
+Rows are generated in chunks and written with executemany() in one large
+transaction per table, with journaling off and every secondary index
+dropped; indexes are rebuilt afterwards and then schema.apply_pending()
+installs the triggers and FTS tables and derives balances, rollups and row
+counts from the loaded rows, exactly as it would on an upgraded DB.
+
+Run:
+    python backend/scripts/generate_synthetic_db.py --out /tmp/big.db
+        [--seed 1] [--customers 50000] [--sales 5000000] [--years 3]
+        [--suppliers 400] [--purchases N] [--users 20] [--end 2025-11-30]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from bisect import bisect
+from datetime import date, timedelta
+from itertools import accumulate
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine  # noqa: E402
+
+from extensions import db  # noqa: E402
+import models  # noqa: E402,F401  (registers the tables on db.metadata)
+from id_blocks import month_week  # noqa: E402
+from pagination import day_timestamp as _ts  # noqa: E402
+from passwords import hash_password  # noqa: E402
+from schema import apply_pending  # noqa: E402
+
+CHUNK = 200000
+USER_PASSWORD = 'Synthetic#1'
+
+BAG_SIZES = ('1kg', '5kg', '10kg', '25kg')
+BAG_MIX = (0.38, 0.30, 0.20, 0.12)
+# shelf price per bag at the start of the period, and typical units per sale
+BASE_PRICE = {'1kg': 42.0, '5kg': 190.0, '10kg': 360.0, '25kg': 860.0}
+MEAN_UNITS = {'1kg': 6.0, '5kg': 3.0, '10kg': 2.0, '25kg': 1.5}
+PRICE_DRIFT = 0.06  # per year
+COST_RATIO = 0.82  # purchase price / shelf price
+GROWTH = 0.8  # daily volume at the end of the period vs the start, minus one
+WEEKDAY = (0.9, 0.85, 0.9, 0.95, 1.1, 1.35, 0.7)  # Mon..Sun, sales
+RESTOCK_WEEKDAY = (1.3, 1.0, 1.1, 1.0, 1.2, 0.6, 0.0)  # Mon..Sun, purchases
+MONTH = (0.95, 0.9, 1.0, 1.0, 0.95, 0.9, 0.9, 0.95, 1.05, 1.25, 1.3, 1.1)
+OPEN_SECONDS, CLOSE_SECONDS = 8 * 3600, 21 * 3600
+
+# payment behaviour: (share of customers, probability a sale is paid in full,
+# probability it is left entirely on credit); the rest are part-paid
+PAYERS = ((0.65, 0.95, 0.0), (0.25, 0.45, 0.05), (0.10, 0.15, 0.55))
+ONLINE_SHARE = (0.25, 0.60)  # at the start and the end of the period
+
+FIRST_NAMES = (
+    'Aarav', 'Aditi', 'Akash', 'Ananya', 'Anil', 'Arjun', 'Asha', 'Bina', 'Chirag', 'Deepa', 'Dev', 'Divya',
+    'Farhan', 'Gita', 'Gopal', 'Harish', 'Isha', 'Jaya', 'Karan', 'Kavita', 'Lakshmi', 'Madan', 'Manoj', 'Meera',
+    'Mohan', 'Nalini', 'Neha', 'Nikhil', 'Pooja', 'Pradeep', 'Priya', 'Rahul', 'Rajesh', 'Ramesh', 'Ravi', 'Rekha',
+    'Rohit', 'Sanjay', 'Sarita', 'Shreya', 'Sunil', 'Sunita', 'Suresh', 'Tara', 'Uma', 'Vijay', 'Vikram', 'Zoya',
+)
+LAST_NAMES = (
+    'Agarwal', 'Banerjee', 'Bose', 'Chatterjee', 'Das', 'Dutta', 'Ghosh', 'Gupta', 'Iyer', 'Jain', 'Joshi', 'Kapoor',
+    'Khan', 'Kumar', 'Mehta', 'Menon', 'Mishra', 'Mukherjee', 'Nair', 'Pal', 'Patel', 'Rao', 'Reddy', 'Roy',
+    'Saha', 'Sau', 'Sen', 'Shah', 'Sharma', 'Singh', 'Sinha', 'Verma',
+)
+STREETS = ('Market Road', 'Station Road', 'Temple Street', 'Lake View', 'Park Lane', 'Mill Road', 'Bazar Para',
+           'College Street', 'Canal Side', 'School Road')
+AREAS = ('Salt Lake', 'Howrah', 'Dum Dum', 'Behala', 'Garia', 'Baranagar', 'Barasat', 'Sodepur')
+SUPPLIER_KINDS = ('Traders', 'Wholesale', 'Agencies', 'Distributors', 'Mills', 'Suppliers')
+
+
+def _phone(prefix, i):
+    # 7919 is prime, so i -> digits is a bijection and the phones look random
+    return f'{prefix}{(i * 7919 + 1234567) % 10 ** 9:09d}'
+
+
+def _external_id(prefix, created, name, seq):
+    # same shape as routes/customers.py / routes/suppliers.py
+    names = name.split()
+    first, last = names[0], names[-1] if len(names) > 1 else ''
+    ascii_sum = sum(ord(ch) for ch in (first + last)) % 10000
+    return f'{prefix}-{created:%y%m%d}-{first}{last}{seq:04d}-{ascii_sum:04d}'
+
+
+def _spread(total, weights):
+    """Split ``total`` over ``weights`` by cumulative rounding (sums exactly)."""
+    cum = list(accumulate(weights))
+    whole = cum[-1] or 1
+    out, prev = [], 0
+    for c in cum:
+        upto = round(total * c / whole)
+        out.append(upto - prev)
+        prev = upto
+    return out
+
+
+class Calendar:
+    def __init__(self, end, years):
+        self.end = end
+        self.days = max(1, round(365.25 * years))
+        self.start = end - timedelta(days=self.days - 1)
+        self.dates = [self.start + timedelta(days=d) for d in range(self.days)]
+        self.day_strs = [d.isoformat() for d in self.dates]
+        self.month_weeks = [month_week(d) for d in self.dates]
+
+    def volume(self, weekday_weights):
+        """Relative activity per day: growth x weekday x month."""
+        n = self.days
+        return [(1 + GROWTH * d / n) * weekday_weights[day.weekday()] * MONTH[day.month - 1]
+                for d, day in enumerate(self.dates)]
+
+    def price(self, bag, d):
+        # shelf prices move once a month
+        months = (self.dates[d] - self.start).days // 30
+        return round(BASE_PRICE[bag] * (1 + PRICE_DRIFT) ** (months / 12.0))
+
+
+# -- schema --------------------------------------------------------------
+def create_schema(path):
+    """Create every model table, drop the secondary indexes for the load and
+    return their DDL so they can be rebuilt afterwards."""
+    engine = create_engine('sqlite:///' + path)
+    db.metadata.create_all(engine)
+    engine.dispose()
+    conn = sqlite3.connect(path, isolation_level=None)
+    index_sql = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL ORDER BY name"
+    ).fetchall()
+    for name, _ in index_sql:
+        conn.execute(f'DROP INDEX "{name}"')
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA cache_size = -262144')  # 256 MiB
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute('PRAGMA locking_mode = EXCLUSIVE')
+    return conn, [sql for _, sql in index_sql]
+
+
+def load(conn, targets, chunks):
+    """executemany() every chunk in a single transaction.
+
+    ``targets`` is a sequence of (table, columns); each chunk holds one list
+    of rows per target, in the same order. Returns the row count per target.
+    """
+    sqls = [f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+            for table, cols in targets]
+    rows = [0] * len(targets)
+    conn.execute('BEGIN')
+    for chunk in chunks:
+        for i, (sql, part) in enumerate(zip(sqls, chunk)):
+            conn.executemany(sql, part)
+            rows[i] += len(part)
+    conn.execute('COMMIT')
+    return rows
+
+
+# -- generators ----------------------------------------------------------
+def gen_users(n, cal):
+    created = _ts(cal.day_strs[0], OPEN_SECONDS)
+    # one hash for all of them: same password, and each hash costs a KDF run
+    stored = hash_password(USER_PASSWORD)
+    rows = []
+    for i in range(1, n + 1):
+        role = 'admin' if i == 1 else 'user'
+        prefix = 'AD' if role == 'admin' else 'US'
+        rows.append((i, f'{prefix}-{i:04d}', _phone('6', i), stored, role, created))
+    return rows
+
+
+class Customers:
+    """Customer rows plus what the sale generator needs to pick buyers."""
+
+    def __init__(self, rng, n, cal):
+        self.n = n
+        # 40% were already customers when the period starts, the rest join
+        # evenly across it; they are numbered in joining order
+        self.existing = max(1, int(n * 0.4))
+        weights = [min(rng.paretovariate(1.2), 50.0) for _ in range(n)]
+        self.cum_weights = list(accumulate(weights))
+        payer_cum = list(accumulate(p[0] for p in PAYERS))
+        self.payer = [min(len(PAYERS) - 1, bisect(payer_cum, rng.random())) for _ in range(n)]
+        self.ext_ids = []
+        self.rows = []
+        before = cal.start - timedelta(days=365)
+        for i in range(n):
+            if i < self.existing:
+                d = i * 365 // self.existing
+                created, created_str = before + timedelta(days=d), (before + timedelta(days=d)).isoformat()
+            else:
+                d = (i - self.existing) * cal.days // max(1, n - self.existing)
+                created, created_str = cal.dates[d], cal.day_strs[d]
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+            ext = _external_id('CU', created, name, i + 1)
+            self.ext_ids.append(ext)
+            address = f'{rng.randint(1, 250)} {rng.choice(STREETS)}, {rng.choice(AREAS)}'
+            pk = i + 1
+            self.rows.append((pk, ext, f'CU-{pk:04d}', name, _phone('9', pk), address,
+                              _ts(created_str, rng.randrange(OPEN_SECONDS, CLOSE_SECONDS))))
+
+    def eligible(self, d, days):
+        """How many customers have joined by the end of day ``d``."""
+        return min(self.n, self.existing + (self.n - self.existing) * (d + 1) // days)
+
+
+def gen_suppliers(rng, n, cal):
+    rows, ext_ids = [], []
+    for i in range(n):
+        name = f'{rng.choice(LAST_NAMES)} {rng.choice(SUPPLIER_KINDS)}'
+        d = i * cal.days // (4 * n)  # most suppliers are signed up early on
+        ext = _external_id('SU', cal.dates[d], name, i + 1)
+        ext_ids.append(ext)
+        address = f'{rng.randint(1, 400)} {rng.choice(STREETS)}, {rng.choice(AREAS)}'
+        rows.append((i + 1, ext, name, _phone('8', i + 1), address, _ts(cal.day_strs[d], OPEN_SECONDS)))
+    return rows, ext_ids
+
+
+def gen_sales(rng, n, cal, customers):
+    """Yield (sale rows, payment transaction rows) chunks."""
+    bag_cum = list(accumulate(BAG_MIX))
+    counts = _spread(n, cal.volume(WEEKDAY))
+    random_ = rng.random
+    expo = rng.expovariate
+    pk = 0
+    chunk, txns = [], []
+    for d, k in enumerate(counts):
+        if not k:
+            continue
+        day_str, mw = cal.day_strs[d], cal.month_weeks[d]
+        online_share = ONLINE_SHARE[0] + (ONLINE_SHARE[1] - ONLINE_SHARE[0]) * d / cal.days
+        prices = {bag: cal.price(bag, d) for bag in BAG_SIZES}
+        pool = customers.eligible(d, cal.days)
+        buyers = rng.choices(range(pool), cum_weights=customers.cum_weights[:pool], k=k)
+        bags = rng.choices(BAG_SIZES, cum_weights=bag_cum, k=k)
+        times = sorted(rng.randrange(OPEN_SECONDS, CLOSE_SECONDS) for _ in range(k))
+        for buyer, bag, secs in zip(buyers, bags, times):
+            pk += 1
+            units = 1 + int(expo(1.0 / MEAN_UNITS[bag]))
+            total = units * prices[bag]
+            full, credit = PAYERS[customers.payer[buyer]][1:]
+            r = random_()
+            if r < full:
+                paid = total
+            elif r < full + credit:
+                paid = 0.0
+            else:
+                paid = round(total * (0.2 + 0.7 * random_()) / 10) * 10.0
+            when = _ts(day_str, secs)
+            ext = customers.ext_ids[buyer]
+            chunk.append((pk, f'S-{mw}-{pk:04d}', ext, bag, units, total, paid, total - paid, when))
+            if paid > 0:
+                kind = 'online' if random_() < online_share else 'cash'
+                txns.append((kind, paid, 'sale', pk, f'Sale payment by Customer {ext}', when))
+            if len(chunk) >= CHUNK:
+                yield chunk, txns
+                chunk, txns = [], []
+    if chunk:
+        yield chunk, txns
+
+
+def gen_purchases(rng, n, cal, supplier_ids):
+    bag_cum = list(accumulate(BAG_MIX))
+    # a handful of suppliers carry most of the volume
+    supplier_cum = list(accumulate(1.0 / (i + 1) for i in range(len(supplier_ids))))
+    counts = _spread(n, cal.volume(RESTOCK_WEEKDAY))
+    pk = 0
+    chunk = []
+    for d, k in enumerate(counts):
+        if not k:
+            continue
+        day_str, mw = cal.day_strs[d], cal.month_weeks[d]
+        suppliers = rng.choices(supplier_ids, cum_weights=supplier_cum, k=k)
+        bags = rng.choices(BAG_SIZES, cum_weights=bag_cum, k=k)
+        times = sorted(rng.randrange(OPEN_SECONDS, CLOSE_SECONDS) for _ in range(k))
+        for supplier, bag, secs in zip(suppliers, bags, times):
+            pk += 1
+            units = 10 * rng.randint(1, int(60 / MEAN_UNITS[bag]))
+            price = round(cal.price(bag, d) * COST_RATIO, 1)
+            chunk.append((pk, f'P-{mw}-{pk:04d}', supplier, bag, units, price, units * price, _ts(day_str, secs)))
+            if len(chunk) >= CHUNK:
+                yield chunk,
+                chunk = []
+    if chunk:
+        yield chunk,
+
+
+def _chunked(rows):
+    for i in range(0, len(rows), CHUNK):
+        yield rows[i:i + CHUNK],
+
+
+# -- main ----------------------------------------------------------------
+def generate(path, seed, sizes, end, years, log=print):
+    rng = random.Random(seed)
+    cal = Calendar(end, years)
+    started = time.perf_counter()
+
+    def step(label, rows=0):
+        log(f'{label:<28} {rows:>10,} rows  {time.perf_counter() - started:7.1f}s')
+
+    conn, index_sql = create_schema(path)
+    step('schema')
+
+    users, = load(conn, [('users', ('id', 'uid', 'phone', 'password', 'role', 'created_at'))],
+                  _chunked(gen_users(sizes['users'], cal)))
+    step('users', users)
+    customers = Customers(rng, sizes['customers'], cal)
+    n, = load(conn, [('customers', ('id', 'customer_id', 'uid', 'name', 'phone', 'address', 'created_at'))],
+              _chunked(customers.rows))
+    step('customers', n)
+    supplier_rows, supplier_ids = gen_suppliers(rng, sizes['suppliers'], cal)
+    n, = load(conn, [('suppliers', ('id', 'supplier_id', 'name', 'phone', 'address', 'created_at'))],
+              _chunked(supplier_rows))
+    step('suppliers', n)
+
+    sales, txns = load(conn, [
+        ('sales', ('id', 'sale_id', 'customer_id', 'bag_size', 'units', 'total_amount',
+                   'paid_amount', 'outstanding', 'date')),
+        ('transactions', ('type', 'amount', 'related_type', 'related_id', 'note', 'date')),
+    ], gen_sales(rng, sizes['sales'], cal, customers))
+    step('sales', sales)
+    step('transactions', txns)
+    n, = load(conn, [('purchases', ('id', 'purchase_id', 'supplier_id', 'bag_size', 'units',
+                                    'price_per_unit', 'total_amount', 'date'))],
+              gen_purchases(rng, sizes['purchases'], cal, supplier_ids))
+    step('purchases', n)
+
+    # the app's sequences continue after the generated numbers
+    conn.executemany('INSERT INTO id_sequences (name, next_value) VALUES (?, ?)', [
+        ('sale', sizes['sales'] + 1), ('purchase', sizes['purchases'] + 1),
+        ('customer', sizes['customers'] + 1), ('supplier', sizes['suppliers'] + 1),
+    ])
+
+    conn.execute('BEGIN')
+    for sql in index_sql:
+        conn.execute(sql)
+    conn.execute('COMMIT')
+    step('indexes', len(index_sql))
+
+    # triggers, FTS, balances, rollups and row counts, as on an upgraded DB
+    apply_pending(conn, 0)
+    # sampled statistics; a full ANALYZE would re-read every index
+    conn.execute('PRAGMA analysis_limit = 1000')
+    conn.execute('ANALYZE')
+    step('derived tables')
+    conn.close()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a large deterministic synthetic DB')
+    parser.add_argument('--out', required=True, help='path of the new SQLite DB')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--customers', type=int, default=50000)
+    parser.add_argument('--suppliers', type=int, default=400)
+    parser.add_argument('--sales', type=int, default=5000000)
+    parser.add_argument('--purchases', type=int, help='default: sales / 25')
+    parser.add_argument('--years', type=float, default=3.0, help='length of the history')
+    parser.add_argument('--end', default='2025-11-30', help='last day of the history (YYYY-MM-DD)')
+    parser.add_argument('--force', action='store_true', help='overwrite --out if it exists')
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.out)
+    if os.path.exists(path):
+        if not args.force:
+            parser.error(f'{path} already exists (use --force to overwrite)')
+        for suffix in ('', '-journal', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    sizes = {
+        'users': max(1, args.users),
+        'customers': max(1, args.customers),
+        'suppliers': max(1, args.suppliers),
+        'sales': max(0, args.sales),
+        'purchases': max(0, args.purchases if args.purchases is not None else args.sales // 25),
+    }
+    seconds = generate(path, args.seed, sizes, date.fromisoformat(args.end), args.years)
+    print(f'Wrote {path} in {seconds:.1f}s')
+    print(f'Users log in with password {USER_PASSWORD!r}; set DATABASE_URL=sqlite:///{path} to use it')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
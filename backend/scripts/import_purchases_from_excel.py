@@ -1,13 +1,26 @@
 """Import purchases from an Excel file into data/grocerybag.db
 
 Usage: run inside backend venv or via the workspace Python.
-Configure INPUT_PATH below or pass as an argument.
+
+    python backend/scripts/import_purchases_from_excel.py ledger.xlsx [--db path] [--batch-size N] [--restart]
+
+The sheet is streamed in openpyxl read-only mode (constant memory), supplier
+names are resolved from an in-memory cache loaded with one query, and rows
+are written with executemany in chunks of --batch-size, each chunk in its own
+transaction. The last imported sheet row is recorded in the DB's
+`import_checkpoints` table in the same transaction as each chunk, so an
+interrupted import picks up exactly where it stopped when re-run, without
+re-inserting a committed chunk (use --restart to ignore the checkpoint).
+
+Required columns: Date, Supplier, BagSizeKg, Units, UnitPrice.
+Optional: InvoicePhotoPath.
 """
+import argparse
 import os
 import sqlite3
 import sys
+import time
 from datetime import datetime
-from random import randint
 
 try:
     import openpyxl
@@ -17,76 +30,246 @@ except Exception:
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 DATA_DB = os.path.abspath(os.path.join(ROOT, '..', 'data', 'grocerybag.db'))
+sys.path.insert(0, ROOT)
+
+from id_blocks import BLOCK_SIZE, reserve_block  # noqa: E402
+from pagination import db_datetime  # noqa: E402
+
+NEEDED = ['Date', 'Supplier', 'BagSizeKg', 'Units', 'UnitPrice']
+DEFAULT_BATCH = 5000
+PROGRESS_EVERY = 50000
+IMPORTED_BY = 'AD-MAD11-4829-11'
+
+
+def ensure_checkpoint_table(conn):
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS import_checkpoints (source VARCHAR(500) NOT NULL PRIMARY KEY, '
+        'size INTEGER NOT NULL, mtime INTEGER NOT NULL, row INTEGER NOT NULL, imported INTEGER NOT NULL, '
+        'updated_at DATETIME)'
+    )
+    conn.commit()
+
+
+def load_checkpoint(cur, path):
+    """Last committed sheet row for this exact file, or 0."""
+    st = os.stat(path)
+    cur.execute('SELECT size, mtime, row FROM import_checkpoints WHERE source = ?', (os.path.abspath(path),))
+    cp = cur.fetchone()
+    if cp and cp[0] == st.st_size and cp[1] == int(st.st_mtime):
+        return cp[2]
+    return 0
+
+
+def save_checkpoint(cur, path, row, imported):
+    # no commit: it goes out with the chunk it describes
+    st = os.stat(path)
+    cur.execute(
+        'INSERT INTO import_checkpoints (source, size, mtime, row, imported, updated_at) VALUES (?,?,?,?,?,?) '
+        'ON CONFLICT(source) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, row = excluded.row, '
+        'imported = excluded.imported, updated_at = excluded.updated_at',
+        (os.path.abspath(path), st.st_size, int(st.st_mtime), row, imported, db_datetime(datetime.utcnow())),
+    )
+
+
+def table_columns(cur, table):
+    cur.execute(f"PRAGMA table_info('{table}')")
+    return {r[1] for r in cur.fetchall()}
+
+
+class SupplierCache:
+    """name -> supplier_id, loaded once; unseen names are created on demand."""
 
-def ensure_supplier(cur, supplier_name):
-    cur.execute('SELECT supplier_id FROM suppliers WHERE name = ?', (supplier_name,))
-    r = cur.fetchone()
-    if r:
-        return r[0]
-    # create supplier
-    supplier_id = f"SUP-IMP-{randint(1000,9999)}"
-    now = datetime.utcnow().isoformat()
-    cur.execute('INSERT INTO suppliers (supplier_id, name, phone, created_at) VALUES (?,?,?,?)', (supplier_id, supplier_name, '', now))
-    return supplier_id
-
-def import_excel(path):
+    def __init__(self, conn, cur):
+        self.conn = conn
+        self.cur = cur
+        cur.execute('SELECT name, supplier_id FROM suppliers WHERE name IS NOT NULL')
+        self.by_name = {}
+        for name, supplier_id in cur.fetchall():
+            self.by_name.setdefault(name, supplier_id)
+        # numbers for new supplier ids, reserved from the app's 'supplier'
+        # sequence a block at a time (see id_blocks.py)
+        cur.execute('CREATE TABLE IF NOT EXISTS id_sequences (name VARCHAR(30) NOT NULL PRIMARY KEY, next_value INTEGER NOT NULL)')
+        self.block = [0, 0]
+        self.created = 0
+
+    def _next_number(self):
+        if self.block[0] >= self.block[1]:
+            if not self.conn.in_transaction:
+                self.cur.execute('BEGIN IMMEDIATE')
+            start = reserve_block(self.cur, 'supplier', BLOCK_SIZE)
+            self.block = [start, start + BLOCK_SIZE]
+        n = self.block[0]
+        self.block[0] += 1
+        return n
+
+    def get(self, supplier_name):
+        supplier_id = self.by_name.get(supplier_name)
+        if supplier_id:
+            return supplier_id
+        # create supplier
+        supplier_id = f"SUP-IMP-{self._next_number():04d}"
+        now = db_datetime(datetime.utcnow())
+        self.cur.execute('INSERT INTO suppliers (supplier_id, name, phone, created_at) VALUES (?,?,?,?)', (supplier_id, supplier_name, '', now))
+        self.by_name[supplier_name] = supplier_id
+        self.created += 1
+        return supplier_id
+
+
+def parse_row(row, col):
+    # read-only mode drops trailing empty cells, so rows can be short
+    def cell(name):
+        i = col[name]
+        return row[i] if i < len(row) else None
+
+    supplier = str(cell('Supplier')).strip()
+    bagkg = int(cell('BagSizeKg'))
+    units = int(cell('Units'))
+    unitprice = float(cell('UnitPrice'))
+    invoice = None
+    if 'InvoicePhotoPath' in col:
+        invoice = cell('InvoicePhotoPath') or None
+    if cell('Date') is None:
+        raise ValueError('missing Date')
+    # the ORM's own format, or keyset pages over equal timestamps loop
+    return db_datetime(cell('Date')), supplier, bagkg, units, unitprice, invoice
+
+
+def flush_batch(conn, cur, batch, purchase_cols, has_items):
+    """Write one chunk of parsed rows; the caller commits."""
+    # take the write lock before reading MAX(id) so the ids we hand out can't
+    # race the app (a pending supplier insert already holds it)
+    if not conn.in_transaction:
+        cur.execute('BEGIN IMMEDIATE')
+    cur.execute('SELECT COALESCE(MAX(id), 0) FROM purchases')
+    next_id = cur.fetchone()[0] + 1
+    now = db_datetime(datetime.utcnow())
+    purchases, items = [], []
+    for date_str, supplier_id, bagkg, units, unitprice, invoice in batch:
+        pid = next_id
+        next_id += 1
+        total = units * unitprice
+        rec = {
+            'id': pid,
+            'purchase_id': f"IMP-{pid:06d}",
+            'date': date_str,
+            'supplier_id': supplier_id,
+            'total_amount': total,
+            # model columns
+            'bag_size': f"{bagkg}kg",
+            'units': units,
+            'price_per_unit': unitprice,
+            'invoice_image': invoice,
+            # legacy columns (only written when the DB still has them)
+            'payment_mode': 'cash',
+            'invoice_photo': invoice,
+            'created_by_uid': IMPORTED_BY,
+            'created_at': now,
+        }
+        purchases.append(tuple(rec[c] for c in purchase_cols))
+        if has_items:
+            items.append((pid, bagkg, units, unitprice, total))
+    marks = ','.join('?' * len(purchase_cols))
+    cur.executemany(f"INSERT INTO purchases ({', '.join(purchase_cols)}) VALUES ({marks})", purchases)
+    if has_items:
+        cur.executemany('INSERT INTO purchase_items (purchase_id, bag_size_kg, units, unit_price, line_total) VALUES (?,?,?,?,?)', items)
+
+
+def refresh_rollups(conn):
+    # imported rows bypass the API, so re-derive the report rollups once at the end
+    try:
+        from rollups import rebuild_rollups
+        rebuild_rollups(conn)
+        conn.commit()
+    except Exception as ex:
+        print('Skipped rollup refresh:', ex)
+
+
+def import_excel(path, db_path=DATA_DB, batch_size=DEFAULT_BATCH, restart=False):
     if not os.path.exists(path):
         print('Excel file not found:', path)
         return
-    wb = openpyxl.load_workbook(path)
-    ws = wb.active
-    rows = list(ws.iter_rows(values_only=True))
-    if not rows:
-        print('No rows found in Excel')
-        return
-    headers = [str(h).strip() for h in rows[0]]
-    # required headers mapping
-    needed = ['Date','Supplier','BagSizeKg','Units','UnitPrice']
-    for n in needed:
-        if n not in headers:
-            print('Missing column in Excel:', n)
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            print('No rows found in Excel')
             return
+        headers = [str(h).strip() if h is not None else '' for h in header]
+        # required headers mapping
+        for n in NEEDED:
+            if n not in headers:
+                print('Missing column in Excel:', n)
+                return
+        col = {h: headers.index(h) for h in headers if h}
 
-    col = {h: headers.index(h) for h in headers}
+        conn = sqlite3.connect(db_path)
+        cur = conn.cursor()
+        ensure_checkpoint_table(conn)
+        start_row = 0 if restart else load_checkpoint(cur, path)
+        if start_row:
+            print(f'Resuming after sheet row {start_row}')
+        available = table_columns(cur, 'purchases')
+        wanted = ['id', 'purchase_id', 'date', 'supplier_id', 'total_amount', 'bag_size', 'units',
+                  'price_per_unit', 'invoice_image', 'payment_mode', 'invoice_photo', 'created_by_uid', 'created_at']
+        purchase_cols = [c for c in wanted if c in available]
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='purchase_items'")
+        has_items = cur.fetchone() is not None
+        suppliers = SupplierCache(conn, cur)
 
-    conn = sqlite3.connect(DATA_DB)
-    cur = conn.cursor()
-    now = datetime.utcnow().isoformat()
-    imported = 0
-    for row in rows[1:]:
+        started = time.time()
+        imported = skipped = 0
+        batch = []
+        row_no = 1  # header is sheet row 1
+        last_row = start_row
         try:
-            date = row[col['Date']]
-            supplier = str(row[col['Supplier']]).strip()
-            bagkg = int(row[col['BagSizeKg']])
-            units = int(row[col['Units']])
-            unitprice = float(row[col['UnitPrice']])
-            invoice = None
-            if 'InvoicePhotoPath' in col:
-                invoice = row[col['InvoicePhotoPath']] or None
-        except Exception as e:
-            print('Skipping row due to parse error:', e)
-            continue
-
-        supplier_id = ensure_supplier(cur, supplier)
-        total = units * unitprice
-        purchase_id = f"IMP-{randint(10000,99999)}"
-        date_str = date.isoformat() if hasattr(date,'isoformat') else str(date)
-        cur.execute('INSERT INTO purchases (purchase_id, date, supplier_id, total_amount, payment_mode, invoice_photo, created_by_uid, created_at) VALUES (?,?,?,?,?,?,?,?)',
-                    (purchase_id, date_str, supplier_id, total, 'cash', invoice, 'AD-MAD11-4829-11', now))
-        p_rowid = cur.lastrowid
-        cur.execute('INSERT INTO purchase_items (purchase_id, bag_size_kg, units, unit_price, line_total) VALUES (?,?,?,?,?)',
-                    (p_rowid, bagkg, units, unitprice, units*unitprice))
-        imported += 1
+            for row in rows:
+                row_no += 1
+                if row_no <= start_row:
+                    continue
+                if not row or all(v is None for v in row):
+                    continue
+                try:
+                    date_str, supplier, bagkg, units, unitprice, invoice = parse_row(row, col)
+                except Exception as e:
+                    print(f'Skipping row {row_no} due to parse error:', e)
+                    skipped += 1
+                    continue
+                batch.append((date_str, suppliers.get(supplier), bagkg, units, unitprice, invoice))
+                if len(batch) >= batch_size:
+                    flush_batch(conn, cur, batch, purchase_cols, has_items)
+                    imported += len(batch)
+                    batch = []
+                    last_row = row_no
+                    save_checkpoint(cur, path, last_row, imported)
+                    conn.commit()
+                    if imported % PROGRESS_EVERY < batch_size:
+                        rate = imported / max(time.time() - started, 1e-6)
+                        print(f'  {imported} rows imported ({rate:,.0f} rows/s)')
+            if batch:
+                flush_batch(conn, cur, batch, purchase_cols, has_items)
+                imported += len(batch)
+            last_row = row_no
+            save_checkpoint(cur, path, last_row, imported)
+            conn.commit()
+            refresh_rollups(conn)
+        finally:
+            conn.close()
+    finally:
+        wb.close()
 
-    conn.commit()
-    conn.close()
-    print(f'Imported {imported} rows from Excel into', DATA_DB)
+    elapsed = time.time() - started
+    print(f'Imported {imported} rows ({skipped} skipped, {suppliers.created} new suppliers) '
+          f'from Excel into {db_path} in {elapsed:.1f}s')
 
 
 if __name__ == '__main__':
-    if len(sys.argv) > 1:
-        path = sys.argv[1]
-    else:
-        # default path (user-provided)
-        path = r'C:\Users\USER\OneDrive\Desktop\GNIT\Weekly Routine for 2025-26 Odd Sem  B.Tech. 1st Year - Copy.xlsx'
-    import_excel(path)
+    parser = argparse.ArgumentParser(description='Import purchases from an Excel ledger')
+    # default path (user-provided)
+    parser.add_argument('path', nargs='?', default=r'C:\Users\USER\OneDrive\Desktop\GNIT\Weekly Routine for 2025-26 Odd Sem  B.Tech. 1st Year - Copy.xlsx')
+    parser.add_argument('--db', default=DATA_DB, help='SQLite file to import into')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH, help='rows per executemany/commit')
+    parser.add_argument('--restart', action='store_true', help='ignore any saved checkpoint')
+    args = parser.parse_args()
+    import_excel(args.path, args.db, max(1, args.batch_size), args.restart)
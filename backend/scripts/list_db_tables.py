@@ -2,9 +2,12 @@ import os
 import sqlite3
 import re
 import json
+import sys
 
 # Locate the canonical DB file used by the app (prefer project `data/`)
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(project_root, 'backend'))
+from row_counts import read_counts
 data_dir = os.path.join(project_root, 'data')
 db_file = os.path.join(data_dir, 'grocerybag.db')
 if not os.path.exists(db_file):
@@ -13,7 +16,7 @@ if not os.path.exists(db_file):
     if os.path.exists(legacy):
         db_file = legacy
 
-report = {'db_file': db_file, 'db_tables': [], 'model_tables': [], 'extra_tables': []}
+report = {'db_file': db_file, 'db_tables': [], 'row_counts': {}, 'model_tables': [], 'extra_tables': []}
 
 if not os.path.exists(db_file):
     print('Database file not found at', db_file)
@@ -27,6 +30,12 @@ rows = cur.fetchall()
 db_tables = [r[0] for r in rows]
 report['db_tables'] = db_tables
 
+# row counts from the trigger-maintained table_row_counts (no table scans);
+# --verify also counts each table for real and records any drift
+report['row_counts'], mismatches = read_counts(conn, verify='--verify' in sys.argv[1:])
+if mismatches:
+    report['count_mismatches'] = mismatches
+
 # parse models.py for __tablename__ assignments (simple regex)
 models_path = os.path.join(project_root, 'backend', 'models.py')
 if os.path.exists(models_path):
@@ -45,7 +54,12 @@ report['extra_tables'] = extra
 print('DB file:', report['db_file'])
 print('\nTables in DB ({}):'.format(len(report['db_tables'])))
 for t in report['db_tables']:
-    print(' -', t)
+    if t in report['row_counts']:
+        print(' -', t, f"({report['row_counts'][t]} rows)")
+    else:
+        print(' -', t)
+for t, m in report.get('count_mismatches', {}).items():
+    print(f" ! {t}: stored {m['stored']}, actual {m['actual']}")
 
 print('\nTables mapped in models.py ({}):'.format(len(report['model_tables'])))
 for t in report['model_tables']:
@@ -0,0 +1,34 @@
+"""Re-derive customer_balances from the sales history in data/grocerybag.db
+
+Use after bulk imports or manual edits to sales (e.g. in DB Browser).
+
+Run: python backend/scripts/rebuild_customer_balances.py [path/to/db]
+"""
+import os
+import sqlite3
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+DB_PATH = os.path.abspath(os.path.join(ROOT, '..', 'data', 'grocerybag.db'))
+
+from ledger import rebuild_balances  # noqa: E402
+
+
+def main(path):
+    if not os.path.exists(path):
+        print('Database file not found at', path)
+        return 1
+    conn = sqlite3.connect(path)
+    try:
+        rebuild_balances(conn)
+        conn.commit()
+        n, owed = conn.execute('SELECT COUNT(*), COALESCE(SUM(outstanding), 0) FROM customer_balances').fetchone()
+        print(f'Rebuilt {n} customer balances ({owed:.2f} outstanding) in', path)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1] if len(sys.argv) > 1 else DB_PATH))
@@ -0,0 +1,99 @@
+# backend/search.py
+"""FTS5 typeahead search over customers and suppliers.
+
+`customers_fts` / `suppliers_fts` are external-content FTS5 tables over name,
+phone and address (the rows themselves stay in the base tables), kept in
+sync by triggers so raw edits are indexed too. Queries are prefix matches on
+every typed token, ranked by bm25 with name weighted above phone and address.
+If the SQLite build lacks FTS5 the endpoints fall back to a LIKE prefix scan.
+"""
+import re
+import sqlite3
+from sqlalchemy import text
+
+FTS_TABLES = {
+    # entity -> (base table, external id column)
+    'customers': ('customers', 'customer_id'),
+    'suppliers': ('suppliers', 'supplier_id'),
+}
+FTS_COLUMNS = ('name', 'phone', 'address')
+# bm25 weights, in FTS_COLUMNS order
+WEIGHTS = (10.0, 5.0, 1.0)
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def _install_one(cur, table):
+    fts = f'{table}_fts'
+    cols = ', '.join(FTS_COLUMNS)
+    new_vals = ', '.join(f'new.{c}' for c in FTS_COLUMNS)
+    old_vals = ', '.join(f'old.{c}' for c in FTS_COLUMNS)
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (fts,))
+    exists = cur.fetchone() is not None
+    cur.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_vals}); END"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); END"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); "
+        f"INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_vals}); END"
+    )
+    if not exists:
+        # index the rows that predate the table
+        cur.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def install_fts(cur):
+    """Create the FTS tables and sync triggers; skipped when FTS5 is missing."""
+    for table, _ in FTS_TABLES.values():
+        cur.execute("SAVEPOINT fts_install")
+        try:
+            _install_one(cur, table)
+            cur.execute("RELEASE fts_install")
+        except sqlite3.OperationalError as ex:
+            cur.execute("ROLLBACK TO fts_install")
+            cur.execute("RELEASE fts_install")
+            print(f'FTS5 search unavailable for {table}:', ex)
+
+
+def match_expression(q):
+    """Turn user input into an FTS5 query: every token quoted, prefix-matched."""
+    tokens = _TOKEN.findall(q or '')
+    return ' '.join(f'"{t}"*' for t in tokens)
+
+
+def search(session, entity, q, limit=20):
+    table, ext_col = FTS_TABLES[entity]
+    fts = f'{table}_fts'
+    expr = match_expression(q)
+    if not expr:
+        return []
+    select_cols = f"t.id, t.{ext_col}, t.name, t.phone, t.address"
+    has_fts = session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:n"), {'n': fts}
+    ).first() is not None
+    if has_fts:
+        sql = (
+            f"SELECT {select_cols}, bm25({fts}, {', '.join(str(w) for w in WEIGHTS)}) AS score "
+            f"FROM {fts} JOIN {table} t ON t.id = {fts}.rowid "
+            f"WHERE {fts} MATCH :expr ORDER BY score LIMIT :limit"
+        )
+        rows = session.execute(text(sql), {'expr': expr, 'limit': limit}).mappings().all()
+    else:
+        like = (q or '').strip() + '%'
+        sql = (
+            f"SELECT {select_cols}, NULL AS score FROM {table} t "
+            f"WHERE t.name LIKE :like OR t.phone LIKE :like ORDER BY t.name LIMIT :limit"
+        )
+        rows = session.execute(text(sql), {'like': like, 'limit': limit}).mappings().all()
+    return [dict(r) for r in rows]
@@ -0,0 +1,105 @@
+# backend/slow_query.py
+"""Slow-query log.
+
+Every statement that takes longer than SLOW_QUERY_MS (ORM or the raw sqlite3
+paths, via metrics.query_observers) is written as one JSON object per line
+to SLOW_QUERY_LOG, a size-rotated file: timestamp, duration, endpoint,
+driver path, the SQL, its parameters and SQLite's EXPLAIN QUERY PLAN for
+it, so a full table scan ("SCAN customers") stands out without having to
+reproduce the request. Parameters of statements touching a password column
+are redacted. SLOW_QUERY_MS=0 turns the log off.
+"""
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from metrics import query_observers
+
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+MAX_PARAM_CHARS = 200
+MAX_PARAM_ROWS = 5
+
+logger = logging.getLogger('grocerybag.slow_query')
+logger.propagate = False
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (int, float, bool)):
+        return value
+    if isinstance(value, bytes):
+        return f'<{len(value)} bytes>'
+    text = str(value)
+    return text if len(text) <= MAX_PARAM_CHARS else text[:MAX_PARAM_CHARS] + '...'
+
+
+def _params(statement, params, many):
+    if 'password' in statement.lower():
+        return '<redacted>'
+    if many:
+        rows = list(params)
+        shown = [_params(statement, p, False) for p in rows[:MAX_PARAM_ROWS]]
+        return {'rows': len(rows), 'first': shown}
+    if isinstance(params, dict):
+        return {k: _jsonable(v) for k, v in params.items()}
+    return [_jsonable(v) for v in (params or ())]
+
+
+def explain(dbapi_conn, statement, params):
+    """EXPLAIN QUERY PLAN rows as [id, parent, detail], or None."""
+    if not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    try:
+        # a plain cursor, so the EXPLAIN itself isn't timed or logged
+        cur = sqlite3.Cursor(dbapi_conn)
+        try:
+            cur.execute('EXPLAIN QUERY PLAN ' + statement, params or ())
+            return [[r[0], r[1], r[3]] for r in cur.fetchall()]
+        finally:
+            cur.close()
+    except Exception as ex:
+        return f'unavailable: {ex}'
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms):
+        self.threshold = threshold_ms / 1000.0
+
+    def __call__(self, dbapi_conn, statement, params, seconds, source, endpoint):
+        if seconds < self.threshold:
+            return
+        many = isinstance(params, list) and params and isinstance(params[0], (list, tuple, dict))
+        plan_params = params[0] if many else params
+        logger.warning(json.dumps({
+            'ts': datetime.utcnow().isoformat(timespec='milliseconds'),
+            'duration_ms': round(seconds * 1000, 2),
+            'endpoint': endpoint,
+            'source': source,
+            'sql': ' '.join(statement.split()),
+            'params': _params(statement, params, many),
+            'plan': explain(dbapi_conn, statement, plan_params),
+        }, default=str))
+
+
+def install_slow_query_log(app):
+    """Start logging statements slower than app.config['SLOW_QUERY_MS']."""
+    threshold = float(app.config.get('SLOW_QUERY_MS') or 0)
+    if threshold <= 0:
+        return None
+    path = app.config.get('SLOW_QUERY_LOG') or os.path.join(app.instance_path, 'slow_queries.jsonl')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=int(app.config.get('SLOW_QUERY_LOG_MAX_BYTES', 5 * 1024 * 1024)),
+        backupCount=int(app.config.get('SLOW_QUERY_LOG_BACKUPS', 5)),
+        encoding='utf-8',
+        delay=True,
+    )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.handlers[:] = [handler]
+    logger.setLevel(logging.WARNING)
+    observer = SlowQueryLog(threshold)
+    query_observers.append(observer)
+    return observer
@@ -0,0 +1,23 @@
+"""Conditional GET on the list endpoints: 304 only for the same URL and data."""
+
+
+def test_etag_per_url_and_version(client):
+    client.post('/customers/', json={'name': 'Etag One', 'phone': '7300000001'})
+    client.post('/customers/', json={'name': 'Etag Two', 'phone': '7300000002'})
+
+    first = client.get('/customers/?limit=1')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    again = client.get('/customers/?limit=1', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+
+    # another page size is another representation
+    other = client.get('/customers/?limit=2', headers={'If-None-Match': etag})
+    assert other.status_code == 200
+    assert other.headers['ETag'] != etag
+
+    client.post('/customers/', json={'name': 'Etag Three', 'phone': '7300000003'})
+    changed = client.get('/customers/?limit=1', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
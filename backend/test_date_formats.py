@@ -0,0 +1,88 @@
+"""Keyset pages and from/to filters over rows stored in mixed date formats.
+
+Builds a throwaway DB, writes purchases with raw SQL the way older tools did
+("T" separator, no microseconds, bare dates), upgrades it with schema.py and
+checks the list queries see every row exactly once (no server needed).
+"""
+import os
+import sqlite3
+import tempfile
+
+from flask import Flask
+
+from extensions import db
+from models import Purchase
+from pagination import apply_date_range, keyset_page
+from schema import ensure_schema
+
+MIXED_DATES = [
+    '2025-10-01T10:00:00',
+    '2025-10-01 10:00:00',
+    '2025-10-01 10:00:00.000000',
+    '2025-10-01T10:00:00.5',
+    '2025-10-02',
+    '2025-10-02 00:00:00.000000',
+    '2025-10-03T09:30:00',
+]
+
+
+def make_app(db_file):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_file}'
+    db.init_app(app)
+    return app
+
+
+def seed_mixed(app, db_file):
+    with app.app_context():
+        ensure_schema(db_file, create_all=db.create_all)
+    conn = sqlite3.connect(db_file)
+    conn.execute("INSERT INTO suppliers (supplier_id, name) VALUES ('SUP-1', 'Supplier 1')")
+    conn.executemany(
+        "INSERT INTO purchases (id, purchase_id, supplier_id, bag_size, units, price_per_unit, total_amount, date) "
+        "VALUES (?, ?, 'SUP-1', '10kg', 1, 50, 50, ?)",
+        [(i + 1, f'P-{i + 1}', d) for i, d in enumerate(MIXED_DATES)],
+    )
+    # pretend the DB predates the date rewrite (schema 11) so the upgrade runs it
+    conn.execute('PRAGMA user_version = 10')
+    conn.commit()
+    conn.close()
+    ensure_schema(db_file)
+
+
+def page_ids(query, limit=2):
+    ids, cursor = [], None
+    for _ in range(len(MIXED_DATES) + 1):
+        rows, cursor = keyset_page(query, Purchase.date, Purchase.id, cursor, limit)
+        ids.extend(r.id for r in rows)
+        if not cursor:
+            return ids
+    raise AssertionError(f'cursor did not terminate: {ids}')
+
+
+def test_mixed_formats():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'mixed.db')
+        app = make_app(db_file)
+        seed_mixed(app, db_file)
+
+        conn = sqlite3.connect(db_file)
+        stored = [r[0] for r in conn.execute('SELECT date FROM purchases ORDER BY id')]
+        conn.close()
+        assert all(len(d) == 26 and d[10] == ' ' for d in stored), stored
+
+        with app.app_context():
+            ids = page_ids(Purchase.query)
+            assert sorted(ids) == list(range(1, len(MIXED_DATES) + 1)), ids
+            assert len(ids) == len(set(ids)), ids
+
+            day = apply_date_range(Purchase.query, Purchase.date, '2025-10-01', '2025-10-01')
+            assert sorted(p.id for p in day.all()) == [1, 2, 3, 4]
+            since = apply_date_range(Purchase.query, Purchase.date, '2025-10-02', None)
+            assert sorted(p.id for p in since.all()) == [5, 6, 7]
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    test_mixed_formats()
+    print('ok')
@@ -0,0 +1,57 @@
+"""Block-allocated external id numbers: legacy seeding and cross-process uniqueness."""
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+
+from id_blocks import reserve_block
+
+SCHEMA = [
+    'CREATE TABLE id_sequences (name VARCHAR(30) NOT NULL PRIMARY KEY, next_value INTEGER NOT NULL)',
+    'CREATE TABLE sales (id INTEGER PRIMARY KEY, sale_id VARCHAR(50))',
+    'CREATE TABLE suppliers (id INTEGER PRIMARY KEY, supplier_id VARCHAR(50))',
+]
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    for stmt in SCHEMA:
+        conn.execute(stmt)
+    conn.commit()
+    return conn
+
+
+def test_seeded_past_legacy_ids():
+    conn = make_db(':memory:')
+    conn.executemany('INSERT INTO sales (sale_id) VALUES (?)', [('S-114-1780',), ('S-114-0042',), ('PUR-X',)])
+    conn.executemany('INSERT INTO suppliers (supplier_id) VALUES (?)',
+                     [('SU-251124-TestXYZ8753-0683',), ('SUP-IMP-0009',), ('SUP-MAR11-4829-01',)])
+    cur = conn.cursor()
+    assert reserve_block(cur, 'sale', 50) == 1781
+    assert reserve_block(cur, 'sale', 50) == 1831
+    assert reserve_block(cur, 'supplier', 50) == 8754
+    conn.close()
+
+
+def _reserve_many(args):
+    path, rounds = args
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    starts = []
+    for _ in range(rounds):
+        cur = conn.cursor()
+        cur.execute('BEGIN IMMEDIATE')
+        starts.append(reserve_block(cur, 'sale', 10))
+        cur.execute('COMMIT')
+    conn.close()
+    return starts
+
+
+def test_blocks_unique_across_processes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ids.db')
+        make_db(path).close()
+        with multiprocessing.get_context('spawn').Pool(4) as pool:
+            starts = [s for chunk in pool.map(_reserve_many, [(path, 25)] * 4) for s in chunk]
+        numbers = [n for s in starts for n in range(s, s + 10)]
+        assert len(numbers) == len(set(numbers)) == 4 * 25 * 10
+        assert min(numbers) == 1
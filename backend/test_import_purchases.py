@@ -0,0 +1,105 @@
+"""Import an Excel ledger into a throwaway DB (no server needed).
+
+The importer writes straight to SQLite, so its dates must match the ORM's
+format or the keyset cursor keeps returning the same rows, and a resumed
+import must not re-insert chunks that were already committed.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime
+
+import openpyxl
+from flask import Flask
+
+from extensions import db
+from models import Purchase
+from pagination import keyset_page
+from schema import ensure_schema
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+import import_purchases_from_excel as importer  # noqa: E402
+
+ROWS = 6
+
+
+def write_ledger(path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(['Date', 'Supplier', 'BagSizeKg', 'Units', 'UnitPrice'])
+    for i in range(ROWS):
+        ws.append([datetime(2025, 10, 1, 10, 0, 0), f'Supplier {i % 2}', 10, i + 1, 50.0])
+    wb.save(path)
+
+
+def make_db(tmp):
+    db_file = os.path.join(tmp, 'import.db')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_file}'
+    db.init_app(app)
+    with app.app_context():
+        ensure_schema(db_file, create_all=db.create_all)
+        db.engine.dispose()
+    return app, db_file
+
+
+def test_import_equal_timestamps():
+    with tempfile.TemporaryDirectory() as tmp:
+        app, db_file = make_db(tmp)
+        xlsx = os.path.join(tmp, 'ledger.xlsx')
+        write_ledger(xlsx)
+        importer.import_excel(xlsx, db_file, batch_size=4)
+
+        with app.app_context():
+            ids, cursor = [], None
+            for _ in range(ROWS + 1):
+                rows, cursor = keyset_page(Purchase.query, Purchase.date, Purchase.id, cursor, 2)
+                ids.extend(r.id for r in rows)
+                if not cursor:
+                    break
+            assert cursor is None, f'cursor did not terminate: {ids}'
+            assert ids == list(range(ROWS, 0, -1)), ids
+            db.engine.dispose()
+
+
+def test_resume_after_crash():
+    with tempfile.TemporaryDirectory() as tmp:
+        _, db_file = make_db(tmp)
+        xlsx = os.path.join(tmp, 'ledger.xlsx')
+        write_ledger(xlsx)
+
+        # die while writing the second chunk; the first one is committed
+        real_flush, calls = importer.flush_batch, []
+
+        def failing_flush(*args):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('simulated crash')
+            real_flush(*args)
+
+        importer.flush_batch = failing_flush
+        try:
+            importer.import_excel(xlsx, db_file, batch_size=2)
+            raise AssertionError('import should have failed')
+        except RuntimeError:
+            pass
+        finally:
+            importer.flush_batch = real_flush
+
+        conn = sqlite3.connect(db_file)
+        assert conn.execute('SELECT COUNT(*) FROM purchases').fetchone()[0] == 2
+        assert conn.execute('SELECT row FROM import_checkpoints').fetchone()[0] == 3
+        conn.close()
+
+        importer.import_excel(xlsx, db_file, batch_size=2)
+        conn = sqlite3.connect(db_file)
+        units = [r[0] for r in conn.execute('SELECT units FROM purchases ORDER BY id')]
+        conn.close()
+        assert units == list(range(1, ROWS + 1)), units
+
+
+if __name__ == '__main__':
+    test_import_equal_timestamps()
+    test_resume_after_crash()
+    print('ok')
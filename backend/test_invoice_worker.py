@@ -0,0 +1,32 @@
+"""Invoice post-processing records its derived files through the group-commit writer."""
+import os
+
+from PIL import Image
+
+from group_commit import get_writer
+from invoice_worker import process_invoice
+from models import Sale
+
+
+def test_processed_invoice_recorded_via_writer(app, client, raw_db, tmp_path, monkeypatch):
+    resp = client.post('/customers/', json={'name': 'Invoice Test', 'phone': '7400000001'})
+    ext = resp.get_json()['customer_id']
+    resp = client.post('/sales/', data={'customer_id': ext, 'bag_size': '5kg', 'units': '1',
+                                        'price_per_unit': '180', 'paid_amount': '180'})
+    sale_pk = resp.get_json()['id']
+
+    monkeypatch.setattr(app, 'root_path', str(tmp_path))
+    os.makedirs(tmp_path / 'static' / 'uploads')
+    Image.new('RGB', (2000, 1000), 'white').save(tmp_path / 'static' / 'uploads' / 'inv.png')
+
+    writer = get_writer(app)
+    units_before = writer.stats()['units'] if writer else None
+    result = process_invoice(app, Sale, sale_pk, '/static/uploads/inv.png')
+    assert result == ('/static/uploads/inv.webp', '/static/uploads/inv_thumb.webp')
+    if writer:
+        assert writer.stats()['units'] == units_before + 1
+
+    row = raw_db.execute('SELECT invoice_optimized, invoice_thumbnail FROM sales WHERE id = ?', (sale_pk,)).fetchone()
+    assert row == result
+    with Image.open(tmp_path / 'static' / 'uploads' / 'inv_thumb.webp') as thumb:
+        assert max(thumb.size) <= 320
@@ -0,0 +1,38 @@
+"""customer_balances maintained by live sale writes matches a fresh rebuild."""
+from ledger import rebuild_balances
+
+
+def balances(conn):
+    rows = conn.execute(
+        'SELECT customer_id, total_sales, total_paid, outstanding, sale_count FROM customer_balances ORDER BY customer_id'
+    ).fetchall()
+    return [(r[0], round(r[1], 2), round(r[2], 2), round(r[3], 2), r[4]) for r in rows]
+
+
+def test_live_writes_match_rebuild(client, raw_db):
+    resp = client.post('/customers/', json={'name': 'Ledger Test', 'phone': '7100000001'})
+    assert resp.status_code == 201, resp.get_json()
+    ext = resp.get_json()['customer_id']
+
+    # legacy rows: outstanding left NULL, or stale after an edit in DB Browser
+    raw_db.executemany(
+        "INSERT INTO sales (sale_id, customer_id, bag_size, units, total_amount, paid_amount, outstanding, date) "
+        "VALUES (?, ?, '10kg', 1, ?, ?, ?, '2025-01-05 10:00:00.000000')",
+        [('S-LEDGER-1', ext, 500.0, 100.0, None), ('S-LEDGER-2', ext, 300.0, 300.0, 120.0)],
+    )
+    rebuild_balances(raw_db)
+    raw_db.commit()
+
+    resp = client.post('/sales/', data={'customer_id': ext, 'bag_size': '10kg', 'units': '2',
+                                        'price_per_unit': '50', 'paid_amount': '40'})
+    assert resp.status_code == 200, resp.get_json()
+    legacy_id = raw_db.execute("SELECT id FROM sales WHERE sale_id = 'S-LEDGER-2'").fetchone()[0]
+    resp = client.put(f'/sales/{legacy_id}', json={'paid_amount': 250})
+    assert resp.status_code == 200, resp.get_json()
+
+    live = balances(raw_db)
+    rebuild_balances(raw_db)
+    raw_db.commit()
+    assert live == balances(raw_db)
+    row = [b for b in live if b[0] == ext][0]
+    assert row == (ext, 900.0, 390.0, 510.0, 3)
@@ -0,0 +1,44 @@
+"""Login OTPs: a code verifies once, even when two requests race for it."""
+import threading
+
+from models import User
+from otp_store import MemoryOTPStore, get_otp_store
+
+
+def _user_id(app, client, phone):
+    resp = client.post('/auth/register', json={'phone': phone, 'password': 'Otp#Pass1', 'role': 'user'})
+    assert resp.status_code == 201, resp.get_json()
+    with app.app_context():
+        return User.query.filter_by(phone=phone).first().id
+
+
+def test_code_is_single_use(app, client):
+    user_id = _user_id(app, client, '7700000001')
+    with app.app_context():
+        code = get_otp_store(app).issue(user_id)
+
+    first = client.post('/auth/verify-otp', json={'phone': '7700000001', 'code': code})
+    assert first.status_code == 200
+    second = client.post('/auth/verify-otp', json={'phone': '7700000001', 'code': code})
+    assert second.status_code == 400
+
+
+def test_concurrent_claims_succeed_once(app, client):
+    user_id = _user_id(app, client, '7700000002')
+    for store in (get_otp_store(app), MemoryOTPStore()):
+        with app.app_context():
+            code = store.issue(user_id)
+        results = []
+        start = threading.Barrier(4)
+
+        def claim():
+            with app.app_context():
+                start.wait()
+                results.append(store.verify(user_id, code))
+
+        threads = [threading.Thread(target=claim) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(results) == [False, False, False, True], store.name
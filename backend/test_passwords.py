@@ -0,0 +1,37 @@
+"""Password pool overload: a hash that can't finish in time is a 503, not a 500."""
+import threading
+
+import pytest
+
+import passwords
+from passwords import HashPool, PasswordPoolBusy
+
+
+def test_timeout_raises_pool_busy():
+    pool = HashPool(workers=1, queue=1, timeout=0.05)
+    release = threading.Event()
+    # occupy the only worker behind the pool's back
+    blocker = pool._executor.submit(release.wait)
+    try:
+        with pytest.raises(PasswordPoolBusy):
+            pool.run(lambda: 'never')
+        assert pool.stats()['timed_out'] == 1
+    finally:
+        release.set()
+        blocker.result()
+    # the cancelled request gave its slot back
+    assert pool.run(lambda: 'ok') == 'ok'
+
+
+def test_login_timeout_is_503(client, monkeypatch):
+    pool = HashPool(workers=1, queue=4, timeout=0.05)
+    release = threading.Event()
+    blocker = pool._executor.submit(release.wait)
+    monkeypatch.setattr(passwords, 'pool', pool)
+    try:
+        resp = client.post('/auth/login', json={'phone': '7200000001', 'password': 'x'})
+        assert resp.status_code == 503
+        assert resp.headers['Retry-After'] == '1'
+    finally:
+        release.set()
+        blocker.result()
@@ -0,0 +1,31 @@
+"""Token-bucket limits on the auth endpoints: 429 with Retry-After once a bucket is empty."""
+import time
+
+from ratelimit import SQLiteBuckets
+
+
+def test_login_phone_limit(client):
+    # default rule: 5 logins per phone per minute
+    body = {'phone': '7800000001', 'password': 'wrong'}
+    for _ in range(5):
+        assert client.post('/auth/login', json=body).status_code == 401
+    resp = client.post('/auth/login', json=body)
+    assert resp.status_code == 429
+    assert 1 <= int(resp.headers['Retry-After']) <= 12
+    # another phone from the same client still gets through
+    assert client.post('/auth/login', json={'phone': '7800000002', 'password': 'wrong'}).status_code == 401
+
+
+def test_sqlite_buckets_shared(tmp_path):
+    # two stores on one file stand in for two gunicorn workers
+    path = str(tmp_path / 'ratelimit.db')
+    a, b = SQLiteBuckets(path), SQLiteBuckets(path)
+    assert a.take('k', 2, 1 / 60) == 0
+    assert b.take('k', 2, 1 / 60) == 0
+    wait = a.take('k', 2, 1 / 60)
+    assert 0 < wait <= 60
+    # refills at the configured rate
+    assert b.take('fast', 1, 50) == 0
+    assert b.take('fast', 1, 50) > 0
+    time.sleep(0.05)
+    assert a.take('fast', 1, 50) == 0
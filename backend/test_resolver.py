@@ -0,0 +1,21 @@
+"""Party references resolve by PK, external id or exact name."""
+from resolver import customer_resolver
+
+
+def test_name_match_is_exact(app, client):
+    resp = client.post('/customers/', json={'name': 'Resolver Ravi', 'phone': '7500000001'})
+    pk, ext = resp.get_json()['id'], resp.get_json()['customer_id']
+
+    with app.app_context():
+        customer_resolver.clear()
+        assert customer_resolver.resolve('Resolver Ravi').id == pk
+        assert customer_resolver.resolve(str(pk)).ext_id == ext
+        assert customer_resolver.resolve(ext).id == pk
+        # no case folding, cached or not
+        assert customer_resolver.resolve('resolver ravi') is None
+        customer_resolver.clear()
+        assert customer_resolver.resolve('RESOLVER RAVI') is None
+
+    resp = client.post('/sales/', data={'customer_id': 'resolver ravi', 'bag_size': '1kg', 'units': '1',
+                                        'price_per_unit': '40', 'paid_amount': '40'})
+    assert resp.status_code == 404
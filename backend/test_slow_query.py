@@ -0,0 +1,39 @@
+"""Slow-query log: statements over the threshold are logged with their query plan."""
+import json
+import logging
+import sqlite3
+
+from slow_query import SlowQueryLog, logger
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(json.loads(record.getMessage()))
+
+
+def test_slow_statement_logged_with_plan():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT, password TEXT)')
+    handler = _Collect()
+    logger.addHandler(handler)
+    try:
+        log = SlowQueryLog(threshold_ms=100)
+        log(conn, 'SELECT * FROM customers WHERE name = ?', ('Ravi',), 0.05, 'orm', 'customers.list_customers')
+        assert handler.records == []
+
+        log(conn, 'SELECT * FROM customers WHERE name = ?', ('Ravi',), 0.25, 'orm', 'customers.list_customers')
+        log(conn, 'UPDATE customers SET password = ? WHERE id = ?', ('secret', 1), 0.25, 'orm', 'auth.login')
+    finally:
+        logger.removeHandler(handler)
+        conn.close()
+
+    slow, secret = handler.records
+    assert slow['duration_ms'] == 250.0
+    assert slow['endpoint'] == 'customers.list_customers'
+    assert slow['params'] == ['Ravi']
+    assert any('SCAN customers' in step[2] for step in slow['plan'])
+    assert secret['params'] == '<redacted>'
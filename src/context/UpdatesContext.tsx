@@ -9,9 +9,13 @@ type UpdatesState = {
   sales: any[];
 };
 
+type UpdatesPayload = Partial<UpdatesState> & {
+  deleted?: Partial<Record<keyof UpdatesState, number[]>>;
+};
+
 type UpdatesContextType = {
   state: UpdatesState;
-  mergeUpdates: (data: Partial<UpdatesState>) => void;
+  mergeUpdates: (data: UpdatesPayload) => void;
 };
 
 const defaultState: UpdatesState = { suppliers: [], customers: [], purchases: [], sales: [] };
@@ -30,19 +34,28 @@ export const UpdatesProvider: React.FC<React.PropsWithChildren<{}>> = ({ childre
     return Array.from(map.values());
   }, []);
 
-  const mergeUpdates = useCallback((data: Partial<UpdatesState>) => {
+  // drop rows the server reported as deleted (tombstones carry the numeric id)
+  const dropDeleted = useCallback((items: any[], ids?: number[]) => {
+    if (!ids?.length) return items;
+    const gone = new Set(ids);
+    return items.filter((i) => !gone.has(i.id));
+  }, []);
+
+  const mergeUpdates = useCallback((data: UpdatesPayload) => {
+    const del = data.deleted || {};
     setState((prev) => ({
-      suppliers: data.suppliers?.length ? mergeUnique(prev.suppliers, data.suppliers, 'supplier_id' in (data.suppliers[0] || {}) ? 'supplier_id' : 'id') : prev.suppliers,
-      customers: data.customers?.length ? mergeUnique(prev.customers, data.customers, 'customer_id' in (data.customers[0] || {}) ? 'customer_id' : 'id') : prev.customers,
-      purchases: data.purchases?.length ? mergeUnique(prev.purchases, data.purchases, 'purchase_id' in (data.purchases[0] || {}) ? 'purchase_id' : 'id') : prev.purchases,
-      sales: data.sales?.length ? mergeUnique(prev.sales, data.sales, 'sale_id' in (data.sales[0] || {}) ? 'sale_id' : 'id') : prev.sales,
+      suppliers: dropDeleted(data.suppliers?.length ? mergeUnique(prev.suppliers, data.suppliers, 'supplier_id' in (data.suppliers[0] || {}) ? 'supplier_id' : 'id') : prev.suppliers, del.suppliers),
+      customers: dropDeleted(data.customers?.length ? mergeUnique(prev.customers, data.customers, 'customer_id' in (data.customers[0] || {}) ? 'customer_id' : 'id') : prev.customers, del.customers),
+      purchases: dropDeleted(data.purchases?.length ? mergeUnique(prev.purchases, data.purchases, 'purchase_id' in (data.purchases[0] || {}) ? 'purchase_id' : 'id') : prev.purchases, del.purchases),
+      sales: dropDeleted(data.sales?.length ? mergeUnique(prev.sales, data.sales, 'sale_id' in (data.sales[0] || {}) ? 'sale_id' : 'id') : prev.sales, del.sales),
     }));
-  }, [mergeUnique]);
+  }, [mergeUnique, dropDeleted]);
 
   // mount polling hook and feed data into mergeUpdates
-  useUpdates((d) => {
+  const onUpdate = useCallback((d: UpdatesPayload) => {
     try { mergeUpdates(d); } catch (e) { console.error('UpdatesProvider merge error', e); }
-  }, 10000);
+  }, [mergeUpdates]);
+  useUpdates(onUpdate, 10000);
 
   return <UpdatesContext.Provider value={{ state, mergeUpdates }}>{children}</UpdatesContext.Provider>;
 };
@@ -6,6 +6,9 @@ type UpdatesPayload = {
   customers: any[];
   purchases: any[];
   sales: any[];
+  // ids removed since the previous cursor, per entity
+  deleted?: Partial<Record<"suppliers" | "customers" | "purchases" | "sales", number[]>>;
+  cursor?: number;
 };
 
 
@@ -13,17 +16,32 @@ export default function useUpdates(
   onUpdate?: (data: UpdatesPayload) => void,
   intervalMs = 10000
 ) {
-  const lastRef = useRef<string>(new Date(0).toISOString());
+  // change_log sequence of the last applied payload; 0 = full snapshot
+  const cursorRef = useRef<number>(0);
+  // latest handler, read at delivery time so a new callback identity on each
+  // render doesn't tear down and reopen the stream
+  const onUpdateRef = useRef(onUpdate);
+  onUpdateRef.current = onUpdate;
 
   useEffect(() => {
     let mounted = true;
     let timer: number | undefined;
+    let source: EventSource | undefined;
+
+    function deliver(data: UpdatesPayload) {
+      const handler = onUpdateRef.current;
+      if (mounted && typeof handler === "function") {
+        try {
+          handler(data);
+        } catch (cbErr) {
+          console.error("useUpdates onUpdate handler error", cbErr);
+        }
+      }
+    }
 
     async function fetchOnce() {
       try {
-        const url = `http://127.0.0.1:5000/updates/recent?since=${encodeURIComponent(
-          lastRef.current
-        )}`;
+        const url = `http://127.0.0.1:5000/updates/recent?cursor=${cursorRef.current}`;
         const res = await fetch(url);
         if (!res.ok) {
           // non-fatal: log and return, next interval will retry
@@ -32,28 +50,52 @@ export default function useUpdates(
         }
         const data = (await res.json()) as UpdatesPayload;
 
-        // update lastRef to now so next poll asks for changes after this time
-        lastRef.current = new Date().toISOString();
+        // next poll asks only for changes after this cursor
+        if (typeof data.cursor === "number") cursorRef.current = data.cursor;
 
-        if (mounted && typeof onUpdate === "function") {
-          try {
-            onUpdate(data);
-          } catch (cbErr) {
-            console.error("useUpdates onUpdate handler error", cbErr);
-          }
-        }
+        deliver(data);
       } catch (err) {
         console.error("useUpdates poll error", err);
       }
     }
 
-    // run immediately then set interval
-    fetchOnce();
-    timer = window.setInterval(fetchOnce, intervalMs);
+    function startPolling() {
+      if (timer) return;
+      // run immediately then set interval
+      fetchOnce();
+      timer = window.setInterval(fetchOnce, intervalMs);
+    }
+
+    // Prefer the server-push stream: the backend only sends an event after a
+    // commit, so there is nothing to poll while the data is idle. Fall back to
+    // interval polling where EventSource is unavailable or the stream fails.
+    if (typeof window !== "undefined" && "EventSource" in window) {
+      const url = `http://127.0.0.1:5000/updates/stream?cursor=${cursorRef.current}`;
+      source = new EventSource(url);
+      source.addEventListener("update", (ev) => {
+        try {
+          const data = JSON.parse((ev as MessageEvent).data) as UpdatesPayload;
+          if (typeof data.cursor === "number") cursorRef.current = data.cursor;
+          deliver(data);
+        } catch (err) {
+          console.error("useUpdates stream parse error", err);
+        }
+      });
+      source.onerror = () => {
+        // EventSource retries on its own while CONNECTING; only give up once closed
+        if (source && source.readyState === EventSource.CLOSED) {
+          console.error("useUpdates stream closed, falling back to polling");
+          startPolling();
+        }
+      };
+    } else {
+      startPolling();
+    }
 
     return () => {
       mounted = false;
+      if (source) source.close();
       if (timer) window.clearInterval(timer);
     };
-  }, [onUpdate, intervalMs]);
+  }, [intervalMs]);
 }